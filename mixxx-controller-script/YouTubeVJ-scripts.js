@@ -1,21 +1,50 @@
 var YouTubeVJ = {};
 
+// 値を送信するデッキ数・サンプラー数（mixxx-launcherの --decks と合わせる）
+YouTubeVJ.decks = 4;
+YouTubeVJ.samplers = 0;
+
+// デッキ・サンプラーごとに監視するコントロール
+YouTubeVJ.deckControls = [
+  "track_loaded",
+  "play",
+  "bpm",
+  "playposition",
+  "beat_active",
+];
+
+YouTubeVJ.groups = function () {
+  const groups = [];
+  for (let i = 1; i <= YouTubeVJ.decks; i++) {
+    groups.push(`[Channel${i}]`);
+  }
+  for (let i = 1; i <= YouTubeVJ.samplers; i++) {
+    groups.push(`[Sampler${i}]`);
+  }
+  return groups;
+};
+
+YouTubeVJ.isDeck = function (group) {
+  return /^\[(Channel|Sampler)\d+\]$/.test(group);
+};
+
 YouTubeVJ.init = function () {
   print("YouTubeVJ initialized!");
 
-  engine.connectControl("[Channel1]", "track_loaded", YouTubeVJ.update);
-  engine.connectControl("[Channel1]", "play", YouTubeVJ.update);
-  engine.connectControl("[Channel1]", "bpm", YouTubeVJ.update);
-  engine.connectControl("[Channel1]", "playposition", YouTubeVJ.update);
-  engine.connectControl("[Channel1]", "beat_active", YouTubeVJ.update);
-
-  engine.connectControl("[Channel2]", "track_loaded", YouTubeVJ.update);
-  engine.connectControl("[Channel2]", "play", YouTubeVJ.update);
-  engine.connectControl("[Channel2]", "bpm", YouTubeVJ.update);
-  engine.connectControl("[Channel2]", "playposition", YouTubeVJ.update);
-  engine.connectControl("[Channel2]", "beat_active", YouTubeVJ.update);
+  for (const group of YouTubeVJ.groups()) {
+    for (const control of YouTubeVJ.deckControls) {
+      engine.connectControl(group, control, YouTubeVJ.update);
+    }
+  }
 
   engine.connectControl("[Master]", "crossfader", YouTubeVJ.update);
+
+  // ランチャーは最初のメッセージの受信で起動完了と判断するため、初期値を送信しておく
+  YouTubeVJ.update(
+    engine.getValue("[Master]", "crossfader"),
+    "[Master]",
+    "crossfader"
+  );
 };
 
 YouTubeVJ.shutdown = function () {
@@ -34,21 +63,23 @@ YouTubeVJ.update = function (value, group, control) {
     );
   };
 
-  switch (`${group}.${control}`) {
-    case "[Channel1].track_loaded":
-    case "[Channel2].track_loaded":
-      //sendValue(group, "duration");//ロード段階ではまだ取得できない？
-      break;
-    case "[Channel1].play":
-    case "[Channel2].play":
-      sendValue(group, "duration");
-      sendValue(group, "playposition");
-      break;
-    case "[Channel1].bpm":
-    case "[Channel2].bpm":
-      sendValue(group, "rateRange");
-      sendValue(group, "rate");
-      break;
+  if (YouTubeVJ.isDeck(group)) {
+    switch (control) {
+      case "track_loaded":
+        // ランチャー側でライブラリからトラックを特定するための情報
+        sendValue(group, "duration");
+        sendValue(group, "file_bpm");
+        sendValue(group, "track_samplerate");
+        break;
+      case "play":
+        sendValue(group, "duration");
+        sendValue(group, "playposition");
+        break;
+      case "bpm":
+        sendValue(group, "rateRange");
+        sendValue(group, "rate");
+        break;
+    }
   }
 
   sendValue(group, control, value);
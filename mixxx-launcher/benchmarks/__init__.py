@@ -0,0 +1,3 @@
+from .synthetic import create_library_db, create_mp3, generate_log_lines, iter_tracks
+
+__all__ = ["create_library_db", "create_mp3", "generate_log_lines", "iter_tracks"]
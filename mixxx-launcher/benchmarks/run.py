@@ -0,0 +1,333 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from events import EventBroadcaster, MixxxEvent
+from files import AudioFile
+from mixxx import LibraryIndex, MixxxDatabase, MixxxProcessManager
+
+from .synthetic import create_library_db, create_mp3, generate_log_lines, iter_tracks
+
+# ベンチマーク名 -> {"value": 値, "unit": 単位, "better": "lower" | "higher"}
+Results = Dict[str, Dict[str, Any]]
+
+
+def _result(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def _per_op_us(func: Callable[[], int], repeat: int) -> float:
+    """funcを繰り返し実行し、1操作あたりの時間（マイクロ秒）の中央値を返す。funcは操作数を返す"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ops = func()
+        samples.append((time.perf_counter() - started) / ops * 1_000_000)
+    return statistics.median(samples)
+
+
+def _percentile(values: List[float], ratio: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * ratio), len(values) - 1)]
+
+
+def bench_parse(results: Results, quick: bool):
+    """ログ行の解析と、受信処理（handle_mixxx_log）全体のスループット"""
+    lines = generate_log_lines(20_000 if quick else 200_000)
+
+    def parse():
+        for line in lines:
+            MixxxEvent.parse(line)
+        return len(lines)
+
+    us = _per_op_us(parse, 3)
+    results["parse.events_per_sec"] = _result(1_000_000 / us, "events/s", "higher")
+
+    import main  # Flaskアプリ等の初期化を伴うため、必要になった時点で読み込む
+
+    def handle():
+        for line in lines:
+            main.handle_mixxx_log(line)
+        return len(lines)
+
+    us = _per_op_us(handle, 3)
+    main.coalescer.flush()
+    results["handle_mixxx_log.events_per_sec"] = _result(
+        1_000_000 / us, "events/s", "higher"
+    )
+
+    # 標準エラー出力の読み取りスレッドでの振り分け（無関係な行を9割含む）
+    noisy = []
+    for line in generate_log_lines(2_000 if quick else 20_000):
+        noisy.append(line.encode("utf-8"))
+        noisy.extend([b"Debug [Main]: ControlObject 123456 changed"] * 9)
+    manager = MixxxProcessManager()
+    manager.set_log_callback(lambda log_line: None)
+
+    def dispatch():
+        for line in noisy:
+            manager._dispatch(line)
+        return len(noisy)
+
+    us = _per_op_us(dispatch, 3)
+    results["log_dispatch.lines_per_sec"] = _result(1_000_000 / us, "lines/s", "higher")
+
+
+def bench_fanout(results: Results, quick: bool):
+    """接続中のクライアント数ごとの、送信からSSEストリームに書き出されるまでの遅延"""
+    events = 200 if quick else 1000
+    for clients in (1, 10, 100):
+        broadcaster = EventBroadcaster(keepalive_interval=60.0)
+        received: List[List[tuple]] = []
+        threads = []
+        for _ in range(clients):
+            log: List[tuple] = []
+            received.append(log)
+            stream = broadcaster.stream(broadcaster.subscribe())
+            next(stream)  # 接続確認のコメント
+
+            def consume(stream=stream, log=log):
+                for chunk in stream:
+                    log.append((time.perf_counter(), chunk.count(b"data: ")))
+
+            thread = threading.Thread(target=consume, daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        published = []
+        publish_cost = []
+        for seq in range(events):
+            event = MixxxEvent("[Channel1]", "playposition", seq / events)
+            started = time.perf_counter()
+            broadcaster.publish(event)
+            finished = time.perf_counter()
+            published.append(started)
+            publish_cost.append((finished - started) * 1_000_000)
+            time.sleep(0.001)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and any(
+            sum(count for _, count in log) < events for log in received
+        ):
+            time.sleep(0.01)
+
+        latencies = []
+        for log in received:
+            seq = 0
+            for received_at, count in log:
+                for _ in range(count):
+                    if seq < events:
+                        latencies.append((received_at - published[seq]) * 1_000_000)
+                    seq += 1
+
+        for subscriber in list(broadcaster._subscribers):
+            broadcaster.unsubscribe(subscriber)
+        for thread in threads:
+            thread.join(timeout=1)
+
+        name = f"fanout.{clients}_clients"
+        results[f"{name}.latency_p50_us"] = _result(_percentile(latencies, 0.5), "us")
+        results[f"{name}.latency_p99_us"] = _result(_percentile(latencies, 0.99), "us")
+        results[f"{name}.publish_us"] = _result(statistics.median(publish_cost), "us")
+
+
+def bench_database(results: Results, quick: bool, workdir: str, tracks: int):
+    """生成したMixxxデータベースに対するトラックの検索"""
+    path = os.path.join(workdir, f"mixxxdb-{tracks}.sqlite")
+    if not os.path.exists(path):
+        create_library_db(path, tracks)
+
+    samples = list(iter_tracks(tracks))[:: max(tracks // (50 if quick else 200), 1)]
+    db = MixxxDatabase(path)
+    try:
+
+        def resolve():
+            for _, title, artist, *_ in samples:
+                db.resolve_track(artist, title)
+            return len(samples)
+
+        def resolve_like():
+            for _, title, artist, *_ in samples:
+                db.resolve_track(artist, title[:-2] + "%", like_search=True)
+            return len(samples)
+
+        results["db.resolve_track_us"] = _result(_per_op_us(resolve, 3), "us")
+        results["db.resolve_track_like_us"] = _result(_per_op_us(resolve_like, 3), "us")
+
+        index = LibraryIndex(db)
+        started = time.perf_counter()
+        index.refresh(force=True)
+        results["index.build_ms"] = _result((time.perf_counter() - started) * 1000, "ms")
+
+        def lookup():
+            for _, title, artist, *_ in samples:
+                index.lookup(artist, title[:-2] + "…")
+            return len(samples)
+
+        def match():
+            for _, _, _, duration, bpm, samplerate, _ in samples:
+                index.match_properties(duration, bpm, samplerate)
+            return len(samples)
+
+        results["index.lookup_us"] = _result(_per_op_us(lookup, 5), "us")
+        results["index.match_properties_us"] = _result(_per_op_us(match, 5), "us")
+    finally:
+        db.close()
+
+
+def bench_tags(results: Results, quick: bool, workdir: str):
+    """合成したMP3ファイルからのタグの抽出（アートワーク無し・大きなアートワーク有り）"""
+    repeat = 20 if quick else 100
+    files = {
+        "plain": create_mp3(os.path.join(workdir, "plain.mp3")),
+        "artwork": create_mp3(
+            os.path.join(workdir, "artwork.mp3"), artwork_size=5 * 1024 * 1024
+        ),
+    }
+    for name, path in files.items():
+
+        def header_only(path=path):
+            for _ in range(repeat):
+                AudioFile(path, ("YouTubeID",))
+            return repeat
+
+        def full(path=path):
+            for _ in range(max(repeat // 10, 2)):
+                AudioFile(path)
+            return max(repeat // 10, 2)
+
+        results[f"tags.{name}.header_only_us"] = _result(_per_op_us(header_only, 3), "us")
+        results[f"tags.{name}.eyed3_us"] = _result(_per_op_us(full, 3), "us")
+
+
+BENCHMARKS = ("parse", "fanout", "database", "tags")
+
+
+def run(
+    only: Optional[List[str]] = None,
+    quick: bool = False,
+    workdir: Optional[str] = None,
+    tracks: int = 100_000,
+) -> Dict[str, Any]:
+    """
+    ベンチマークを実行する。
+
+    Args:
+        only (Optional[List[str]], optional): 実行するベンチマーク名。指定されない場合は全て。
+        quick (bool, optional): 件数を減らして短時間で実行するかどうか
+        workdir (Optional[str], optional): 生成したファイルの保存先。指定されない場合は一時ディレクトリ。
+        tracks (int, optional): 生成するデータベースのトラック数
+
+    Returns:
+        Dict[str, Any]: "meta"（実行環境）と"results"（計測結果）を持つ辞書
+    """
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for name in only or BENCHMARKS:
+            print(f"実行中: {name}", file=sys.stderr)
+            if name == "parse":
+                bench_parse(results, quick)
+            elif name == "fanout":
+                bench_fanout(results, quick)
+            elif name == "database":
+                bench_database(results, quick, workdir, tracks)
+            elif name == "tags":
+                bench_tags(results, quick, workdir)
+
+    return {"meta": _meta(quick, tracks), "results": results}
+
+
+def _meta(quick: bool, tracks: int) -> Dict[str, Any]:
+    """計測結果を比較するための実行環境の情報"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "tracks": tracks,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """
+    2つの計測結果を比較して表示する。
+
+    Args:
+        baseline (Dict[str, Any]): 比較元の計測結果
+        current (Dict[str, Any]): 今回の計測結果
+        threshold (float): 悪化とみなす変化率（0.1で10%）
+
+    Returns:
+        bool: 悪化したベンチマークがある場合True
+    """
+    regressed = False
+    print(f"{'benchmark':48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            print(f"{name:48} {'-':>12} {result['value']:>12} {'new':>8}")
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = change > threshold if result["better"] == "lower" else change < -threshold
+        regressed |= worse
+        mark = "  << 悪化" if worse else ""
+        print(
+            f"{name:48} {base['value']:>12} {result['value']:>12} {change:>+8.1%}{mark}"
+        )
+    return regressed
+
+
+def main():
+    """
+    ベンチマークをコマンドラインから実行する。
+    """
+    parser = argparse.ArgumentParser(description="ランチャーの主要な処理の性能を計測します。")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="実行するベンチマーク")
+    parser.add_argument("--quick", action="store_true", help="件数を減らして短時間で実行する")
+    parser.add_argument("--tracks", type=int, default=100_000, help="生成するトラック数")
+    parser.add_argument("--workdir", help="生成したファイルの保存先（再実行時に再利用する）")
+    parser.add_argument("--output", help="計測結果を書き出すJSONファイル")
+    parser.add_argument("--compare", help="比較元の計測結果のJSONファイル")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="悪化とみなす変化率。デフォルトは0.1。"
+    )
+    args = parser.parse_args()
+
+    current = run(args.only, args.quick, args.workdir, args.tracks)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
+    elif not args.output:
+        json.dump(current, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+
+if __name__ == "__main__":
+    main()
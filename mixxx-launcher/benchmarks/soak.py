@@ -0,0 +1,198 @@
+import argparse
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from events import DEFAULT_MAX_QUEUE, EventBroadcaster, MixxxEvent
+
+
+def _publish_loop(broadcaster: EventBroadcaster, rate: float, stop: threading.Event):
+    """再生中と同じ程度の頻度でイベントを送信し続ける"""
+    interval = 1 / rate
+    seq = 0
+    while not stop.is_set():
+        seq += 1
+        broadcaster.publish(
+            MixxxEvent(f"[Channel{seq % 2 + 1}]", "playposition", (seq % 1000) / 1000)
+        )
+        time.sleep(interval)
+
+
+def _wait_for(predicate, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def soak_in_process(
+    cycles: int, clients: int, rate: float, evict_after: float, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    ブロードキャスタに対してクライアントの接続・切断を繰り返し、メモリ使用量の推移を計測する。
+
+    1サイクルごとに以下のクライアントを混在させます。
+      - 数回受信してから切断する（通常の再読み込み）
+      - 接続直後に切断する
+      - 受信も切断もしない（切断を検知できない接続。キューが溢れて切断されるはず）
+
+    Args:
+        cycles (int): 接続・切断を繰り返す回数
+        clients (int): 1サイクルあたりのクライアント数
+        rate (float): 1秒あたりの送信イベント数
+        evict_after (float): 送信が追いつかないクライアントを切断するまでの秒数
+        seed (int, optional): クライアントの種類を決める乱数のシード
+
+    Returns:
+        Dict[str, Any]: 計測結果
+    """
+    rng = random.Random(seed)
+    tracemalloc.start()
+    broadcaster = EventBroadcaster(keepalive_interval=60.0, evict_after=evict_after)
+    # リングバッファを先に埋めておき、その分の増加を計測に含めない
+    for seq in range(broadcaster._history.maxlen):
+        broadcaster.publish(MixxxEvent("[Channel1]", "playposition", seq / 1000))
+    stop = threading.Event()
+    publisher = threading.Thread(
+        target=_publish_loop, args=(broadcaster, rate, stop), daemon=True
+    )
+    publisher.start()
+
+    baseline: Optional[int] = None
+    samples = []
+    try:
+        for cycle in range(cycles):
+            for _ in range(clients):
+                kind = rng.random()
+                subscriber = broadcaster.subscribe()
+                if kind < 0.1:
+                    continue  # 放置された接続
+                stream = broadcaster.stream(subscriber)
+                next(stream)
+                if kind < 0.6:
+                    subscriber.wait(0.01)
+                stream.close()
+
+            if cycle == min(cycles // 10, 50):
+                baseline = tracemalloc.get_traced_memory()[0]
+            if cycle % max(cycles // 20, 1) == 0:
+                samples.append(
+                    (cycle, tracemalloc.get_traced_memory()[0], broadcaster.subscriber_count)
+                )
+
+        # 放置された接続が全て切断されるまで待つ
+        drained = _wait_for(
+            lambda: broadcaster.subscriber_count == 0,
+            DEFAULT_MAX_QUEUE / rate + evict_after + 2,
+        )
+        final = tracemalloc.get_traced_memory()[0]
+    finally:
+        stop.set()
+        publisher.join()
+        tracemalloc.stop()
+
+    return {
+        "cycles": cycles,
+        "connections": cycles * clients,
+        "evicted": broadcaster.evicted,
+        "remaining_clients": broadcaster.subscriber_count,
+        "drained": drained,
+        "baseline_bytes": baseline,
+        "final_bytes": final,
+        "samples": samples,
+    }
+
+
+def soak_server(url: str, cycles: int, clients: int, settle: float) -> Dict[str, Any]:
+    """
+    起動中のランチャーのSSEに接続・切断を繰り返し、接続数が元に戻るかを確認する。
+
+    Args:
+        url (str): ランチャーのURL（例: http://localhost:5000）
+        cycles (int): 接続・切断を繰り返す回数
+        clients (int): 1サイクルあたりの同時接続数
+        settle (float): 切断の検知を待つ最大秒数
+
+    Returns:
+        Dict[str, Any]: 計測結果
+    """
+    import requests
+
+    def client_count() -> int:
+        summary = requests.get(f"{url}/metrics", params={"format": "json"}, timeout=5).json()
+        return sum(sample["value"] for sample in summary.get("youtubevj_sse_clients", []))
+
+    before = client_count()
+    for _ in range(cycles):
+        responses = [
+            requests.get(f"{url}/events", stream=True, timeout=5) for _ in range(clients)
+        ]
+        for response in responses:
+            next(response.iter_content(chunk_size=None))
+            response.close()
+
+    # スレッド方式のサーバーは次の書き込み（イベントかキープアライブ）で切断を検知する
+    drained = _wait_for(lambda: client_count() <= before, settle)
+    return {
+        "cycles": cycles,
+        "connections": cycles * clients,
+        "clients_before": before,
+        "clients_after": client_count(),
+        "drained": drained,
+    }
+
+
+def main():
+    """
+    長時間の接続・切断の繰り返しでメモリやクライアントが残らないことをコマンドラインから確認する。
+    """
+    parser = argparse.ArgumentParser(
+        description="SSEクライアントの接続・切断を繰り返し、リソースが解放されることを確認します。"
+    )
+    parser.add_argument("--cycles", type=int, default=2000, help="接続・切断を繰り返す回数")
+    parser.add_argument("--clients", type=int, default=5, help="1サイクルあたりのクライアント数")
+    parser.add_argument("--rate", type=float, default=500.0, help="1秒あたりの送信イベント数")
+    parser.add_argument(
+        "--evict-after", type=float, default=0.5, help="送信が追いつかないクライアントを切断する秒数"
+    )
+    parser.add_argument(
+        "--max-growth-kb",
+        type=float,
+        default=512.0,
+        help="許容するメモリ使用量の増加（KB）。デフォルトは512。",
+    )
+    parser.add_argument("--url", help="起動中のランチャーのURL。指定した場合はHTTP経由で確認する")
+    parser.add_argument("--settle", type=float, default=20.0, help="切断の検知を待つ最大秒数")
+    args = parser.parse_args()
+
+    if args.url:
+        result = soak_server(args.url.rstrip("/"), args.cycles, args.clients, args.settle)
+        print(
+            f"接続数: {result['connections']}  "
+            f"クライアント数: {result['clients_before']} -> {result['clients_after']}"
+        )
+        if not result["drained"]:
+            print("切断したクライアントが残っています", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    result = soak_in_process(args.cycles, args.clients, args.rate, args.evict_after)
+    for cycle, traced, subscribers in result["samples"]:
+        print(f"cycle {cycle:>6}  memory {traced / 1024:>10.1f} KB  clients {subscribers}")
+    growth = (result["final_bytes"] - (result["baseline_bytes"] or 0)) / 1024
+    print(
+        f"接続数: {result['connections']}  切断（送信遅延）: {result['evicted']}  "
+        f"残りのクライアント: {result['remaining_clients']}  メモリの増加: {growth:+.1f} KB"
+    )
+    if not result["drained"] or growth > args.max_growth_kb:
+        print("リソースが解放されていません", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import json
+import os
+import random
+import sqlite3
+import struct
+from typing import Iterator, List, Optional
+
+from events import MESSAGE_PREFIX
+
+# Mixxxの開発者モードでコントローラースクリプトのデバッグ出力に付与される接頭部分
+_LOG_PREFIX = "Debug [Controller]: "
+
+# (コントロール名, 発生頻度の重み)。実際のセットではplaypositionとbeat_activeが大半を占める
+_CONTROL_WEIGHTS = [
+    ("playposition", 60),
+    ("beat_active", 30),
+    ("volume", 4),
+    ("rate", 3),
+    ("bpm", 2),
+    ("play", 1),
+]
+
+_WORDS = (
+    "love night dance star dream light fire heart summer rain city blue "
+    "girl boy world time sky moon sun party beat sound wave electric"
+).split()
+
+# MPEG1 Layer3 128kbps 44.1kHz の無音フレーム
+_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def generate_log_lines(
+    count: int, decks: int = 2, seed: int = 0, noise_ratio: float = 0.0
+) -> List[str]:
+    """
+    コントローラースクリプトが出力するログ行を生成する。
+
+    Args:
+        count (int): 生成するメッセージの件数
+        decks (int, optional): デッキ数。デフォルトは2。
+        seed (int, optional): 乱数のシード
+        noise_ratio (float, optional): メッセージ1件あたりに混ぜる無関係なログ行の割合
+
+    Returns:
+        List[str]: ログ行
+    """
+    rng = random.Random(seed)
+    controls = [control for control, _ in _CONTROL_WEIGHTS]
+    weights = [weight for _, weight in _CONTROL_WEIGHTS]
+    positions = [0.0] * decks
+    lines = []
+    for _ in range(count):
+        deck = rng.randrange(decks)
+        control = rng.choices(controls, weights)[0]
+        if control == "playposition":
+            positions[deck] = (positions[deck] + 0.0004) % 1.0
+            value = round(positions[deck], 6)
+        elif control in ("beat_active", "play"):
+            value = rng.randrange(2)
+        elif control == "bpm":
+            value = round(rng.uniform(120, 140), 2)
+        else:
+            value = round(rng.random(), 4)
+        message = json.dumps(
+            {"group": f"[Channel{deck + 1}]", "control": control, "value": value}
+        )
+        lines.append(f"{_LOG_PREFIX}{MESSAGE_PREFIX}{message}")
+
+        if noise_ratio and rng.random() < noise_ratio:
+            lines.append(f"Debug [Main]: ControlObject {rng.randrange(10**6)} changed")
+    return lines
+
+
+def iter_tracks(count: int, seed: int = 0) -> Iterator[tuple]:
+    """
+    ライブラリのトラックを生成する。
+
+    Args:
+        count (int): トラック数
+        seed (int, optional): 乱数のシード
+
+    Yields:
+        tuple: (ID, タイトル, アーティスト, 曲の長さ, BPM, サンプルレート, ファイルパス)
+    """
+    rng = random.Random(seed)
+    for library_id in range(1, count + 1):
+        title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 5)))
+        artist = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 2))).title()
+        yield (
+            library_id,
+            f"{title.title()} {library_id}",
+            artist,
+            round(rng.uniform(120, 420), 6),
+            round(rng.uniform(80, 180), 6),
+            rng.choice((44100, 48000)),
+            f"C:/Music/{artist}/{library_id:06d}.mp3",
+        )
+
+
+def create_library_db(path: str, tracks: int = 100_000, seed: int = 0) -> str:
+    """
+    Mixxxのデータベースと同じ構造（使用するテーブル・列のみ）のデータベースを生成する。
+
+    Args:
+        path (str): 生成するデータベースのパス（既存のファイルは上書きします）
+        tracks (int, optional): トラック数。デフォルトは100,000。
+        seed (int, optional): 乱数のシード
+
+    Returns:
+        str: 生成したデータベースのパス
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executescript(
+            """
+            CREATE TABLE track_locations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                location VARCHAR(512) UNIQUE
+            );
+            CREATE TABLE library (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                artist VARCHAR(64),
+                title VARCHAR(64),
+                duration INTEGER,
+                bpm FLOAT,
+                samplerate INTEGER,
+                location INTEGER REFERENCES track_locations(location),
+                mixxx_deleted INTEGER
+            );
+            """
+        )
+        rows = list(iter_tracks(tracks, seed))
+        connection.executemany(
+            "INSERT INTO track_locations (id, location) VALUES (?, ?)",
+            ((row[0], row[6]) for row in rows),
+        )
+        connection.executemany(
+            """
+            INSERT INTO library
+                (id, title, artist, duration, bpm, samplerate, location, mixxx_deleted)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+            """,
+            (row[:6] + (row[0],) for row in rows),
+        )
+    connection.close()
+    return path
+
+
+def _id3_frame(frame_id: str, payload: bytes) -> bytes:
+    """ID3v2.3のフレームを生成する"""
+    return frame_id.encode("ascii") + struct.pack(">IH", len(payload), 0) + payload
+
+
+def _syncsafe(size: int) -> bytes:
+    """ID3v2のヘッダーで使用する同期安全整数に変換する"""
+    return bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def create_mp3(
+    path: str,
+    youtube_id: Optional[str] = "dQw4w9WgXcQ",
+    artwork_size: int = 0,
+    frames: int = 400,
+) -> str:
+    """
+    ID3v2.3タグを持つ無音のMP3ファイルを生成する。
+
+    Args:
+        path (str): 生成するファイルのパス
+        youtube_id (Optional[str], optional): YouTubeIDタグの値。Noneの場合はタグを付けない。
+        artwork_size (int, optional): 埋め込むアートワーク（APICフレーム）のバイト数
+        frames (int, optional): MPEGフレーム数（400フレームで約10秒）
+
+    Returns:
+        str: 生成したファイルのパス
+    """
+    body = _id3_frame("TIT2", b"\x03Synthetic Track") + _id3_frame(
+        "TPE1", b"\x03Benchmark"
+    )
+    if artwork_size:
+        # タグ領域の先頭側にアートワークを置き、読み飛ばしの効率を計測できるようにする
+        artwork = b"\xff\xd8\xff\xe0" + os.urandom(max(artwork_size - 4, 0))
+        body = _id3_frame("APIC", b"\x00image/jpeg\x00\x03\x00" + artwork) + body
+    if youtube_id is not None:
+        body += _id3_frame("TXXX", b"\x03YouTubeID\x00" + youtube_id.encode("utf-8"))
+
+    header = b"ID3\x03\x00\x00" + _syncsafe(len(body))
+    with open(path, "wb") as f:
+        f.write(header + body + _MP3_FRAME * frames)
+    return path
@@ -0,0 +1,29 @@
+from .broadcaster import (
+    DEFAULT_MAX_QUEUE,
+    DEFAULT_TRANSIENT_CONTROLS,
+    AsyncEventSubscriber,
+    EventBroadcaster,
+    EventSubscriber,
+)
+from .codec import WIRE_FORMATS, KeyTable, encode_batch
+from .coalescer import DEFAULT_COALESCE_RATES, EventCoalescer
+from .message import MESSAGE_PREFIX, MixxxEvent
+from .position import PositionTracker
+from .state import StateStore
+
+__all__ = [
+    "AsyncEventSubscriber",
+    "DEFAULT_COALESCE_RATES",
+    "DEFAULT_MAX_QUEUE",
+    "DEFAULT_TRANSIENT_CONTROLS",
+    "EventBroadcaster",
+    "EventCoalescer",
+    "EventSubscriber",
+    "KeyTable",
+    "MESSAGE_PREFIX",
+    "MixxxEvent",
+    "PositionTracker",
+    "StateStore",
+    "WIRE_FORMATS",
+    "encode_batch",
+]
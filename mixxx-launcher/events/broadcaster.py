@@ -0,0 +1,535 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .codec import KeyTable, encode_definition
+from .message import MixxxEvent
+
+if TYPE_CHECKING:
+    from metrics import MetricsRegistry
+
+_subscriber_ids = itertools.count(1)
+
+# スナップショットに含めない一時的なコントロール（接続時点の値に意味が無いもの）
+DEFAULT_TRANSIENT_CONTROLS = ("beat_active",)
+
+# クライアントごとの送信待ちイベントの上限。超えた場合は古いものから破棄する
+DEFAULT_MAX_QUEUE = 1024
+
+
+class EventSubscriber:
+    """
+    ブロードキャスタに登録された1クライアント分の受信キュー。
+
+    メッセージが届いた時だけ待機中のスレッドを起こすため、
+    条件変数を使用してキューを保護します。
+    キューは`max_queue`件までとし、溢れた場合は古いイベントから破棄します。
+
+    Attributes:
+        id (int): クライアントの識別番号（メトリクスのラベルに使用する）
+        queue (Deque[MixxxEvent]): 送信待ちのイベント
+        closed (bool): 購読が終了しているかどうか
+        backlog (List[MixxxEvent]): 接続直後に送信するスナップショット（または再送分）
+        resume_id (Optional[str]): 接続直後に送信する、次回の再接続の基準となるイベントID
+        wire_format (str): 送信形式（"json"、"compact"、"binary"）
+        definitions (List[Tuple[int, str, str]]): 接続直後に送信するキーの対応表
+        delivered (int): ストリームに書き出したイベントの件数
+        dropped (int): 送信されずに破棄されたイベントの件数
+        max_queue (int): 送信待ちイベントの上限
+        overflowing_since (Optional[float]): キューが溢れ始めた時刻。溢れていない場合はNone
+    """
+
+    def __init__(self, wire_format: str = "json", max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        EventSubscriberの初期化メソッド。
+
+        Args:
+            wire_format (str, optional): 送信形式。デフォルトは"json"。
+            max_queue (int, optional): 送信待ちイベントの上限。デフォルトは1024。
+        """
+        self.id = next(_subscriber_ids)
+        self.wire_format = wire_format
+        self.max_queue = max_queue
+        self.overflowing_since: Optional[float] = None
+        self.definitions: List[Tuple[int, str, str]] = []
+        self.queue: Deque[MixxxEvent] = deque()
+        self.closed = False
+        self.backlog: List[MixxxEvent] = []
+        self.resume_id: Optional[str] = None
+        self.delivered = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+
+    def push(self, event: MixxxEvent):
+        """
+        イベントをキューに追加し、待機中のスレッドを起こす。
+
+        Args:
+            event (MixxxEvent): 送信するイベント
+        """
+        with self._cond:
+            self._append(event)
+            self._cond.notify()
+
+    def _append(self, event: MixxxEvent):
+        """キューにイベントを追加する。上限に達している場合は最も古いイベントを破棄する"""
+        if len(self.queue) >= self.max_queue:
+            self.queue.popleft()
+            self.dropped += 1
+            if self.overflowing_since is None:
+                self.overflowing_since = event.received_at
+        self.queue.append(event)
+
+    def _take(self) -> List[MixxxEvent]:
+        """溜まっているイベントを全て取り出す。`_cond`を保持した状態で呼び出すこと"""
+        events = list(self.queue)
+        self.queue.clear()
+        self.overflowing_since = None
+        return events
+
+    def close(self):
+        """
+        購読を終了し、待機中のスレッドを起こす。
+        """
+        with self._cond:
+            self.closed = True
+            # 切断時に送信できなかったイベントは破棄として数える
+            self.dropped += len(self.queue)
+            self.queue.clear()
+            self._cond.notify()
+
+    def wait(self, timeout: float) -> List[MixxxEvent]:
+        """
+        イベントが届くかタイムアウトするまで待機し、溜まっているイベントを取り出す。
+
+        Args:
+            timeout (float): 最大待機秒数
+
+        Returns:
+            List[MixxxEvent]: 取り出したイベント。タイムアウトした場合は空リスト。
+        """
+        with self._cond:
+            if not self.queue and not self.closed:
+                self._cond.wait(timeout)
+            return self._take()
+
+
+class AsyncEventSubscriber(EventSubscriber):
+    """
+    asyncioのイベントループ上で待機する受信キュー。
+
+    クライアントごとにスレッドを占有せず、1つのイベントループで多数の接続を扱うために使用します。
+    イベントの追加は任意のスレッドから行われるため、`call_soon_threadsafe`でループを起こします。
+    """
+
+    def __init__(
+        self,
+        wire_format: str = "json",
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        """
+        AsyncEventSubscriberの初期化メソッド。イベントループ上で呼び出すこと。
+
+        Args:
+            wire_format (str, optional): 送信形式。デフォルトは"json"。
+            max_queue (int, optional): 送信待ちイベントの上限。デフォルトは1024。
+            loop (Optional[asyncio.AbstractEventLoop], optional): 待機するイベントループ。
+                指定されない場合は実行中のイベントループ。
+        """
+        super().__init__(wire_format, max_queue)
+        self._loop = loop or asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._wakeup_scheduled = False
+
+    def push(self, event: MixxxEvent):
+        """
+        イベントをキューに追加し、イベントループを起こす。
+
+        Args:
+            event (MixxxEvent): 送信するイベント
+        """
+        with self._cond:
+            self._append(event)
+            if self._wakeup_scheduled:
+                return  # 起床済みで未処理のイベントとまとめて取り出される
+            self._wakeup_scheduled = True
+        self._schedule_wakeup()
+
+    def close(self):
+        """
+        購読を終了し、待機中のイベントループを起こす。
+        """
+        super().close()
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self):
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup)
+        except RuntimeError:
+            pass  # イベントループが既に終了している
+
+    def _wakeup(self):
+        with self._cond:
+            self._wakeup_scheduled = False
+        self._ready.set()
+
+    async def wait_async(self, timeout: float) -> List[MixxxEvent]:
+        """
+        イベントが届くかタイムアウトするまで待機し、溜まっているイベントを取り出す。
+
+        Args:
+            timeout (float): 最大待機秒数
+
+        Returns:
+            List[MixxxEvent]: 取り出したイベント。タイムアウトした場合は空リスト。
+        """
+        self._ready.clear()
+        with self._cond:
+            waiting = not self.queue and not self.closed
+        if waiting:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        with self._cond:
+            return self._take()
+
+
+class EventBroadcaster:
+    """
+    接続中の全てのクライアントへイベントを配信するクラス。
+
+    クライアントはメッセージが届いた時にのみ起床し、
+    キープアライブのコメントは独立したタイマーで送信されます。
+
+    配信するイベントには連番のIDを割り当て、直近のイベントをリングバッファに保持します。
+    新しいクライアントには各 `(group, control)` の最新の値をスナップショットとして送り、
+    `Last-Event-ID`で再接続したクライアントには切断中に配信したイベントのみを送ります。
+    IDにはサーバーの起動ごとに異なる接頭辞を付け、再起動前のIDではスナップショットを送ります。
+
+    送信が追いつかないクライアント（通信の遅い端末や、切断を検知できていない接続）の
+    キューは古いイベントから破棄し、溢れた状態が`evict_after`秒続いた場合は切断します。
+    切断されたクライアントは`Last-Event-ID`で再接続し、不足分を受け取り直せます。
+
+    `metrics`を指定した場合は、イベントの受信（ログ行の解析）からストリームへの
+    書き出しまでの遅延と、クライアントごとのキューの長さ・破棄件数を記録します。
+
+    Attributes:
+        keepalive_interval (float): 無通信時にキープアライブを送る間隔（秒）
+        retry (int): クライアントが再接続するまでの時間（ミリ秒）
+        evict_after (float): キューが溢れた状態がこの秒数続いたクライアントを切断する
+        evicted (int): 切断したクライアントの数
+    """
+
+    def __init__(
+        self,
+        keepalive_interval: float = 15.0,
+        metrics: Optional["MetricsRegistry"] = None,
+        history: int = 2048,
+        transient_controls: Iterable[str] = DEFAULT_TRANSIENT_CONTROLS,
+        retry: int = 1000,
+        evict_after: float = 10.0,
+    ):
+        """
+        EventBroadcasterの初期化メソッド。
+
+        Args:
+            keepalive_interval (float, optional): キープアライブの送信間隔（秒）。デフォルトは15。
+            metrics (Optional[MetricsRegistry], optional): メトリクスの記録先
+            history (int, optional): 再接続時の再送のために保持するイベント数。デフォルトは2048。
+            transient_controls (Iterable[str], optional): スナップショットに含めないコントロール
+            retry (int, optional): クライアントが再接続するまでの時間（ミリ秒）。デフォルトは1000。
+            evict_after (float, optional): 送信が追いつかないクライアントを切断するまでの秒数。
+                デフォルトは10。
+        """
+        self.keepalive_interval = keepalive_interval
+        self.retry = retry
+        self.evict_after = evict_after
+        self.evicted = 0
+        self._subscribers: List[EventSubscriber] = []
+        self._lock = threading.Lock()
+        self._epoch = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self._history: Deque[MixxxEvent] = deque(maxlen=history)
+        self._latest: Dict[Tuple[str, str], MixxxEvent] = {}
+        self._transient = frozenset(transient_controls)
+        self.keys = KeyTable()
+        self._latency = None
+        if metrics is not None:
+            self._latency = metrics.histogram(
+                "youtubevj_event_delivery_seconds",
+                "ログ行の受信からSSEストリームへの書き出しまでの時間",
+            ).labels()
+            self._register_metrics(metrics)
+
+    def _register_metrics(self, metrics: "MetricsRegistry"):
+        """クライアントごとの状態を出力時に取得するメトリクスを登録する"""
+
+        def per_client(attribute):
+            return lambda: [
+                ({"client": str(subscriber.id)}, attribute(subscriber))
+                for subscriber in self.subscribers()
+            ]
+
+        metrics.register_callback(
+            "youtubevj_sse_clients",
+            "接続中のSSEクライアント数",
+            lambda: [({}, self.subscriber_count)],
+        )
+        metrics.register_callback(
+            "youtubevj_sse_queue_depth",
+            "クライアントごとの送信待ちイベント数",
+            per_client(lambda subscriber: len(subscriber.queue)),
+        )
+        metrics.register_callback(
+            "youtubevj_sse_delivered_total",
+            "クライアントごとの送信済みイベント数",
+            per_client(lambda subscriber: subscriber.delivered),
+            kind="counter",
+        )
+        metrics.register_callback(
+            "youtubevj_sse_dropped_total",
+            "クライアントごとの破棄されたイベント数",
+            per_client(lambda subscriber: subscriber.dropped),
+            kind="counter",
+        )
+        metrics.register_callback(
+            "youtubevj_sse_evicted_total",
+            "送信が追いつかずに切断したクライアント数",
+            lambda: [({}, self.evicted)],
+            kind="counter",
+        )
+
+    @property
+    def subscriber_count(self) -> int:
+        """
+        接続中のクライアント数を返す。
+        """
+        return len(self._subscribers)
+
+    def subscribers(self) -> List[EventSubscriber]:
+        """
+        接続中のクライアントの一覧を返す。
+        """
+        with self._lock:
+            return list(self._subscribers)
+
+    def subscribe(
+        self,
+        last_event_id: Optional[str] = None,
+        subscriber: Optional[EventSubscriber] = None,
+    ) -> EventSubscriber:
+        """
+        新しいクライアントを登録する。
+
+        `last_event_id`より後のイベントがリングバッファに残っていればそのイベントを、
+        それ以外の場合は最新の値のスナップショットを、接続直後に送信するよう準備します。
+
+        Args:
+            last_event_id (Optional[str], optional): クライアントが最後に受信したイベントID
+                （再接続時の`Last-Event-ID`ヘッダー）
+            subscriber (Optional[EventSubscriber], optional): 登録する受信キュー。
+                指定されない場合はスレッドで待機する`EventSubscriber`を生成します。
+
+        Returns:
+            EventSubscriber: 登録したクライアントの受信キュー
+        """
+        if subscriber is None:
+            subscriber = EventSubscriber()
+        with self._lock:
+            missed = self._events_after(last_event_id)
+            if missed is None:
+                missed = list(self._latest.values())
+            subscriber.backlog = missed
+            if subscriber.wire_format != "json":
+                subscriber.definitions = self.keys.items()
+            if self._seq and (not missed or missed[-1] is not self._history[-1]):
+                # スナップショットの後に現在のIDを送り、次回の再接続の基準にする
+                subscriber.resume_id = f"{self._epoch}-{self._seq}"
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def _events_after(self, last_event_id: Optional[str]) -> Optional[List[MixxxEvent]]:
+        """
+        指定したIDより後に配信したイベントを返す。`_lock`を保持した状態で呼び出すこと。
+
+        Returns:
+            Optional[List[MixxxEvent]]: イベント。IDが不明、または既にリングバッファから
+                消えている場合はNone
+        """
+        if not last_event_id:
+            return None
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq:
+            return None
+        if seq == self._seq:
+            return []
+
+        oldest = self._seq - len(self._history) + 1
+        if seq + 1 < oldest:
+            return None
+        # リングバッファ内のIDは連続しているため、位置を直接求められる
+        return list(self._history)[seq + 1 - oldest :]
+
+    def unsubscribe(self, subscriber: EventSubscriber):
+        """
+        クライアントの登録を解除する。
+
+        Args:
+            subscriber (EventSubscriber): 解除するクライアント
+        """
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event: MixxxEvent):
+        """
+        接続中の全てのクライアントにイベントを送信する。
+
+        SSE形式へのエンコードは全クライアントで共有するため一度だけ行います。
+
+        Args:
+            event (MixxxEvent): 送信するイベント
+        """
+        with self._lock:
+            self._seq += 1
+            event.event_id = f"{self._epoch}-{self._seq}"
+            event.key_id, event.key_is_new = self.keys.intern(event.group, event.control)
+            event.wire  # 各クライアントのスレッドでエンコードが重複しないよう先にエンコードする
+            self._history.append(event)
+            if event.control not in self._transient:
+                # 配信順を保つため、更新したキーは末尾に移動する
+                key = (event.group, event.control)
+                self._latest.pop(key, None)
+                self._latest[key] = event
+            # IDの順序とクライアントへの到着順が一致するよう、ロックを保持したまま追加する
+            slow = None
+            for subscriber in self._subscribers:
+                subscriber.push(event)
+                since = subscriber.overflowing_since
+                if since is not None and event.received_at - since >= self.evict_after:
+                    slow = slow or []
+                    slow.append(subscriber)
+            if slow:
+                self._evict(slow)
+
+    def _evict(self, subscribers: List[EventSubscriber]):
+        """送信が追いつかないクライアントを切断する。`_lock`を保持した状態で呼び出すこと"""
+        for subscriber in subscribers:
+            # ストリーム側は待機から起きた時点で終了し、登録解除は冪等に行われる
+            subscriber.close()
+            self._subscribers.remove(subscriber)
+            self.evicted += 1
+
+    def stream(self, subscriber: EventSubscriber) -> Iterator[bytes]:
+        """
+        クライアントへ送信するSSEストリームを生成する。
+
+        ジェネレータが閉じられた時（クライアント切断時）に登録を解除します。
+
+        Args:
+            subscriber (EventSubscriber): 送信先のクライアント
+
+        Yields:
+            bytes: SSE形式のメッセージ
+        """
+        try:
+            yield self._initial_message(subscriber)
+            last_write = time.monotonic()
+            while not subscriber.closed:
+                timeout = self.keepalive_interval - (time.monotonic() - last_write)
+                events = subscriber.wait(max(timeout, 0))
+                if events:
+                    yield self._encode(subscriber, events)
+                    last_write = time.monotonic()
+                    self._record_delivery(subscriber, events, last_write)
+                elif time.monotonic() - last_write >= self.keepalive_interval:
+                    yield b": keepalive\n\n"  # 無通信が続いた場合のみ接続を維持
+                    last_write = time.monotonic()
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def stream_async(self, subscriber: AsyncEventSubscriber) -> AsyncIterator[bytes]:
+        """
+        `stream`のasyncio版。イベントループ上でクライアントへ送信するSSEストリームを生成する。
+
+        Args:
+            subscriber (AsyncEventSubscriber): 送信先のクライアント
+
+        Yields:
+            bytes: SSE形式のメッセージ
+        """
+        try:
+            yield self._initial_message(subscriber)
+            last_write = time.monotonic()
+            while not subscriber.closed:
+                timeout = self.keepalive_interval - (time.monotonic() - last_write)
+                events = await subscriber.wait_async(max(timeout, 0))
+                if events:
+                    yield self._encode(subscriber, events)
+                    last_write = time.monotonic()
+                    self._record_delivery(subscriber, events, last_write)
+                elif time.monotonic() - last_write >= self.keepalive_interval:
+                    yield b": keepalive\n\n"
+                    last_write = time.monotonic()
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _initial_message(self, subscriber: EventSubscriber) -> bytes:
+        """接続直後に送信するメッセージ（再接続までの時間・スナップショット・現在のID）"""
+        parts = [f"retry: {self.retry}\n: connected\n\n".encode("utf-8")]
+        if subscriber.wire_format != "json":
+            parts.extend(
+                b"data: " + encode_definition(*definition, "compact") + b"\n\n"
+                for definition in subscriber.definitions
+            )
+        parts.append(self._encode(subscriber, subscriber.backlog))
+        if subscriber.resume_id is not None:
+            parts.append(f"id: {subscriber.resume_id}\n\n".encode("utf-8"))
+        subscriber.backlog = []
+        subscriber.definitions = []
+        return b"".join(parts)
+
+    @staticmethod
+    def _encode(subscriber: EventSubscriber, events: List[MixxxEvent]) -> bytes:
+        """イベントをクライアントの送信形式のSSEメッセージにエンコードする"""
+        if subscriber.wire_format == "json":
+            return b"".join(event.wire for event in events)
+        # SSEはテキストのみのため、binaryを指定された場合もcompact形式で送信する
+        return b"".join(event.compact_wire for event in events)
+
+    def record_delivery(self, subscriber: EventSubscriber, events: List[MixxxEvent]):
+        """
+        イベントをクライアントへ書き出したことを記録する（SSE以外の送信方法で使用する）。
+
+        Args:
+            subscriber (EventSubscriber): 送信先のクライアント
+            events (List[MixxxEvent]): 書き出したイベント
+        """
+        self._record_delivery(subscriber, events, time.monotonic())
+
+    def _record_delivery(
+        self, subscriber: EventSubscriber, events: List[MixxxEvent], now: float
+    ):
+        subscriber.delivered += len(events)
+        if self._latency is not None:
+            for event in events:
+                self._latency.observe(now - event.received_at)
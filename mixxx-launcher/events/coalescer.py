@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# コントロールごとの最大送信レート（Hz）。ここに無いコントロールは間引かずに即時送信する
+DEFAULT_COALESCE_RATES: Dict[str, float] = {
+    "playposition": 30.0,
+    "beat_active": 60.0,
+}
+
+
+class EventCoalescer:
+    """
+    高頻度で変化するコントロールを間引いて送信するクラス。
+
+    `(group, control)` ごとに最新の値だけを保持し、コントロールごとの
+    レートで送信します。レートが設定されていないコントロール（play, track_loaded,
+    trackinfo など）は間引かずに即時送信されます。
+
+    Attributes:
+        rates (Dict[str, float]): コントロール名と最大送信レート（Hz）の辞書
+        dropped (int): 新しい値で上書きされて送信されなかった件数
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Any], None],
+        rates: Optional[Dict[str, float]] = None,
+    ):
+        """
+        EventCoalescerの初期化メソッド。
+
+        Args:
+            sink (Callable[[Any], None]): 送信するイベントを受け取るコールバック関数
+            rates (Optional[Dict[str, float]], optional): コントロールごとの最大送信レート（Hz）。
+                指定されない場合は`DEFAULT_COALESCE_RATES`を使用します。
+        """
+        self.rates = dict(DEFAULT_COALESCE_RATES if rates is None else rates)
+        self.dropped = 0
+        self._sink = sink
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._due: Dict[Tuple[str, str], float] = {}
+        self._last_sent: Dict[Tuple[str, str], float] = {}
+        self._cond = threading.Condition()
+        self._emit_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, group: str, control: str, item: Any):
+        """
+        イベントを送信キューに投入する。
+
+        Args:
+            group (str): イベントのグループ（例: "[Channel1]"）
+            control (str): イベントのコントロール名
+            item (Any): 送信するイベント
+        """
+        rate = self.rates.get(control)
+        if not rate:
+            # 同じグループの保留中の値を先に送り、グループ内の順序を保つ
+            with self._emit_lock:
+                self._emit(key for key in list(self._pending) if key[0] == group)
+                self._sink(item)
+            return
+
+        key = (group, control)
+        interval = 1.0 / rate
+        with self._emit_lock:
+            with self._cond:
+                now = time.monotonic()
+                last_sent = self._last_sent.get(key)
+                if key not in self._pending and (
+                    last_sent is None or now - last_sent >= interval
+                ):
+                    self._last_sent[key] = now
+                else:
+                    if key in self._pending:
+                        self.dropped += 1
+                    self._pending[key] = item
+                    self._due.setdefault(key, (last_sent or now) + interval)
+                    self._ensure_thread()
+                    self._cond.notify()
+                    return
+            self._sink(item)
+
+    def flush(self):
+        """
+        保留中の全てのイベントを即時送信する。
+        """
+        with self._emit_lock:
+            self._emit(list(self._pending))
+
+    def _emit(self, keys: Iterable[Tuple[str, str]]):
+        """保留中のイベントを取り出して送信する。`_emit_lock`を保持した状態で呼び出すこと。"""
+        with self._cond:
+            now = time.monotonic()
+            items = []
+            for key in list(keys):
+                if key in self._pending:
+                    items.append(self._pending.pop(key))
+                    self._due.pop(key, None)
+                    self._last_sent[key] = now
+        for item in items:
+            self._sink(item)
+
+    def _ensure_thread(self):
+        """送信スレッドが未起動であれば起動する。`_cond`を保持した状態で呼び出すこと。"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        """送信期限を迎えたイベントを送信するスレッドの処理"""
+        while True:
+            with self._cond:
+                while not self._due:
+                    self._cond.wait()
+                wait_time = min(self._due.values()) - time.monotonic()
+                if wait_time > 0:
+                    self._cond.wait(wait_time)
+                    continue
+                now = time.monotonic()
+                keys = [key for key, due in self._due.items() if due <= now]
+            with self._emit_lock:
+                self._emit(keys)
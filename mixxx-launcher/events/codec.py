@@ -0,0 +1,176 @@
+import json
+import struct
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from .message import MixxxEvent
+
+# クライアントが選択できる送信形式
+#   json: {"group": ..., "control": ..., "value": ...}（デフォルト）
+#   compact: [キーID, 値] / [キーID, 値, t, speed] のJSON配列（SSE・WebSocketのテキスト）
+#   binary: 下記のレコードを連結したバイナリ（WebSocketのみ）
+WIRE_FORMATS = ("json", "compact", "binary")
+
+# バイナリ形式のレコード種別（先頭1バイト）。数値はリトルエンディアン
+_RECORD_DEFINE = 0x01  # u16 キーID, u8 長さ, グループ, u8 長さ, コントロール
+_RECORD_NUMBER = 0x02  # u16 キーID, f32 値
+_RECORD_POSITION = 0x03  # u16 キーID, f32 値, f64 t, f32 speed
+_RECORD_JSON = 0x04  # u16 キーID, u32 長さ, JSON配列 [値] または [値, 追加の項目]
+
+_DEFINE = struct.Struct("<BHB")
+_NUMBER = struct.Struct("<BHf")
+_POSITION = struct.Struct("<BHfdf")
+_JSON = struct.Struct("<BHI")
+
+_POSITION_EXTRA = ("t", "speed")
+
+
+class KeyTable:
+    """
+    `(group, control)` の組に短い整数のIDを割り当てるクラス。
+
+    compact・binary形式では、毎回送信していたグループ名とコントロール名の代わりに
+    このIDを送信し、対応表は接続時と新しいキーの初回送信時にのみ送信します。
+    """
+
+    def __init__(self):
+        """
+        KeyTableの初期化メソッド。
+        """
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, group: str, control: str) -> Tuple[int, bool]:
+        """
+        キーのIDを取得する。未登録の場合は新しいIDを割り当てる。
+
+        Args:
+            group (str): グループ
+            control (str): コントロール名
+
+        Returns:
+            Tuple[int, bool]: (ID, 新しく割り当てたかどうか)
+        """
+        key = (group, control)
+        key_id = self._ids.get(key)
+        if key_id is not None:
+            return key_id, False
+        with self._lock:
+            key_id = self._ids.get(key)
+            if key_id is not None:
+                return key_id, False
+            if len(self._ids) >= 0xFFFF:
+                raise ValueError("キーの数が上限を超えました")
+            key_id = self._ids[key] = len(self._ids)
+            return key_id, True
+
+    def items(self) -> List[Tuple[int, str, str]]:
+        """
+        登録済みの (ID, グループ, コントロール名) の一覧を返す。
+        """
+        with self._lock:
+            return [(key_id, group, control) for (group, control), key_id in self._ids.items()]
+
+
+def encode_definition(key_id: int, group: str, control: str, wire_format: str) -> bytes:
+    """
+    キーの対応表の1件をエンコードする。
+
+    Args:
+        key_id (int): キーID
+        group (str): グループ
+        control (str): コントロール名
+        wire_format (str): "compact" または "binary"
+
+    Returns:
+        bytes: compactの場合はJSON配列 ["d", ID, グループ, コントロール名]、binaryの場合はレコード
+    """
+    if wire_format == "binary":
+        group_bytes = group.encode("utf-8")
+        control_bytes = control.encode("utf-8")
+        return (
+            _DEFINE.pack(_RECORD_DEFINE, key_id, len(group_bytes))
+            + group_bytes
+            + bytes((len(control_bytes),))
+            + control_bytes
+        )
+    return json.dumps(["d", key_id, group, control], separators=(",", ":")).encode("utf-8")
+
+
+def encode_compact(event: "MixxxEvent") -> bytes:
+    """
+    イベントをcompact形式のJSON配列にエンコードする。
+
+    Args:
+        event (MixxxEvent): キーIDが割り当て済みのイベント
+
+    Returns:
+        bytes: [キーID, 値] または再生位置の場合は [キーID, 値, t, speed]。
+            それ以外の追加の項目を持つイベントはjson形式と同じ内容
+    """
+    extra = event.extra
+    if not extra:
+        item = [event.key_id, event.value]
+    elif tuple(extra) == _POSITION_EXTRA:
+        item = [event.key_id, event.value, extra["t"], extra["speed"]]
+    else:
+        return event.payload.encode("utf-8")
+    return json.dumps(item, separators=(",", ":")).encode("utf-8")
+
+
+def encode_binary(event: "MixxxEvent") -> bytes:
+    """
+    イベントをbinary形式のレコードにエンコードする。数値はfloat32に量子化する。
+
+    Args:
+        event (MixxxEvent): キーIDが割り当て済みのイベント
+
+    Returns:
+        bytes: レコード
+    """
+    value = event.value
+    extra = event.extra
+    is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if is_number and not extra:
+        return _NUMBER.pack(_RECORD_NUMBER, event.key_id, value)
+    if is_number and tuple(extra) == _POSITION_EXTRA:
+        return _POSITION.pack(
+            _RECORD_POSITION, event.key_id, value, extra["t"], extra["speed"]
+        )
+
+    data = [value] if not extra else [value, extra]
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return _JSON.pack(_RECORD_JSON, event.key_id, len(body)) + body
+
+
+def encode_batch(
+    events: Iterable["MixxxEvent"],
+    wire_format: str,
+    definitions: Iterable[Tuple[int, str, str]] = (),
+) -> List[bytes]:
+    """
+    WebSocketで送信するフレームを生成する。
+
+    Args:
+        events (Iterable[MixxxEvent]): 送信するイベント
+        wire_format (str): "json"、"compact" または "binary"
+        definitions (Iterable[Tuple[int, str, str]], optional): 先に送信するキーの対応表
+
+    Returns:
+        List[bytes]: json・compactの場合はイベントごとのテキストフレーム、
+            binaryの場合は全てのレコードを連結した1つのフレーム
+    """
+    if wire_format == "json":
+        return [event.payload.encode("utf-8") for event in events]
+
+    frames = [encode_definition(*definition, wire_format) for definition in definitions]
+    for event in events:
+        if event.key_is_new:
+            frames.append(
+                encode_definition(event.key_id, event.group, event.control, wire_format)
+            )
+        frames.append(event.compact if wire_format == "compact" else event.binary)
+    if wire_format == "binary":
+        return [b"".join(frames)] if frames else []
+    return frames
@@ -0,0 +1,176 @@
+import json
+import time
+from typing import Any, Dict, Optional
+
+from .codec import encode_binary, encode_compact, encode_definition
+
+# コントローラースクリプトがデバッグ出力に付与するプレフィックス
+MESSAGE_PREFIX = "YouTubeVJ_Message:"
+
+
+class MixxxEvent:
+    """
+    Mixxxから受信した1件のコントロール変化を表すクラス。
+
+    ログ行は受信時に一度だけ解析し、SSE形式のバイト列も一度だけエンコードして
+    全てのクライアントで共有します。
+
+    Attributes:
+        group (str): イベントのグループ（例: "[Channel1]"）
+        control (str): コントロール名（例: "playposition"）
+        value (Any): コントロールの値
+        received_at (float): 受信時刻（`time.monotonic()`の値）
+        extra (Optional[Dict[str, Any]]): クライアントへ追加で送信する項目
+        event_id (Optional[str]): 配信時に割り当てられるSSEのイベントID
+        key_id (Optional[int]): 配信時に割り当てられる `(group, control)` のID
+        key_is_new (bool): `key_id`が新しく割り当てられたIDかどうか
+    """
+
+    __slots__ = (
+        "group",
+        "control",
+        "value",
+        "received_at",
+        "extra",
+        "event_id",
+        "key_id",
+        "key_is_new",
+        "_payload",
+        "_wire",
+        "_compact",
+        "_compact_wire",
+        "_binary",
+    )
+
+    def __init__(
+        self,
+        group: str,
+        control: str,
+        value: Any,
+        received_at: Optional[float] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        MixxxEventの初期化メソッド。
+
+        Args:
+            group (str): イベントのグループ
+            control (str): コントロール名
+            value (Any): コントロールの値
+            received_at (Optional[float], optional): 受信時刻。指定されない場合は現在時刻。
+            extra (Optional[Dict[str, Any]], optional): クライアントへ追加で送信する項目
+        """
+        self.group = group
+        self.control = control
+        self.value = value
+        self.received_at = time.monotonic() if received_at is None else received_at
+        self.extra = extra
+        self.event_id: Optional[str] = None
+        self.key_id: Optional[int] = None
+        self.key_is_new = False
+        self._payload: Optional[str] = None
+        self._wire: Optional[bytes] = None
+        self._compact: Optional[bytes] = None
+        self._compact_wire: Optional[bytes] = None
+        self._binary: Optional[bytes] = None
+
+    @classmethod
+    def parse(cls, log_line: str) -> Optional["MixxxEvent"]:
+        """
+        Mixxxのログ行からイベントを生成する。
+
+        Args:
+            log_line (str): Mixxxのログの1行
+
+        Returns:
+            Optional[MixxxEvent]: YouTubeVJのメッセージであればイベント、それ以外はNone
+
+        Raises:
+            ValueError: メッセージの形式が不正な場合
+        """
+        index = log_line.find(MESSAGE_PREFIX)
+        if index < 0:
+            return None
+
+        received_at = time.monotonic()
+        data = json.loads(log_line[index + len(MESSAGE_PREFIX) :])
+        try:
+            return cls(data["group"], data["control"], data.get("value"), received_at)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"不正なメッセージ形式です: {e}") from e
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        クライアントへ送信する辞書形式に変換する。
+
+        Returns:
+            Dict[str, Any]: group, control, valueと追加の項目を持つ辞書
+        """
+        data = {"group": self.group, "control": self.control, "value": self.value}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def payload(self) -> str:
+        """
+        JSON形式にエンコードした文字列（SSEの`data:`、WebSocketのテキストフレームの内容）。
+        初回アクセス時にのみエンコードされる。
+        """
+        if self._payload is None:
+            self._payload = json.dumps(self.to_dict(), separators=(",", ":"))
+        return self._payload
+
+    @property
+    def wire(self) -> bytes:
+        """
+        SSE形式にエンコードしたバイト列。初回アクセス時にのみエンコードされる。
+
+        イベントIDが割り当てられている場合は`id:`行を含みます。
+        """
+        if self._wire is None:
+            payload = self.payload
+            if self.event_id is not None:
+                self._wire = f"id: {self.event_id}\ndata: {payload}\n\n".encode("utf-8")
+            else:
+                self._wire = f"data: {payload}\n\n".encode("utf-8")
+        return self._wire
+
+    @property
+    def compact(self) -> bytes:
+        """
+        compact形式（キーIDを使用したJSON配列）にエンコードしたバイト列。
+        """
+        if self._compact is None:
+            self._compact = encode_compact(self)
+        return self._compact
+
+    @property
+    def compact_wire(self) -> bytes:
+        """
+        compact形式のSSEメッセージ。新しく割り当てたキーの場合は対応表を先に含める。
+        """
+        if self._compact_wire is None:
+            parts = []
+            if self.key_is_new:
+                definition = encode_definition(
+                    self.key_id, self.group, self.control, "compact"
+                )
+                parts.append(b"data: " + definition + b"\n\n")
+            if self.event_id is not None:
+                parts.append(f"id: {self.event_id}\n".encode("utf-8"))
+            parts.append(b"data: " + self.compact + b"\n\n")
+            self._compact_wire = b"".join(parts)
+        return self._compact_wire
+
+    @property
+    def binary(self) -> bytes:
+        """
+        binary形式（WebSocket用）のレコード。
+        """
+        if self._binary is None:
+            self._binary = encode_binary(self)
+        return self._binary
+
+    def __repr__(self) -> str:
+        return f"MixxxEvent({self.group!r}, {self.control!r}, {self.value!r})"
@@ -0,0 +1,144 @@
+import threading
+from typing import Dict, Optional
+
+from .message import MixxxEvent
+
+# 再生位置の推定に使用するコントロール
+_TRACKED_CONTROLS = frozenset(
+    ("playposition", "duration", "rate", "rateRange", "play", "track_loaded")
+)
+
+
+class _DeckPosition:
+    """1デッキ分の再生状態と、最後に送信した再生位置"""
+
+    __slots__ = (
+        "position",
+        "position_at",
+        "duration",
+        "rate",
+        "rate_range",
+        "play",
+        "sent_position",
+        "sent_at",
+        "sent_speed",
+    )
+
+    def __init__(self):
+        self.position: Optional[float] = None
+        self.position_at = 0.0
+        self.duration = 0.0
+        self.rate = 0.0
+        self.rate_range = 0.0
+        self.play = False
+        self.sent_position = 0.0
+        self.sent_at: Optional[float] = None
+        self.sent_speed = 0.0
+
+    def speed(self) -> float:
+        """実際の再生速度（停止中は0）"""
+        if not self.play:
+            return 0.0
+        return 1 + -self.rate_range * self.rate
+
+
+class PositionTracker:
+    """
+    再生位置をサーバーの時刻と再生速度と共に送信し、送信回数を減らすクラス。
+
+    クライアントは`t`（サーバーの単調増加時刻）と`speed`（再生速度）から現在の再生位置を
+    推定できるため、推定から外れた場合（シーク・速度変更等）と一定間隔でのみ送信します。
+
+    Attributes:
+        tolerance (float): 推定位置との差がこの秒数を超えた場合に送信する
+        heartbeat (float): 推定位置と一致していても送信する間隔（秒）
+    """
+
+    def __init__(self, tolerance: float = 0.02, heartbeat: float = 0.25):
+        """
+        PositionTrackerの初期化メソッド。
+
+        Args:
+            tolerance (float, optional): 送信する推定位置との差（秒）。デフォルトは0.02。
+            heartbeat (float, optional): 最大の送信間隔（秒）。デフォルトは0.25。
+        """
+        self.tolerance = tolerance
+        self.heartbeat = heartbeat
+        self._decks: Dict[str, _DeckPosition] = {}
+        self._lock = threading.Lock()
+
+    def update(self, event: MixxxEvent) -> Optional[MixxxEvent]:
+        """
+        受信したイベントで再生状態を更新し、送信が必要であれば再生位置のイベントを返す。
+
+        Args:
+            event (MixxxEvent): Mixxxから受信したイベント
+
+        Returns:
+            Optional[MixxxEvent]: 送信する`playposition`イベント（`t`と`speed`を含む）。
+                送信が不要な場合はNone
+        """
+        control = event.control
+        if control not in _TRACKED_CONTROLS:
+            return None
+
+        with self._lock:
+            deck = self._decks.get(event.group)
+            if deck is None:
+                deck = self._decks[event.group] = _DeckPosition()
+
+            now = event.received_at
+            previous_speed = deck.sent_speed
+            try:
+                if control == "playposition":
+                    deck.position = float(event.value)
+                    deck.position_at = now
+                elif control == "duration":
+                    deck.duration = float(event.value or 0)
+                elif control == "rate":
+                    deck.rate = float(event.value or 0)
+                elif control == "rateRange":
+                    deck.rate_range = float(event.value or 0)
+                elif control == "play":
+                    deck.play = bool(event.value)
+                elif control == "track_loaded":
+                    # 新しいトラックの最初の位置は必ず送信する
+                    deck.position = None
+                    deck.sent_at = None
+                    return None
+            except (TypeError, ValueError):
+                return None
+
+            if deck.position is None:
+                return None
+
+            speed = deck.speed()
+            duration = deck.duration
+            position = deck.position
+            if control == "playposition":
+                if deck.sent_at is not None and speed == previous_speed and duration > 0:
+                    elapsed = now - deck.sent_at
+                    predicted = deck.sent_position + elapsed * speed / duration
+                    if (
+                        abs(predicted - position) * duration <= self.tolerance
+                        and elapsed < self.heartbeat
+                    ):
+                        return None
+            else:
+                if speed == previous_speed and deck.sent_at is not None:
+                    return None
+                # 速度が変わった時点の位置を、変わる前の速度で推定する
+                if duration > 0:
+                    position += (now - deck.position_at) * previous_speed / duration
+                position = min(max(position, 0.0), 1.0)
+
+            deck.sent_position = position
+            deck.sent_at = now
+            deck.sent_speed = speed
+            return MixxxEvent(
+                event.group,
+                "playposition",
+                position,
+                now,
+                {"t": round(now, 6), "speed": round(speed, 6)},
+            )
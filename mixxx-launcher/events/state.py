@@ -0,0 +1,61 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .message import MixxxEvent
+
+
+class StateStore:
+    """
+    `(group, control)` ごとに最新のイベントを保持するクラス。
+
+    Mixxxから受信した値を記録しておき、トラックの特定など後続の処理から参照します。
+    """
+
+    def __init__(self):
+        """
+        StateStoreの初期化メソッド。
+        """
+        self._events: Dict[Tuple[str, str], MixxxEvent] = {}
+        self._lock = threading.Lock()
+
+    def update(self, event: MixxxEvent):
+        """
+        イベントを記録する。
+
+        Args:
+            event (MixxxEvent): 記録するイベント
+        """
+        with self._lock:
+            self._events[(event.group, event.control)] = event
+
+    def get(self, group: str, control: str, default: Any = None) -> Any:
+        """
+        指定したコントロールの最新の値を取得する。
+
+        Args:
+            group (str): グループ（例: "[Channel1]"）
+            control (str): コントロール名
+            default (Any, optional): 値が無い場合に返す値
+
+        Returns:
+            Any: 最新の値
+        """
+        event: Optional[MixxxEvent] = self._events.get((group, control))
+        return default if event is None else event.value
+
+    def values(self, group: str) -> Dict[str, Any]:
+        """
+        指定したグループの全てのコントロールの最新の値を取得する。
+
+        Args:
+            group (str): グループ（例: "[Channel1]"）
+
+        Returns:
+            Dict[str, Any]: コントロール名と値の辞書
+        """
+        with self._lock:
+            return {
+                control: event.value
+                for (event_group, control), event in self._events.items()
+                if event_group == group
+            }
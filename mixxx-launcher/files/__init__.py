@@ -1,3 +1,4 @@
 from .audio import AudioFile
+from .tag_cache import TagCache
 
-__all__ = ["AudioFile"]
+__all__ = ["AudioFile", "TagCache"]
@@ -1,12 +1,20 @@
+from typing import Iterable, Optional
+
 import eyed3
 
+from .tag_reader import FRAME_ID_MAP, read_tags
+
 
 class AudioFile:
     """
     AudioFileクラスは音声ファイル（例：MP3）からタグ情報を取得するためのクラスです。
 
+    `keys`を指定した場合は軽量な読み込みモードとなり、タグ領域のヘッダーのみを読み込んで
+    指定したタグだけを取得します。このモードはFLAC・Ogg・M4Aファイルにも対応しています。
+
     Attributes:
         file_path (str): 音声ファイルのパス。
+        keys (Optional[tuple]): 軽量な読み込みモードで取得するタグのキー。
         tags (dict): ファイルに含まれるタグ情報。
 
     Methods:
@@ -18,14 +26,17 @@ class AudioFile:
             指定されたタグキーが存在するかを確認します。
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, keys: Optional[Iterable[str]] = None):
         """
         初期化メソッド。音声ファイルのパスを設定します。
 
         Args:
             file_path (str): 音声ファイルのパス。
+            keys (Optional[Iterable[str]]): 取得するタグのキー。指定した場合は
+                軽量な読み込みモードで、指定したタグのみを取得します。
         """
         self.file_path = file_path
+        self.keys = tuple(keys) if keys is not None else None
         self.tags = {}
         self.load_tags()
 
@@ -37,7 +48,20 @@ class AudioFile:
             FileNotFoundError: ファイルが見つからない場合。
             ValueError: ファイルが無効な形式の場合。
         """
-        self.tags = self._parse_frames_to_dict()
+        if self.keys is None:
+            self.tags = self._parse_frames_to_dict()
+            return
+
+        try:
+            self.tags = read_tags(self.file_path, self.keys)
+        except ValueError:
+            # 軽量な読み込みに失敗した場合はeyed3で全てのタグを読み込む
+            wanted = {key.lower() for key in self.keys}
+            self.tags = {
+                key: value
+                for key, value in self._parse_frames_to_dict().items()
+                if key.lower() in wanted
+            }
 
     def get_tag(self, key: str, case_insensitive: bool = False):
         """
@@ -76,26 +100,6 @@ class AudioFile:
         return key in self.tags
 
     def _parse_frames_to_dict(self):
-        # フレームIDを意味のある名前に変換するマッピング
-        frame_id_map = {
-            "TALB": "album",
-            "TPE1": "artist",
-            "TBPM": "bpm",
-            "COMM": "comments",
-            "TCOM": "composer",
-            "TCOP": "copyright",
-            "TPOS": "part_of_set",
-            "TSSE": "encoder",
-            "TCON": "genre",
-            "TKEY": "initial_key",
-            "TSRC": "isrc",
-            "TLAN": "language",
-            "TIT2": "title",
-            "TRCK": "track_number",
-            "TYER": "year",
-            "APIC": "attached_picture",
-        }
-
         audio = eyed3.load(self.file_path)
         if not audio or not audio.tag:
             return {}
@@ -103,7 +107,7 @@ class AudioFile:
         frames_dict = {}
 
         for frame_id, frames in audio.tag.frame_set.items():
-            readable_key = frame_id_map.get(
+            readable_key = FRAME_ID_MAP.get(
                 frame_id.decode("utf-8"), frame_id.decode("utf-8")
             )
 
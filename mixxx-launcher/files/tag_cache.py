@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from .audio import AudioFile
+
+# ランチャーと同じ階層の cache ディレクトリにキャッシュを保存する
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "tags.sqlite"
+)
+
+# (ファイルサイズ, 更新時刻[ns]) の組。いずれかが変われば再読み込みする
+Signature = Tuple[int, int]
+
+
+class TagCache:
+    """
+    音声ファイルから抽出したタグを永続化するキャッシュクラス。
+
+    `(パス, サイズ, 更新時刻)` をキーとして抽出済みのタグを小さなSQLiteデータベースに
+    保存し、その手前にメモリ上のLRUキャッシュを置きます。同じトラックを再度読み込む場合は
+    `stat` 1回だけでタグを取得できます。
+
+    Attributes:
+        db_path (str): キャッシュデータベースのパス
+        keys (Tuple[str, ...]): 抽出するタグのキー
+        max_entries (int): メモリ上に保持するエントリの最大数
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        keys: Iterable[str] = ("YouTubeID",),
+        max_entries: int = 100_000,
+    ):
+        """
+        TagCacheの初期化メソッド。
+
+        Args:
+            db_path (Optional[str], optional): キャッシュデータベースのパス。
+                指定されない場合は`DEFAULT_CACHE_PATH`を使用します。
+            keys (Iterable[str], optional): 抽出するタグのキー。デフォルトは("YouTubeID",)。
+            max_entries (int, optional): メモリ上に保持するエントリの最大数。
+        """
+        self.db_path = db_path or DEFAULT_CACHE_PATH
+        self.keys = tuple(keys)
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._memory: "OrderedDict[str, Tuple[Signature, Dict[str, Optional[str]]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """キャッシュデータベースへの接続を取得する。`_lock`を保持した状態で呼び出すこと。"""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tags (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    tags TEXT NOT NULL
+                )
+                """
+            )
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def signature(path: str) -> Optional[Signature]:
+        """
+        ファイルのサイズと更新時刻を取得する。
+
+        Args:
+            path (str): ファイルパス
+
+        Returns:
+            Optional[Signature]: (サイズ, 更新時刻[ns])。ファイルが存在しない場合はNone
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def lookup(
+        self, path: str, signature: Signature
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        キャッシュ済みのタグを取得する。ファイルの読み込みは行わない。
+
+        Args:
+            path (str): ファイルパス
+            signature (Signature): 現在のファイルのサイズと更新時刻
+
+        Returns:
+            Optional[Dict[str, Optional[str]]]: キャッシュが有効な場合はタグの辞書、それ以外はNone
+        """
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry is not None and entry[0] == signature:
+                self._memory.move_to_end(path)
+                return entry[1]
+
+            try:
+                row = (
+                    self._get_connection()
+                    .execute(
+                        "SELECT size, mtime_ns, tags FROM tags WHERE path = ?", (path,)
+                    )
+                    .fetchone()
+                )
+            except sqlite3.Error as e:
+                self.logger.error(f"タグキャッシュの読み込み中にエラー: {e}")
+                return None
+
+            if row is None or (row[0], row[1]) != signature:
+                return None
+            tags = json.loads(row[2])
+            if any(key not in tags for key in self.keys):
+                return None
+            self._remember(path, signature, tags)
+            return tags
+
+    def store(self, path: str, signature: Signature, tags: Dict[str, Optional[str]]):
+        """
+        抽出したタグをキャッシュに保存する。
+
+        Args:
+            path (str): ファイルパス
+            signature (Signature): 抽出時のファイルのサイズと更新時刻
+            tags (Dict[str, Optional[str]]): 抽出したタグ
+        """
+        with self._lock:
+            self._remember(path, signature, tags)
+            try:
+                connection = self._get_connection()
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?)",
+                        (path, signature[0], signature[1], json.dumps(tags)),
+                    )
+            except sqlite3.Error as e:
+                self.logger.error(f"タグキャッシュの書き込み中にエラー: {e}")
+
+    def get_tags(self, path: str) -> Dict[str, Optional[str]]:
+        """
+        ファイルのタグを取得する。キャッシュが無効な場合はファイルから読み込む。
+
+        Args:
+            path (str): ファイルパス
+
+        Returns:
+            Dict[str, Optional[str]]: `keys`に指定したタグの辞書。読み込めない場合は空の辞書
+        """
+        signature = self.signature(path)
+        if signature is None:
+            return {}
+
+        tags = self.lookup(path, signature)
+        if tags is not None:
+            return tags
+
+        try:
+            tags = extract_tags(path, self.keys)
+        except Exception as e:
+            self.logger.error(f"タグの読み込み中にエラー: {path}: {e}")
+            return {}
+
+        self.store(path, signature, tags)
+        return tags
+
+    def get_tag(self, path: str, key: str) -> Optional[str]:
+        """
+        ファイルの指定したタグを取得する。
+
+        Args:
+            path (str): ファイルパス
+            key (str): タグのキー（`keys`に含まれている必要がある）
+
+        Returns:
+            Optional[str]: タグの値。存在しない場合はNone
+        """
+        return self.get_tags(path).get(key)
+
+    def close(self):
+        """
+        キャッシュデータベースへの接続を閉じる。
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _remember(
+        self, path: str, signature: Signature, tags: Dict[str, Optional[str]]
+    ):
+        """メモリ上のLRUキャッシュに追加する。`_lock`を保持した状態で呼び出すこと。"""
+        self._memory[path] = (signature, tags)
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+def extract_tags(path: str, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    音声ファイルから指定したタグを抽出する。
+
+    Args:
+        path (str): ファイルパス
+        keys (Iterable[str]): 抽出するタグのキー（大文字小文字は区別しない）
+
+    Returns:
+        Dict[str, Optional[str]]: キーとタグの値の辞書。タグが無い場合の値はNone
+    """
+    audio = AudioFile(path, keys)
+    tags = {}
+    for key in keys:
+        value = audio.get_tag(key, True)
+        tags[key] = value if value is None else str(value)
+    return tags
@@ -0,0 +1,432 @@
+import io
+import os
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+# ID3のフレームIDを意味のある名前に変換するマッピング
+FRAME_ID_MAP = {
+    "TALB": "album",
+    "TPE1": "artist",
+    "TBPM": "bpm",
+    "COMM": "comments",
+    "TCOM": "composer",
+    "TCOP": "copyright",
+    "TPOS": "part_of_set",
+    "TSSE": "encoder",
+    "TCON": "genre",
+    "TKEY": "initial_key",
+    "TSRC": "isrc",
+    "TLAN": "language",
+    "TIT2": "title",
+    "TRCK": "track_number",
+    "TYER": "year",
+    "APIC": "attached_picture",
+}
+
+# ID3v2.2の3文字のフレームIDをv2.3以降のフレームIDに変換するマッピング
+_ID3V22_FRAME_IDS = {
+    "TAL": "TALB",
+    "TP1": "TPE1",
+    "TBP": "TBPM",
+    "TCM": "TCOM",
+    "TCR": "TCOP",
+    "TPA": "TPOS",
+    "TSS": "TSSE",
+    "TCO": "TCON",
+    "TKE": "TKEY",
+    "TRC": "TSRC",
+    "TLA": "TLAN",
+    "TT2": "TIT2",
+    "TRK": "TRCK",
+    "TYE": "TYER",
+    "TXX": "TXXX",
+}
+
+# MP4のアイテム名を意味のある名前に変換するマッピング（"----"は自由形式のアイテム）
+_MP4_ITEM_MAP = {
+    b"\xa9nam": "title",
+    b"\xa9ART": "artist",
+    b"\xa9alb": "album",
+    b"\xa9gen": "genre",
+    b"\xa9wrt": "composer",
+    b"\xa9cmt": "comments",
+    b"\xa9day": "year",
+}
+
+# ID3のテキストエンコーディングと終端文字
+_ID3_ENCODINGS = {
+    0: ("latin-1", b"\x00"),
+    1: ("utf-16", b"\x00\x00"),
+    2: ("utf-16-be", b"\x00\x00"),
+    3: ("utf-8", b"\x00"),
+}
+
+
+def read_tags(file_path: str, keys: Iterable[str]) -> Dict[str, str]:
+    """
+    音声ファイルのタグ領域のヘッダーのみを読み込み、指定したタグを取得する。
+
+    画像などの大きなバイナリフレームは読み込まずに読み飛ばし、指定した全てのキーが
+    見つかった時点で読み込みを終了します。MP3（ID3v2）、FLAC・Ogg（Vorbisコメント）、
+    M4A（MP4のメタデータアトム）に対応しています。
+
+    Args:
+        file_path (str): 音声ファイルのパス
+        keys (Iterable[str]): 取得するタグのキー（大文字小文字は区別しない）
+
+    Returns:
+        Dict[str, str]: ファイル内のキー名とタグの値の辞書
+
+    Raises:
+        FileNotFoundError: ファイルが見つからない場合。
+        ValueError: タグの形式が不正な場合。
+    """
+    wanted = {key.lower() for key in keys}
+    tags: Dict[str, str] = {}
+    with open(file_path, "rb") as f:
+        try:
+            head = f.read(12)
+            if head[:3] == b"ID3":
+                f.seek(0)
+                _read_id3(f, wanted, tags)
+                # ID3タグが先頭に付与されたFLACファイルの場合は続けて読み込む
+                if len(tags) < len(wanted) and f.read(4) == b"fLaC":
+                    _read_flac(f, wanted, tags)
+            elif head[:4] == b"fLaC":
+                f.seek(4)
+                _read_flac(f, wanted, tags)
+            elif head[:4] == b"OggS":
+                f.seek(0)
+                _read_ogg(f, wanted, tags)
+            elif head[4:8] == b"ftyp":
+                _read_mp4(f, wanted, tags)
+        except (EOFError, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"タグの形式が不正です: {e}") from e
+    return tags
+
+
+class _FileReader:
+    """ファイルから順番にバイト列を読み込む、または読み飛ばすためのクラス"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+
+    def read(self, size: int) -> bytes:
+        data = self.f.read(size)
+        if len(data) < size:
+            raise EOFError("ファイルの終端に達しました")
+        return data
+
+    def skip(self, size: int):
+        self.f.seek(size, io.SEEK_CUR)
+
+
+class _OggReader(_FileReader):
+    """
+    Oggページのヘッダーを取り除き、1つの論理ストリームを連続したバイト列として読み込むクラス。
+
+    読み飛ばす場合はページ内をシークするため、ページの内容はコピーされません。
+    """
+
+    def __init__(self, f: BinaryIO):
+        super().__init__(f)
+        self._serial: Optional[bytes] = None
+        self._remaining = 0
+
+    def _next_page(self):
+        while True:
+            header = self.f.read(27)
+            if len(header) < 27 or header[:4] != b"OggS":
+                raise EOFError("Oggページが見つかりません")
+            segments = self.f.read(header[26])
+            size = sum(segments)
+            serial = header[14:18]
+            if self._serial is None:
+                self._serial = serial
+            if serial == self._serial:
+                self._remaining = size
+                return
+            self.f.seek(size, io.SEEK_CUR)
+
+    def read(self, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            if self._remaining == 0:
+                self._next_page()
+            chunk = super().read(min(size, self._remaining))
+            chunks.append(chunk)
+            self._remaining -= len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def skip(self, size: int):
+        while size > 0:
+            if self._remaining == 0:
+                self._next_page()
+            step = min(size, self._remaining)
+            super().skip(step)
+            self._remaining -= step
+            size -= step
+
+    def skip_page(self):
+        """現在のページの残りを読み飛ばす"""
+        if self._remaining == 0:
+            self._next_page()
+        self.skip(self._remaining)
+
+
+def _syncsafe(data: bytes) -> int:
+    """ID3の同期安全整数（各バイトの下位7ビット）を整数に変換する"""
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _split_terminated(data: bytes, terminator: bytes) -> Tuple[bytes, bytes]:
+    """終端文字で区切られた最初の文字列と残りのバイト列に分割する"""
+    step = len(terminator)
+    index = 0
+    while True:
+        index = data.find(terminator, index)
+        if index < 0:
+            return data, b""
+        if index % step == 0:
+            return data[:index], data[index + step :]
+        index += 1
+
+
+def _decode_id3_text(encoding: int, data: bytes) -> str:
+    """ID3のテキストを最初の値だけデコードする"""
+    codec, terminator = _ID3_ENCODINGS.get(encoding, _ID3_ENCODINGS[0])
+    value, _ = _split_terminated(data, terminator)
+    return value.decode(codec, errors="replace")
+
+
+def _read_id3(f: BinaryIO, wanted: Set[str], tags: Dict[str, str]):
+    """ID3v2タグから指定したタグを読み込む。読み込み後はタグの直後にシークする"""
+    header = _FileReader(f).read(10)
+    major, flags = header[3], header[5]
+    tag_end = 10 + _syncsafe(header[6:10])
+    if major not in (2, 3, 4):
+        f.seek(tag_end)
+        return
+
+    stream: BinaryIO = f
+    end = tag_end
+    if flags & 0x80 and major < 4:
+        # タグ全体に非同期化が適用されている場合は、復元してから解析する
+        stream = io.BytesIO(f.read(tag_end - 10).replace(b"\xff\x00", b"\xff"))
+        end = len(stream.getvalue())
+    if flags & 0x40:
+        if major == 2:
+            f.seek(tag_end)
+            return  # v2.2の圧縮タグは非対応
+        ext_size = stream.read(4)
+        if major == 3:
+            stream.seek(int.from_bytes(ext_size, "big"), io.SEEK_CUR)
+        else:
+            stream.seek(_syncsafe(ext_size) - 4, io.SEEK_CUR)
+
+    header_size = 6 if major == 2 else 10
+    try:
+        while stream.tell() + header_size <= end and len(tags) < len(wanted):
+            frame_header = stream.read(header_size)
+            if frame_header[:1] == b"\x00":
+                break  # パディング
+
+            frame_flags = 0
+            if major == 2:
+                frame_id = frame_header[:3].decode("latin-1")
+                frame_id = _ID3V22_FRAME_IDS.get(frame_id, frame_id)
+                size = int.from_bytes(frame_header[3:6], "big")
+            else:
+                frame_id = frame_header[:4].decode("latin-1")
+                size_bytes = frame_header[4:8]
+                if major == 4 and not any(byte & 0x80 for byte in size_bytes):
+                    size = _syncsafe(size_bytes)
+                else:
+                    # v2.3、または同期安全整数で書かれていないv2.4のサイズ
+                    size = int.from_bytes(size_bytes, "big")
+                frame_flags = int.from_bytes(frame_header[8:10], "big")
+
+            frame_end = stream.tell() + size
+            if frame_end > end:
+                break
+
+            is_txxx = frame_id == "TXXX"
+            name = FRAME_ID_MAP.get(frame_id, frame_id)
+            if is_txxx or (frame_id.startswith("T") and name.lower() in wanted):
+                data = _read_id3_frame_data(stream, size, major, frame_flags)
+                if data:
+                    if is_txxx:
+                        codec, terminator = _ID3_ENCODINGS.get(
+                            data[0], _ID3_ENCODINGS[0]
+                        )
+                        description, value = _split_terminated(data[1:], terminator)
+                        name = description.decode(codec, errors="replace")
+                        if name.lower() in wanted:
+                            tags[name] = _decode_id3_text(data[0], value)
+                    else:
+                        tags[name] = _decode_id3_text(data[0], data[1:])
+
+            stream.seek(frame_end)
+    finally:
+        f.seek(tag_end)
+
+
+def _read_id3_frame_data(
+    stream: BinaryIO, size: int, major: int, frame_flags: int
+) -> Optional[bytes]:
+    """フレームのデータを読み込む。圧縮・暗号化されたフレームの場合はNone"""
+    if major == 3:
+        if frame_flags & 0x00C0:
+            return None
+        data = stream.read(size)
+        if frame_flags & 0x0020:
+            data = data[1:]  # グループ識別子
+        return data
+    if major == 4:
+        if frame_flags & 0x000C:
+            return None
+        data = stream.read(size)
+        if frame_flags & 0x0040:
+            data = data[1:]  # グループ識別子
+        if frame_flags & 0x0001:
+            data = data[4:]  # データ長識別子
+        if frame_flags & 0x0002:
+            data = data.replace(b"\xff\x00", b"\xff")
+        return data
+    return stream.read(size)
+
+
+def _read_vorbis_comment(reader: _FileReader, wanted: Set[str], tags: Dict[str, str]):
+    """Vorbisコメントから指定したタグを読み込む"""
+    vendor_length = int.from_bytes(reader.read(4), "little")
+    reader.skip(vendor_length)
+    count = int.from_bytes(reader.read(4), "little")
+    for _ in range(count):
+        if len(tags) >= len(wanted):
+            return
+        length = int.from_bytes(reader.read(4), "little")
+        # キー名だけを先に読み込み、対象外のコメント（画像等）は読み飛ばす
+        head = reader.read(min(length, 64))
+        separator = head.find(b"=")
+        if separator < 0:
+            reader.skip(length - len(head))
+            continue
+        key = head[:separator].decode("ascii", errors="replace")
+        if key.lower() in wanted:
+            value = head[separator + 1 :] + reader.read(length - len(head))
+            tags[key] = value.decode("utf-8", errors="replace")
+        else:
+            reader.skip(length - len(head))
+
+
+def _read_flac(f: BinaryIO, wanted: Set[str], tags: Dict[str, str]):
+    """FLACのメタデータブロックから指定したタグを読み込む"""
+    reader = _FileReader(f)
+    while True:
+        header = reader.read(4)
+        is_last = header[0] & 0x80
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 4:  # VORBIS_COMMENT
+            block_end = f.tell() + length
+            _read_vorbis_comment(reader, wanted, tags)
+            f.seek(block_end)
+        else:
+            reader.skip(length)  # PICTURE等は読み飛ばす
+        if is_last or len(tags) >= len(wanted):
+            return
+
+
+def _read_ogg(f: BinaryIO, wanted: Set[str], tags: Dict[str, str]):
+    """Ogg Vorbis/Opusのコメントヘッダーから指定したタグを読み込む"""
+    reader = _OggReader(f)
+    reader.skip_page()  # 最初のページは識別ヘッダーのみ
+    magic = reader.read(7)
+    if magic == b"\x03vorbis":
+        pass
+    elif magic == b"OpusTag" and reader.read(1) == b"s":
+        pass
+    else:
+        return
+    _read_vorbis_comment(reader, wanted, tags)
+
+
+def _iter_mp4_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """指定した範囲のMP4ボックスを列挙する。(種類, 内容の開始位置, 終了位置) を返す"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size = int.from_bytes(header[:4], "big")
+        box_type = header[4:8]
+        header_size = 8
+        if size == 1:
+            size = int.from_bytes(f.read(8), "big")
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, min(position + size, end)
+        position += size
+
+
+def _find_mp4_box(f: BinaryIO, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    """指定した範囲から最初に見つかった種類のボックスの内容の範囲を返す"""
+    for found_type, body_start, body_end in _iter_mp4_boxes(f, start, end):
+        if found_type == box_type:
+            return body_start, body_end
+    return None
+
+
+def _read_mp4_data(f: BinaryIO, start: int, end: int) -> Optional[str]:
+    """アイテム内の最初のdataボックスをテキストとして読み込む"""
+    data = _find_mp4_box(f, start, end, b"data")
+    if data is None:
+        return None
+    f.seek(data[0])
+    payload = f.read(data[1] - data[0])
+    if int.from_bytes(payload[1:4], "big") != 1:
+        return None  # UTF-8のテキスト以外（画像等）
+    return payload[8:].decode("utf-8", errors="replace")
+
+
+def _read_mp4(f: BinaryIO, wanted: Set[str], tags: Dict[str, str]):
+    """MP4のilstアトムから指定したタグを読み込む（自由形式の"----"アイテムにも対応）"""
+    end = os.fstat(f.fileno()).st_size
+    moov = _find_mp4_box(f, 0, end, b"moov")
+    udta = moov and _find_mp4_box(f, *moov, b"udta")
+    meta = udta and _find_mp4_box(f, *udta, b"meta")
+    if meta is None:
+        return
+
+    meta_start, meta_end = meta
+    f.seek(meta_start + 4)
+    if f.read(4) != b"hdlr":
+        meta_start += 4  # ISO形式のmetaボックスはバージョン・フラグを持つ
+
+    ilst = _find_mp4_box(f, meta_start, meta_end, b"ilst")
+    if ilst is None:
+        return
+
+    for item_type, item_start, item_end in _iter_mp4_boxes(f, *ilst):
+        if len(tags) >= len(wanted):
+            return
+        if item_type == b"----":
+            name = _find_mp4_box(f, item_start, item_end, b"name")
+            if name is None:
+                continue
+            f.seek(name[0] + 4)
+            key = f.read(name[1] - name[0] - 4).decode("utf-8", errors="replace")
+        else:
+            key = _MP4_ITEM_MAP.get(item_type)
+        if key is None or key.lower() not in wanted:
+            continue
+        value = _read_mp4_data(f, item_start, item_end)
+        if value is not None:
+            tags[key] = value
@@ -0,0 +1,136 @@
+"use strict";
+
+/**
+ * ランチャーのイベントを受信し、{group, control, value, ...} の形式に復元してonEventに渡す。
+ *
+ * format（またはページのURLの ?wire=）で送信形式を選択できる。
+ *   json:    SSE。1件ごとにJSONオブジェクト（デフォルト）
+ *   compact: SSE。キーIDと値のJSON配列
+ *   binary:  WebSocket。キーIDと値のバイナリレコード（数値はfloat32）
+ * binaryでWebSocketに接続できない場合はcompactのSSEに切り替える。
+ */
+function connectEvents(onEvent, options = {}) {
+  const format =
+    options.format ||
+    new URLSearchParams(location.search).get("wire") ||
+    "json";
+  const origin = options.origin || location.origin;
+
+  if (format === "binary" && "WebSocket" in window) {
+    connectBinary(onEvent, origin);
+  } else {
+    connectSSE(onEvent, origin, format === "json" ? "json" : "compact");
+  }
+}
+
+function connectSSE(onEvent, origin, format) {
+  const keys = new Map();
+  const query = format === "json" ? "" : `?format=${format}`;
+  const eventSource = new EventSource(`${origin}/events${query}`);
+
+  eventSource.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    if (!Array.isArray(data)) {
+      // json形式、またはcompact形式で短縮できないイベント
+      onEvent(data);
+      return;
+    }
+    if (data[0] === "d") {
+      // ["d", キーID, グループ, コントロール名]
+      keys.set(data[1], [data[2], data[3]]);
+      return;
+    }
+    // [キーID, 値] または [キーID, 値, t, speed]
+    const key = keys.get(data[0]);
+    if (!key) return;
+    const decoded = { group: key[0], control: key[1], value: data[1] };
+    if (data.length === 4) {
+      decoded.t = data[2];
+      decoded.speed = data[3];
+    }
+    onEvent(decoded);
+  };
+  eventSource.onerror = (err) => console.error("SSE Error:", err);
+  return eventSource;
+}
+
+function connectBinary(onEvent, origin, retryDelay = 1000) {
+  const keys = new Map();
+  const decoder = new TextDecoder();
+  const socket = new WebSocket(
+    `${origin.replace(/^http/, "ws")}/ws?format=binary`
+  );
+  socket.binaryType = "arraybuffer";
+  let opened = false;
+
+  socket.onopen = () => {
+    opened = true;
+    retryDelay = 1000;
+  };
+  socket.onmessage = (event) => {
+    const view = new DataView(event.data);
+    let offset = 0;
+
+    function readString() {
+      const length = view.getUint8(offset);
+      const text = decoder.decode(
+        new Uint8Array(event.data, offset + 1, length)
+      );
+      offset += 1 + length;
+      return text;
+    }
+
+    while (offset < view.byteLength) {
+      const type = view.getUint8(offset);
+      const keyId = view.getUint16(offset + 1, true);
+      offset += 3;
+
+      if (type === 0x01) {
+        const group = readString();
+        keys.set(keyId, [group, readString()]);
+        continue;
+      }
+
+      const decoded = {};
+      if (type === 0x02) {
+        decoded.value = view.getFloat32(offset, true);
+        offset += 4;
+      } else if (type === 0x03) {
+        decoded.value = view.getFloat32(offset, true);
+        decoded.t = view.getFloat64(offset + 4, true);
+        decoded.speed = view.getFloat32(offset + 12, true);
+        offset += 16;
+      } else if (type === 0x04) {
+        const length = view.getUint32(offset, true);
+        const data = JSON.parse(
+          decoder.decode(new Uint8Array(event.data, offset + 4, length))
+        );
+        offset += 4 + length;
+        Object.assign(decoded, data[1] || {});
+        decoded.value = data[0];
+      } else {
+        console.error("Unknown record type:", type);
+        return;
+      }
+
+      const key = keys.get(keyId);
+      if (!key) continue;
+      decoded.group = key[0];
+      decoded.control = key[1];
+      onEvent(decoded);
+    }
+  };
+  socket.onclose = () => {
+    if (!opened) {
+      // WebSocketに対応していないサーバー（スレッド方式）ではSSEを使用する
+      connectSSE(onEvent, origin, "compact");
+      return;
+    }
+    // 再接続時は最新の値のスナップショットが送られる
+    setTimeout(
+      () => connectBinary(onEvent, origin, Math.min(retryDelay * 2, 30000)),
+      retryDelay
+    );
+  };
+  return socket;
+}
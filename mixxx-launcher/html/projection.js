@@ -2,6 +2,61 @@
 
 /// Add
 let ch = [];
+
+// サーバー時刻とローカル時刻（秒）の差。/clock の往復時間が最小の計測値を使用する
+const clock = { offset: null, rtt: Infinity };
+
+async function syncClock(samples = 5) {
+  let best = { offset: null, rtt: Infinity };
+  for (let i = 0; i < samples; i++) {
+    try {
+      const t0 = performance.now();
+      const res = await fetch(`${location.origin}/clock`, { cache: "no-store" });
+      const { t } = await res.json();
+      const t1 = performance.now();
+      if (t1 - t0 < best.rtt) {
+        best = { offset: t - (t0 + t1) / 2000, rtt: t1 - t0 };
+      }
+    } catch (err) {
+      console.error("Clock sync error:", err);
+    }
+  }
+  if (best.offset !== null) {
+    clock.offset = best.offset;
+    clock.rtt = best.rtt;
+  }
+}
+
+function serverNow() {
+  return performance.now() / 1000 + clock.offset;
+}
+
+// 受信した再生位置（t, speed付き）から現在の再生位置（秒）を推定する
+function estimatePosition(chData) {
+  const pos = chData.duration * chData.playposition;
+  if (chData._t === undefined || clock.offset === null) {
+    return pos;
+  }
+  return pos + (serverNow() - chData._t) * chData._speed;
+}
+
+// 次に読み込まれる可能性が高い動画（[Master] の prefetch）の埋め込みページとサムネイルを
+// 事前に取得し、読み込み時に映像をすぐ切り替えられるようにする
+const preloadedVideos = new Set();
+
+function preloadVideos(hints) {
+  for (const { youtube_id } of hints || []) {
+    if (!youtube_id || preloadedVideos.has(youtube_id)) {
+      continue;
+    }
+    preloadedVideos.add(youtube_id);
+    const link = document.createElement("link");
+    link.rel = "prefetch";
+    link.href = `https://www.youtube.com/embed/${youtube_id}`;
+    document.head.appendChild(link);
+    new Image().src = `https://i.ytimg.com/vi/${youtube_id}/hqdefault.jpg`;
+  }
+}
 /// Add
 
 function init(fullscreen = false) {
@@ -23,10 +78,11 @@ function init(fullscreen = false) {
 
   /// Add
   const DATA = {
-    "[Channel1]": {},
-    "[Channel2]": {},
     "[Master]": {},
   };
+  // レイヤーごとに表示中のデッキのグループ名。デッキNはレイヤー (N - 1) % レイヤー数 に割り当て、
+  // 同じレイヤーのデッキのうち最後に再生を開始したデッキの映像を表示する
+  const layerDecks = [];
   const eventHandlers = {
     onChangeVideo: (channel) => {
       ch[channel].pause();
@@ -44,16 +100,31 @@ function init(fullscreen = false) {
   ch.push(ch0);
   ch.push(ch1);
 
-  const eventSource = new EventSource(`${location.origin}/events`);
-  eventSource.onmessage = (event) => {
-    const data = JSON.parse(event.data);
-
+  connectEvents((data) => {
+    DATA[data.group] = DATA[data.group] || {};
     DATA[data.group][data.control] = data.value;
 
-    if (data.group === "[Channel1]" || data.group === "[Channel2]") {
-      const channel = parseInt(data.group.substr(-2, 1));
-      const chData = DATA[`[Channel${channel}]`];
-      const targetCh = ch[channel - 1];
+    const match = data.group.match(/^\[Channel(\d+)\]$/);
+    if (match) {
+      const layer = (parseInt(match[1]) - 1) % ch.length;
+      const chData = DATA[data.group];
+      const targetCh = ch[layer];
+
+      if (layerDecks[layer] === undefined) {
+        layerDecks[layer] = data.group;
+      }
+      if (
+        data.control === "play" &&
+        data.value == 1 &&
+        layerDecks[layer] !== data.group
+      ) {
+        // 同じレイヤーの別のデッキが再生を開始したら、そのデッキの映像に切り替える
+        layerDecks[layer] = data.group;
+        targetCh.setVideo(chData.trackinfo?.youtube_id);
+      }
+      if (layerDecks[layer] !== data.group) {
+        return;
+      }
 
       switch (data.control) {
         case "trackinfo":
@@ -62,19 +133,17 @@ function init(fullscreen = false) {
         case "play":
           if (data.value == 1) {
             targetCh.play();
+            syncPosition(chData, targetCh);
           } else {
             targetCh.pause();
           }
           break;
         case "playposition":
-          // 再生中のみシーク・同期させる
-          if (chData.play === 1) {
-            const pos = chData.duration * chData.playposition;
-
-            if (0.1 < Math.abs(pos - targetCh.currentTime)) {
-              targetCh.setTime(pos);
-            }
+          if (data.t !== undefined) {
+            chData._t = data.t;
+            chData._speed = data.speed;
           }
+          syncPosition(chData, targetCh);
           break;
       }
     }
@@ -85,11 +154,35 @@ function init(fullscreen = false) {
           crossfader = data.value;
           applyOpacity();
           break;
+        case "prefetch":
+          preloadVideos(data.value);
+          break;
       }
     }
-  };
-  eventSource.onerror = (err) => console.error("SSE Error:", err);
+  });
   applyOpacity();
+
+  // 再生位置の送信間隔が空いても、推定位置で同期させる
+  function syncPosition(chData, targetCh) {
+    // 再生中のみシーク・同期させる
+    if (chData.play === 1) {
+      const pos = estimatePosition(chData);
+
+      if (0.1 < Math.abs(pos - targetCh.currentTime)) {
+        targetCh.setTime(pos);
+      }
+    }
+  }
+
+  syncClock();
+  setInterval(syncClock, 60 * 1000);
+  setInterval(() => {
+    for (let layer = 0; layer < ch.length; layer++) {
+      if (layerDecks[layer] !== undefined) {
+        syncPosition(DATA[layerDecks[layer]], ch[layer]);
+      }
+    }
+  }, 100);
   ///Add
 
   ch0.addEventListener("dataApplied", (key, value) => {
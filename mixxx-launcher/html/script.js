@@ -1,45 +1,62 @@
 "use strict";
 
 window.addEventListener("load", (e) => {
-  const eventSource = new EventSource(`${location.origin}/events`);
-
-  eventSource.onmessage = onEventSourceMessage;
-
-  eventSource.onerror = (err) => {
-    console.error("SSE Error:", err);
-  };
+  connectEvents(onMixxxEvent);
 });
 
+// デッキ・サンプラーのグループ名（例: "[Channel10]"、"[Sampler2]"）
+const DECK_GROUP = /^\[(Channel|Sampler)(\d+)\]$/;
+
 const DATA = {
-  "[Channel1]": {},
-  "[Channel2]": {},
   "[Master]": {},
 };
 
-function onEventSourceMessage(event) {
-  const data = JSON.parse(event.data);
+// グループのデッキ要素を取得する。初めて受信したグループの場合は要素を追加する
+function getDeck(group) {
+  const [, kind, number] = group.match(DECK_GROUP);
+  const id = `${kind === "Channel" ? "ch" : "sampler"}${number}`;
+  let deck = document.getElementById(id);
+  if (deck) {
+    return deck;
+  }
+
+  deck = document
+    .querySelector("#deck-template")
+    .content.firstElementChild.cloneNode(true);
+  deck.id = id;
+  deck.dataset.order = (kind === "Channel" ? 0 : 1000) + parseInt(number);
+  // デッキは左側（奇数）と右側（偶数）に分かれる
+  deck.dataset.side = parseInt(number) % 2 === 1 ? "left" : "right";
+  deck.querySelector(".channel span").innerText =
+    kind === "Channel" ? `#${number}` : `S${number}`;
 
+  const decks = document.querySelector("#decks");
+  const next = [...decks.children].find(
+    (elem) => parseInt(elem.dataset.order) > parseInt(deck.dataset.order)
+  );
+  decks.insertBefore(deck, next || null);
+  return deck;
+}
+
+function onMixxxEvent(data) {
+  DATA[data.group] = DATA[data.group] || {};
   DATA[data.group][data.control] = data.value;
 
-  if (data.group === "[Channel1]" || data.group === "[Channel2]") {
-    const ch = parseInt(data.group.substr(-2, 1));
-    const chData = DATA[`[Channel${ch}]`];
-    const deck = document.querySelector(`#ch${ch}`);
+  if (DECK_GROUP.test(data.group)) {
+    const chData = DATA[data.group];
+    const deck = getDeck(data.group);
 
     switch (data.control) {
       case "trackinfo":
-        document.querySelector(`#ch${ch} .track-info .title`).innerText =
-          data.value.title;
-        document.querySelector(`#ch${ch} .track-info .artist`).innerText =
+        deck.querySelector(".track-info .title").innerText = data.value.title;
+        deck.querySelector(".track-info .artist").innerText =
           data.value.artist;
-        document.querySelector(`#ch${ch} .track-info .path`).innerText =
+        deck.querySelector(".track-info .path").innerText =
           (data.value.path || "").split("\\").at(-1) ||
           "Failed to find filepath";
         break;
       case "duration":
-        document.querySelector(`#ch${ch} .duration`).innerText = formatTime(
-          data.value
-        );
+        deck.querySelector(".duration").innerText = formatTime(data.value);
         break;
       case "playposition":
         deck.querySelector(".play-position").style.width = `${
@@ -66,13 +83,12 @@ function onEventSourceMessage(event) {
         }
         break;
       case "bpm":
-        document.querySelector(`#ch${ch} .bpm`).innerText =
-          data.value.toFixed(1);
+        deck.querySelector(".bpm").innerText = data.value.toFixed(1);
         break;
       case "rate":
-        DATA[data.group]._speed = 1 + -DATA[data.group].rateRange * data.value;
-        document.querySelector(`#ch${ch} .bpm-rate`).innerText =
-          formatNumber((DATA[data.group]._speed - 1) * 100, {
+        chData._speed = 1 + -chData.rateRange * data.value;
+        deck.querySelector(".bpm-rate").innerText =
+          formatNumber((chData._speed - 1) * 100, {
             sign: true,
             fractionDigits: 2,
           }) + "%";
@@ -83,14 +99,15 @@ function onEventSourceMessage(event) {
   if (data.group === "[Master]") {
     switch (data.control) {
       case "crossfader":
-        document.querySelector("#ch1 .channel span").style.opacity = Math.min(
-          1,
-          1 - data.value
-        );
-        document.querySelector("#ch2 .channel span").style.opacity = Math.min(
-          1,
-          1 + data.value
-        );
+        for (const span of document.querySelectorAll(
+          '.deck[id^="ch"] .channel span'
+        )) {
+          const side = span.closest(".deck").dataset.side;
+          span.style.opacity = Math.min(
+            1,
+            side === "left" ? 1 - data.value : 1 + data.value
+          );
+        }
         break;
     }
   }
@@ -1,189 +1,540 @@
-import json
+import argparse
+import re
 import requests
 import threading
 import time
 from flask import (
     Flask,
-    request,
     Response,
-    send_file,
-    send_from_directory,
+    jsonify,
+    request,
     stream_with_context,
 )
 from flask_cors import CORS
 
-from mixxx import MixxxProcessManager, MixxxAutomation, MixxxDatabase
-from files import AudioFile
+try:
+    import uvicorn
+except ImportError:  # 非同期サーバーモードを使用しない場合は不要
+    uvicorn = None
+
+from mixxx import (
+    DEFAULT_DECKS,
+    JournalRecorder,
+    JournalReplay,
+    LibraryIndex,
+    MixxxAutomation,
+    MixxxDatabase,
+    MixxxProcessManager,
+    deck_number,
+)
+from files import TagCache
+from events import (
+    MESSAGE_PREFIX,
+    EventBroadcaster,
+    EventCoalescer,
+    EventSubscriber,
+    MixxxEvent,
+    PositionTracker,
+    StateStore,
+)
+from metrics import MetricsRegistry
+from prescan import prescan
+from web import AsgiApp, ProxyCache, StaticAssets
+from resolver import Prefetcher, TrackResolverPool
+from startup import StartupReport, wait_until
 
 app = Flask(__name__, static_folder="html")
 CORS(app)
 
-connected_clients = []
+metrics = MetricsRegistry()
+broadcaster = EventBroadcaster(metrics=metrics)
+events_received = metrics.counter(
+    "youtubevj_events_total", "Mixxxから受信したイベント数", ("control",)
+)
+log_handle_seconds = metrics.histogram(
+    "youtubevj_log_handle_seconds", "ログ行1件の解析・振り分けにかかった時間"
+).labels()
+# トラック情報の解決処理の段階ごとの時間
+# match: 索引の検索, db: データベースの参照, uia: UIオートメーション, tag: タグの読み込み
+track_stage_seconds = metrics.histogram(
+    "youtubevj_track_stage_seconds", "トラック情報の解決処理の段階ごとの時間", ("stage",)
+)
+# Mixxxから受信した最新の値（トラックの特定に使用する）
+mixxx_state = StateStore()
+# playposition等の高頻度なコントロールは最新値のみを一定レートで送信する
+coalescer = EventCoalescer(lambda event: broadcast_message(event))
+# 再生位置はクライアントが推定できるため、推定から外れた場合と一定間隔でのみ送信する
+position_tracker = PositionTracker()
 mixxx_automation = None
 mixxx_db = None
+library_index = None
+tag_cache = TagCache()
+# 次に読み込まれる可能性が高いトラックのYouTubeIDを事前に解決しておく
+prefetcher = None
+# --record 指定時に受信したメッセージを記録する
+journal_recorder = None
+# 起動処理のフェーズごとの所要時間（/status で参照する）
+startup_report = StartupReport()
 
 
 def handle_mixxx_log(log_line):
-    if "YouTubeVJ_Message:" in log_line:
-        message = log_line.split("YouTubeVJ_Message:", 1)[1].strip()
-        broadcast_message(message)
-        data = json.loads(message)
-        if data["control"] == "track_loaded":
-            threading.Thread(
-                target=load_track_details, args=(data["group"],), daemon=True
-            ).start()
+    if journal_recorder is not None:
+        journal_recorder.record(log_line)
 
+    started = time.perf_counter()
+    try:
+        event = MixxxEvent.parse(log_line)
+    except ValueError as e:
+        print(f"メッセージの解析に失敗しました: {e}")
+        return
+    if event is None:
+        return
+
+    events_received.labels(event.control).inc()
+    mixxx_state.update(event)
+    position = position_tracker.update(event)
+    if event.control != "playposition":
+        coalescer.submit(event.group, event.control, event)
+    if position is not None:
+        coalescer.submit(position.group, position.control, position)
+    if event.control == "track_loaded":
+        track_resolver.submit(event.group, mixxx_state.values(event.group))
+    log_handle_seconds.observe(time.perf_counter() - started)
+
+
+def load_track_details(group, deck_values):
+    """
+    読み込まれたトラックの情報とYouTubeIDを解決し、送信するtrackinfoイベントを返す。
 
-def load_track_details(group):
-    channel = group[-2]
-    title = mixxx_automation.get_element_text(f"Deck{channel}_Title")
-    artist = mixxx_automation.get_element_text(f"Deck{channel}_Artist")
+    コントローラースクリプトから受信した曲の長さ・BPM・サンプルレートでライブラリから
+    トラックを特定し、特定できない場合のみUIオートメーションで表示中のタイトルを取得します。
+    """
+    title = ""
+    artist = ""
     path = None
     youtube_id = None
 
-    q_title = title
-    if len(title) != 0 and title[-1] == "…":
-        q_title = title.replace("…", "%")
-
-    q_artist = artist
-    if len(artist) != 0 and artist[-1] == "…":
-        q_artist = artist.replace("…", "%")
-
-    music_id = mixxx_db.search_music(q_artist, q_title, like_search=True)
-    if music_id:
-        title = mixxx_db.get_title(music_id)
-        artist = mixxx_db.get_artist(music_id)
-        path = mixxx_db.get_location(music_id)
-        if path is not None:
-            audio = AudioFile(path)
-            youtube_id = audio.get_tag("YouTubeID", True)
+    with track_stage_seconds.labels("total").time():
+        track = identify_track_from_log(group, deck_values)
+        if track is None and mixxx_automation.is_available:
+            track, title, artist = identify_track_from_ui(group)
+
+        if track:
+            title = track["title"]
+            artist = track["artist"]
+            path = track["location"]
+            if "youtube_id" in track:
+                youtube_id = track["youtube_id"]  # 先読み済み
+            elif path is not None:
+                with track_stage_seconds.labels("tag").time():
+                    youtube_id = tag_cache.get_tag(path, "YouTubeID")
+            prefetcher.submit(group, track["id"])
 
     value = {
-        "group": group,
-        "control": "trackinfo",
-        "value": {
-            "title": title,
-            "artist": artist,
-            "path": path,
-            "youtube_id": youtube_id,
-        },
+        "title": title,
+        "artist": artist,
+        "path": path,
+        "youtube_id": youtube_id,
     }
-    broadcast_message(json.dumps(value))
+    return MixxxEvent(group, "trackinfo", value)
 
 
-def broadcast_message(message):
+def identify_track_from_log(group, deck_values):
     """
-    接続中の全てのクライアントにメッセージを送信する。
+    コントローラースクリプトから受信した値でトラックを特定する。
+
+    候補が1件に絞り込めない場合はNoneを返す。誤ったトラックの映像を再生しないよう、
+    候補から推測することはしない（UIオートメーションが使用できる環境ではUIから特定する）。
     """
-    # print(message)
-    for client in connected_clients[:]:  # クライアントリストを安全に反復
-        try:
-            client["queue"].append(f"data: {message}\n\n")
-        except Exception as e:
-            print(f"Error broadcasting to client: {e}")
-            connected_clients.remove(client)
+    duration = deck_values.get("duration")
+    if not duration or not library_index.is_loaded:
+        return None
+
+    with track_stage_seconds.labels("match").time():
+        candidates = library_index.match_properties(
+            duration,
+            bpm=deck_values.get("file_bpm"),
+            samplerate=deck_values.get("track_samplerate"),
+        )
+    if len(candidates) == 1:
+        return get_track(candidates[0])
+    if len(candidates) > 1 and not mixxx_automation.is_available:
+        print(
+            f"{group}: 曲の長さ・BPM・サンプルレートが一致するトラックが"
+            f"{len(candidates)}件あるため、トラックを特定できませんでした"
+        )
+    return None
+
+
+def identify_track_from_ui(group):
+    """
+    UIオートメーションでデッキに表示されているタイトルとアーティストを取得し、トラックを特定する。
+    """
+    number = deck_number(group)
+    if number is None or number > mixxx_automation.decks:
+        return None, "", ""  # サンプラー等はUIから取得できない
+    with track_stage_seconds.labels("uia").time():
+        deck = mixxx_automation.read_deck(number, ("title", "artist"))
+    title = deck["title"]
+    artist = deck["artist"]
+
+    if library_index.is_loaded:
+        with track_stage_seconds.labels("match").time():
+            library_id = library_index.lookup(artist, title)
+        track = get_track(library_id) if library_id is not None else None
+    else:
+        # 索引の構築が完了するまではデータベースを直接検索する
+        q_title = title
+        if len(title) != 0 and title[-1] == "…":
+            q_title = title.replace("…", "%")
+
+        q_artist = artist
+        if len(artist) != 0 and artist[-1] == "…":
+            q_artist = artist.replace("…", "%")
+
+        with track_stage_seconds.labels("db").time():
+            track = mixxx_db.resolve_track(q_artist, q_title, like_search=True)
+
+    return track, title, artist
+
+
+def get_track(library_id):
+    """
+    ライブラリIDからトラックの情報を取得する。先読み済みのトラックはデータベースを参照しない。
+    """
+    track = prefetcher.get(library_id)
+    if track is not None:
+        return track
+    with track_stage_seconds.labels("db").time():
+        return mixxx_db.get_track(library_id)
+
+
+def publish_prefetch(hints):
+    """
+    先読みしたトラックのYouTubeIDを、投影画面が映像を事前に読み込むためのヒントとして送信する。
+    """
+    broadcast_message(MixxxEvent("[Master]", "prefetch", hints))
+
+
+def broadcast_message(event):
+    """
+    接続中の全てのクライアントにイベントを送信する。
+    """
+    # print(event)
+    broadcaster.publish(event)
+
+
+# デッキごとに独立したワーカーで最新の読み込みだけを解決する
+track_resolver = TrackResolverPool(load_track_details, broadcast_message)
+metrics.register_callback(
+    "youtubevj_coalesced_total",
+    "新しい値で上書きされて送信されなかったイベント数",
+    lambda: [({}, coalescer.dropped)],
+    kind="counter",
+)
+metrics.register_callback(
+    "youtubevj_track_superseded_total",
+    "新しい読み込みによって破棄されたトラック情報の解決処理の件数",
+    lambda: [({}, track_resolver.superseded)],
+    kind="counter",
+)
 
 
 @app.route("/events")
 def sse():
     """
     クライアントが接続された時に呼び出されるSSEエンドポイント。
+
+    接続直後に各コントロールの最新の値を送るため、途中から接続したクライアントでも
+    読み込み中のトラックや再生位置がすぐに反映されます。
+    """
+    # 新しいクライアントを追加（切断時はストリーム側で登録解除される）
+    # 再接続時はEventSourceが付与するLast-Event-IDから切断中のイベントのみを送る
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "lastEventId"
+    )
+    # ?format=compactの場合はキーIDを使った短い形式で送る（binaryはWebSocketのみ）
+    wire_format = "compact" if request.args.get("format") in ("compact", "binary") else "json"
+    client = broadcaster.subscribe(last_event_id, EventSubscriber(wire_format))
+    return Response(
+        stream_with_context(broadcaster.stream(client)),
+        content_type="text/event-stream",
+    )
+
+
+@app.route("/clock")
+def get_clock():
+    """
+    再生位置の`t`と同じ基準のサーバー時刻を返す（クライアントの時刻合わせ用）。
     """
+    return jsonify({"t": time.monotonic()})
 
-    def event_stream(client):
-        yield ": connected\n\n"  # 接続確認のため最初に送信
-        while True:
-            if client["queue"]:
-                yield client["queue"].pop(0)  # キューからメッセージを送信
-            else:
-                yield ""  # 空のデータを送信して接続を維持
-                time.sleep(0.1)
 
-    # 新しいクライアントを追加
-    client = {"queue": []}
-    connected_clients.append(client)
-    try:
-        return Response(
-            stream_with_context(event_stream(client)), content_type="text/event-stream"
-        )
-    finally:
-        # クライアント切断時にリストから削除
-        if client in connected_clients:
-            # connected_clients.remove(client)
-            print("Remove")
+@app.route("/metrics")
+def get_metrics():
+    """
+    メトリクスを返す。`?format=json`を指定した場合はJSON形式の概要を返す。
+    """
+    if request.args.get("format") == "json":
+        return jsonify(metrics.summary())
+    return Response(
+        metrics.render_prometheus(), content_type="text/plain; version=0.0.4"
+    )
+
+
+@app.route("/status")
+def get_status():
+    """
+    起動処理のフェーズごとの所要時間と、準備が整っているかどうかを返す。
+    """
+    return jsonify(startup_report.summary())
+
+
+def inject_controller_script(content, encoding):
+    """
+    投影画面のHTMLにVJコントローラーのスクリプトを追加する。
+    """
+    html = content.decode(encoding).replace(
+        "</head>",
+        '  <script src="/event-decoder.js"></script>\n'
+        '  <script src="./assets/js/vj-controller.js"></script>\n  </head>',
+    )
+    return html.encode("utf-8")
+
+
+proxy_cache = ProxyCache(
+    "https://kazuprog.github.io/youtube-vj/",
+    transforms={"projection.html": inject_controller_script},
+)
 
 
 @app.route("/youtube-vj/", defaults={"subpath": ""})
 @app.route("/youtube-vj/<path:subpath>")
 def proxy(subpath):
     if subpath == "assets/js/projection.js":
-        return send_file("./html/projection.js", mimetype="text/javascript")
+        return static_response("projection.js")
 
     # コントローラー画面は不要とする
     if subpath == "":
         subpath = "projection.html"
 
-    proxied_url = f"https://kazuprog.github.io/youtube-vj/{subpath}"
-
-    headers = {key: value for key, value in request.headers if key != "Host"}
-    data = request.get_data()
-
     try:
-        proxied_response = requests.request(
-            method=request.method,
-            url=proxied_url,
-            allow_redirects=False,
-        )
+        entry = proxy_cache.fetch(subpath)
     except requests.RequestException as e:
         return f"Error occurred: {e}", 500
 
-    essential_headers = {
-        key: value
-        for key, value in proxied_response.headers.items()
-        if key in ["Content-Type", "Content-Length"]
-    }
+    return Response(entry.body, status=entry.status, headers=entry.headers)
 
-    content = proxied_response.content
-    if subpath == "projection.html":
-        content = content.decode(proxied_response.encoding or "utf-8").replace(
-            "</head>",
-            '  <script src="./assets/js/vj-controller.js"></script>\n  </head>',
-        )
 
-    response = Response(
-        content,
-        status=proxied_response.status_code,
-        headers=essential_headers,
-    )
-    return response
+# htmlディレクトリのファイルはメモリに読み込み、圧縮済みのものを返す
+static_assets = StaticAssets(app.static_folder)
+
+
+def static_response(path):
+    """
+    htmlディレクトリのファイルを返す。ETagが一致する場合は304を返す。
+    """
+    status, headers, body = static_assets.respond(path, request.headers)
+    return Response(body, status=status, headers=headers)
 
 
 # それ以外のすべてのルートでhtmlディレクトリのファイルを提供
+# （ルートにアクセスされた場合はindex.htmlを返し、存在しないファイルは404を返す）
+@app.route("/", defaults={"path": ""})
 @app.route("/<path:path>", methods=["GET"])
 def serve_static_file(path):
-    return send_from_directory(app.static_folder, path)
+    return static_response(path or "index.html")
 
 
-# デフォルトでindex.htmlを返す場合（ルートや存在しないファイルにアクセスされた場合）
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
-def catch_all(path):
+def check_tag_cache():
+    """
+    ライブラリ全体のファイルのタグキャッシュが有効かどうかを確認し、有効なものをメモリに読み込む。
+
+    Mixxxの起動と競合しないよう、起動時はファイルの読み込みを行わない。
+    """
+    result = prescan(mixxx_db, tag_cache, extract=False)
+    if result["stale"]:
+        print(
+            f"タグキャッシュが無効なトラックが{result['stale']}件あります"
+            "（読み込み時に抽出します。--prescan で事前に抽出できます）"
+        )
+    return f"{result['total']} tracks, {result['stale']} stale"
+
+
+def run_prescan(workers=1):
+    """
+    ライブラリ全体のタグを事前に抽出し、トラック読み込み時の処理をキャッシュの参照のみにする。
+
+    Mixxxの動作を妨げないよう、少ないワーカー数・低い優先度で実行する。
+    """
+    result = prescan(mixxx_db, tag_cache, workers, low_priority=True)
+    print(
+        f"事前スキャンが完了しました（{result['total']}件中 読み込み {result['scanned']}件, "
+        f"YouTubeID未設定 {len(result['missing_tags'])}件, エラー {len(result['errors'])}件）"
+    )
+
+
+def warm_prefetch():
+    """
+    AutoDJのキュー等からYouTubeIDを先読みし、以降の読み込み・データベースの変更の監視を開始する。
+    """
     try:
-        return send_from_directory(app.static_folder, path)
-    except:
-        # ファイルが見つからない場合、index.htmlを返す
-        return send_from_directory(app.static_folder, "index.html")
+        count = prefetcher.refresh()
+    finally:
+        # 読み込めなかった場合も、監視スレッドで再試行する
+        prefetcher.start()
+    return f"{count} tracks"
+
+
+def warm_library_index():
+    """
+    ライブラリ索引を構築し、以降の変更の監視を開始する。
+    """
+    library_index.refresh()
+    library_index.start()
+    return f"{len(library_index)} tracks"
+
+
+# 投影画面のHTMLから、事前に取得しておく相対パスのファイルを抽出する
+_ASSET_PATTERN = re.compile(r'(?:src|href)="(?:\./)?([^"#?:]+)"')
+
+
+def warm_proxy_cache():
+    """
+    投影画面と、投影画面が読み込む上流サーバーのファイルを事前に取得しておく。
+    """
+    entry = proxy_cache.fetch("projection.html")
+    subpaths = {
+        subpath
+        for subpath in _ASSET_PATTERN.findall(entry.body.decode("utf-8", errors="replace"))
+        if not subpath.startswith("/") and subpath != "assets/js/projection.js"
+    }
+    failed = 0
+    for subpath in sorted(subpaths):
+        try:
+            proxy_cache.fetch(subpath)
+        except requests.RequestException:
+            failed += 1
+    return f"{len(subpaths) + 1 - failed} files"
+
+
+def warm_static_assets():
+    """
+    htmlディレクトリのファイルを読み込み、圧縮しておく。
+    """
+    static_assets.load()
+    return f"{len(static_assets)} files"
+
+
+def wait_for_mixxx(mixxx_proc, timeout=60.0):
+    """
+    コントローラースクリプトから最初のメッセージを受信するまで待機する。
+
+    コントローラースクリプトは初期化時にクロスフェーダーの値を送信するため、
+    コントロールが操作されていなくてもマッピングの読み込みが完了した時点で戻る。
+    """
+    ready = wait_until(
+        lambda: mixxx_proc.messages_read > 0,
+        timeout=timeout,
+        stop=lambda: not mixxx_proc.is_process_running(),
+    )
+    if not ready:
+        raise TimeoutError("コントローラースクリプトからのメッセージを受信できませんでした")
+
+
+def connect_automation(mixxx_proc):
+    """
+    MixxxのウィンドウにUIオートメーションで接続する。接続できるまで間隔を延ばしながら再試行する。
+    """
+    connected = wait_until(
+        lambda: mixxx_automation.connect(max_attempts=1),
+        initial=0.5,
+        max_interval=10.0,
+        stop=lambda: not mixxx_proc.is_process_running(),
+    )
+    if not connected:
+        raise RuntimeError("Mixxxが終了しました")
+
+
+def print_startup_report(threads, prescan_workers=None):
+    """
+    全ての起動処理の完了を待ち、フェーズごとの所要時間を表示する。
+    prescan_workersが指定された場合は、その後にタグの事前スキャンを行う。
+    """
+    for thread in threads:
+        thread.join()
+    print("起動処理が完了しました\n" + startup_report.format())
+    if prescan_workers:
+        try:
+            run_prescan(prescan_workers)
+        except Exception as e:
+            print(f"事前スキャン中にエラーが発生しました: {e}")
 
 
 def run_server():
     app.run(host="0.0.0.0", port=5000)
 
 
-def start_mixxx():
-    global mixxx_automation, mixxx_db
-    mixxx_proc = MixxxProcessManager()
-    mixxx_automation = MixxxAutomation()
-    mixxx_db = MixxxDatabase()
+def run_async_server(asgi_app):
+    """
+    asyncioベースのサーバーで起動する。
+
+    SSE・WebSocketの接続は1つのイベントループで保持し、それ以外のルートはFlaskで処理する。
+    """
+    config = uvicorn.Config(asgi_app, host="0.0.0.0", port=5000, log_level="info")
+    uvicorn.Server(config).run()
+
+
+def start_mixxx(replay=None, db_path=None, decks=DEFAULT_DECKS, prescan_workers=None):
+    """
+    Mixxxを起動（またはジャーナルを再生）し、受信したメッセージの処理を開始する。
+
+    Args:
+        replay (Optional[JournalReplay]): Mixxxの代わりに再生するジャーナル
+        db_path (Optional[str]): Mixxxデータベースのパス
+        decks (int): UIオートメーションで情報を取得するデッキ数
+        prescan_workers (Optional[int]): 起動処理の完了後にタグの事前スキャンを行う場合の
+            ワーカープロセス数
+    """
+    global mixxx_automation, mixxx_db, library_index, prefetcher
+    # メッセージ以外の行はデコードせずに破棄する
+    mixxx_proc = MixxxProcessManager(
+        message_prefix=MESSAGE_PREFIX.encode(), source=replay
+    )
+    metrics.register_callback(
+        "youtubevj_log_read_total",
+        "Mixxxのログから読み取った量",
+        lambda: [
+            ({"unit": "bytes"}, mixxx_proc.bytes_read),
+            ({"unit": "lines"}, mixxx_proc.lines_read),
+            ({"unit": "messages"}, mixxx_proc.messages_read),
+        ],
+        kind="counter",
+    )
+    mixxx_automation = MixxxAutomation(decks)
+    mixxx_db = MixxxDatabase(db_path)
+    library_index = LibraryIndex(mixxx_db)
+    prefetcher = Prefetcher(mixxx_db, tag_cache, publish_prefetch)
+    metrics.register_callback(
+        "youtubevj_prefetch_total",
+        "先読みしたトラック数と、読み込まれたトラックが先読み済みだった回数",
+        lambda: [
+            ({"result": "resolved"}, prefetcher.resolved),
+            ({"result": "hit"}, prefetcher.hits),
+        ],
+        kind="counter",
+    )
+
+    # Mixxxの起動を待つ間に、最初のトラックの読み込みで使用するキャッシュを並列に準備する
+    threads = startup_report.run_parallel(
+        {
+            "library_index": warm_library_index,
+            "tag_cache": check_tag_cache,
+            "prefetch": warm_prefetch,
+            "proxy_cache": warm_proxy_cache,
+            "static_assets": warm_static_assets,
+        }
+    )
 
     mixxx_proc.set_log_callback(handle_mixxx_log)
 
@@ -191,11 +542,16 @@ def start_mixxx():
         with mixxx_proc.start():
             print("Mixxxが起動し、ログ処理を開始しました...")
 
-            is_connected = False
-            while not is_connected:
-                is_connected = mixxx_automation.connect()
-                if not is_connected:
-                    time.sleep(5)
+            tasks = {"mixxx": lambda: wait_for_mixxx(mixxx_proc)}
+            # UIオートメーションはトラックを特定できなかった場合の補助としてのみ使用する
+            if replay is None and mixxx_automation.is_available:
+                tasks["mixxx_automation"] = lambda: connect_automation(mixxx_proc)
+            threads += startup_report.run_parallel(tasks)
+            threading.Thread(
+                target=print_startup_report,
+                args=(threads, prescan_workers),
+                daemon=True,
+            ).start()
 
             while mixxx_proc.is_process_running():
                 time.sleep(1)
@@ -204,7 +560,70 @@ def start_mixxx():
         print(f"エラーが発生しました: {e}")
 
 
-if __name__ == "__main__":
+def main():
+    """
+    コマンドライン引数を解析し、Webサーバとログ処理を開始する。
+    """
+    global journal_recorder
+    parser = argparse.ArgumentParser(description="MixxxとYouTube-VJを連携させます。")
+    parser.add_argument("--db", help="Mixxxデータベースのパス")
+    parser.add_argument(
+        "--decks",
+        type=int,
+        default=DEFAULT_DECKS,
+        help="Mixxxのデッキ数（コントローラースクリプトの設定と合わせる）。デフォルトは4。",
+    )
+    parser.add_argument(
+        "--prescan",
+        type=int,
+        nargs="?",
+        const=1,
+        metavar="WORKERS",
+        help="起動処理の完了後、低い優先度でライブラリ全体のタグを事前に抽出する。"
+        "ワーカープロセス数を指定できる（デフォルトは1）",
+    )
+    parser.add_argument("--record", help="受信したメッセージを記録するジャーナルファイル")
+    parser.add_argument(
+        "--replay", help="Mixxxを起動せずに再生するジャーナルファイル"
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="ジャーナルの再生速度（0で最大速度）。デフォルトは1。",
+    )
+    parser.add_argument(
+        "--server",
+        choices=("thread", "async"),
+        default="thread",
+        help="Webサーバの種類。asyncは多数のクライアントの同時接続向け（uvicornとasgirefが必要）",
+    )
+    args = parser.parse_args()
+
+    server = run_server
+    if args.server == "async":
+        try:
+            if uvicorn is None:
+                raise RuntimeError("非同期サーバーモードにはuvicornが必要です")
+            asgi_app = AsgiApp(app, broadcaster)
+        except RuntimeError as e:
+            print(f"{e}。スレッド方式のサーバで起動します")
+        else:
+            server = lambda: run_async_server(asgi_app)
+
+    replay = JournalReplay(args.replay, args.replay_speed) if args.replay else None
+    if args.record:
+        journal_recorder = JournalRecorder(args.record)
+
     # Webサーバスレッドの開始
-    threading.Thread(target=run_server, daemon=True).start()
-    start_mixxx()
+    threading.Thread(target=server, daemon=True).start()
+    try:
+        start_mixxx(replay, args.db, args.decks, args.prescan)
+    finally:
+        if journal_recorder is not None:
+            journal_recorder.close()
+            print(f"{journal_recorder.count}件のメッセージを記録しました: {args.record}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from .registry import DEFAULT_BUCKETS, Counter, Histogram, MetricFamily, MetricsRegistry
+
+__all__ = ["Counter", "DEFAULT_BUCKETS", "Histogram", "MetricFamily", "MetricsRegistry"]
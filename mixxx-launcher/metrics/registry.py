@@ -0,0 +1,374 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 処理時間の計測に使用するバケット（秒）。0.1ms〜5sを対象とする
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+Labels = Dict[str, str]
+
+
+def _format_labels(labels: Labels) -> str:
+    """Prometheusのラベル表記に変換する"""
+    if not labels:
+        return ""
+    items = ",".join(
+        '{}="{}"'.format(
+            key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels.items()
+    )
+    return "{" + items + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _json_bound(value: Optional[float]) -> Any:
+    """JSONで表現できない無限大を文字列に変換する"""
+    return "+Inf" if value == math.inf else value
+
+
+class Counter:
+    """
+    単調増加するカウンター。
+    """
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """
+        カウンターを増やす。
+
+        Args:
+            amount (int, optional): 増やす量。デフォルトは1。
+        """
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    値の分布を固定のバケットで集計するヒストグラム。
+
+    観測時はバケットの位置を二分探索して加算するだけのため、常時有効にしておけます。
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        値を記録する。
+
+        Args:
+            value (float): 記録する値
+        """
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """
+        with文のブロックの処理時間（秒）を記録する。
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """
+        集計値の複製を返す。
+
+        Returns:
+            Tuple[List[int], float, int]: (バケットごとの件数, 合計, 件数)
+        """
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, ratio: float) -> Optional[float]:
+        """
+        バケットの上限値から分位数を推定する。
+
+        Args:
+            ratio (float): 分位（0.99で99パーセンタイル）
+
+        Returns:
+            Optional[float]: 推定値。記録が無い場合はNone、最大のバケットを超える場合はinf
+        """
+        counts, _, count = self.snapshot()
+        if count == 0:
+            return None
+        rank = ratio * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + (math.inf,), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return math.inf
+
+
+class MetricFamily:
+    """
+    同じ名前でラベルの値だけが異なるメトリクスの集合。
+
+    Attributes:
+        name (str): メトリクス名
+        help (str): 説明文
+        kind (str): "counter" または "histogram"
+        labelnames (Tuple[str, ...]): ラベル名
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """
+        ラベルの値に対応するメトリクスを取得する。
+
+        頻繁に呼ばれる箇所では、戻り値を保持しておくとラベルの検索を省略できます。
+
+        Args:
+            *values (str): ラベル名の順に並べたラベルの値
+
+        Returns:
+            Counter | Histogram: ラベルの値に対応するメトリクス
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    if len(values) != len(self.labelnames):
+                        raise ValueError(
+                            f"{self.name}のラベルの数が一致しません: {values}"
+                        )
+                    child = (
+                        Histogram(self.buckets) if self.kind == "histogram" else Counter()
+                    )
+                    self._children[values] = child
+        return child
+
+    def children(self) -> List[Tuple[Labels, Any]]:
+        """
+        (ラベル, メトリクス) の一覧を返す。
+        """
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, values)), child) for values, child in items]
+
+
+class MetricsRegistry:
+    """
+    ランチャー内の各処理のメトリクスを保持し、Prometheus形式とJSON形式で出力するクラス。
+
+    カウンターとヒストグラムは処理中に更新し、キューの長さ等の現在値は
+    コールバック関数を登録しておき、出力時にのみ取得します。
+    """
+
+    def __init__(self):
+        """
+        MetricsRegistryの初期化メソッド。
+        """
+        self._families: Dict[str, MetricFamily] = {}
+        self._callbacks: Dict[
+            str, Tuple[str, str, Callable[[], Iterable[Tuple[Labels, float]]]]
+        ] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> MetricFamily:
+        """
+        カウンターを登録する。登録済みの場合は登録済みのものを返す。
+
+        Args:
+            name (str): メトリクス名
+            help (str): 説明文
+            labelnames (Iterable[str], optional): ラベル名
+
+        Returns:
+            MetricFamily: カウンターの集合
+        """
+        return self._register(MetricFamily(name, help, "counter", labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        """
+        ヒストグラムを登録する。登録済みの場合は登録済みのものを返す。
+
+        Args:
+            name (str): メトリクス名
+            help (str): 説明文
+            labelnames (Iterable[str], optional): ラベル名
+            buckets (Tuple[float, ...], optional): バケットの上限値（昇順）
+
+        Returns:
+            MetricFamily: ヒストグラムの集合
+        """
+        return self._register(
+            MetricFamily(name, help, "histogram", labelnames, buckets)
+        )
+
+    def register_callback(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Iterable[Tuple[Labels, float]]],
+        kind: str = "gauge",
+    ):
+        """
+        出力時に値を取得するメトリクスを登録する。
+
+        Args:
+            name (str): メトリクス名
+            help (str): 説明文
+            callback (Callable[[], Iterable[Tuple[Labels, float]]]):
+                (ラベル, 値) の一覧を返すコールバック関数
+            kind (str, optional): "gauge" または "counter"。デフォルトは"gauge"。
+        """
+        with self._lock:
+            self._callbacks[name] = (help, kind, callback)
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            return self._families.setdefault(family.name, family)
+
+    def _collect_callbacks(self) -> List[Tuple[str, str, str, List[Tuple[Labels, float]]]]:
+        """登録されたコールバック関数から現在値を取得する"""
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        collected = []
+        for name, (help, kind, callback) in callbacks:
+            try:
+                samples = list(callback())
+            except Exception:
+                continue  # 計測の失敗で出力全体を止めない
+            collected.append((name, help, kind, samples))
+        return collected
+
+    def render_prometheus(self) -> str:
+        """
+        全てのメトリクスをPrometheusのテキスト形式で出力する。
+
+        Returns:
+            str: テキスト形式のメトリクス
+        """
+        lines = []
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in family.children():
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_format_labels(labels)} {child.value}")
+                    continue
+                counts, total, count = child.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(family.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    bucket_labels = {**labels, "le": _format_value(bound)}
+                    lines.append(
+                        f"{family.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                    )
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {total!r}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {count}")
+
+        for name, help, kind, samples in self._collect_callbacks():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        全てのメトリクスの概要を返す。ヒストグラムは件数・平均・分位数の推定値に要約する。
+
+        Returns:
+            Dict[str, Any]: メトリクス名をキーとする辞書
+        """
+        result: Dict[str, Any] = {"uptime": round(time.time() - self.started_at, 3)}
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            entries = []
+            for labels, child in family.children():
+                if family.kind == "counter":
+                    entries.append({"labels": labels, "value": child.value})
+                    continue
+                _, total, count = child.snapshot()
+                entries.append(
+                    {
+                        "labels": labels,
+                        "count": count,
+                        "mean": total / count if count else None,
+                        **{
+                            name: _json_bound(child.quantile(ratio))
+                            for name, ratio in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+                        },
+                    }
+                )
+            result[family.name] = entries
+
+        for name, _, _, samples in self._collect_callbacks():
+            result[name] = [{"labels": labels, "value": value} for labels, value in samples]
+        return result
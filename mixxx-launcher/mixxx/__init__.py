@@ -1,5 +1,20 @@
 from .automation import MixxxAutomation
 from .database import MixxxDatabase
+from .decks import DEFAULT_DECKS, GROUP_PATTERN, deck_groups, deck_number, parse_group
+from .journal import JournalRecorder, JournalReplay
+from .library_index import LibraryIndex
 from .process_manager import MixxxProcessManager
 
-__all__ = ["MixxxAutomation", "MixxxDatabase", "MixxxProcessManager"]
+__all__ = [
+    "DEFAULT_DECKS",
+    "GROUP_PATTERN",
+    "JournalRecorder",
+    "JournalReplay",
+    "LibraryIndex",
+    "MixxxAutomation",
+    "MixxxDatabase",
+    "MixxxProcessManager",
+    "deck_groups",
+    "deck_number",
+    "parse_group",
+]
@@ -1,7 +1,37 @@
 import time
 import logging
-from typing import Dict, Optional
-from pywinauto import Application, ElementNotFoundError
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from .decks import DEFAULT_DECKS
+
+try:
+    from pywinauto import Application
+    from pywinauto.controls.uiawrapper import UIAWrapper
+except ImportError:  # Windows以外の環境ではUIオートメーションを使用できない
+    Application = None
+
+# read_deckで取得する項目名とエレメントIDの接尾辞
+DECK_FIELDS = {
+    "title": "Title",
+    "artist": "Artist",
+    "bpm": "Bpm",
+    "rate": "Rate",
+    "position": "PlayPosition",
+    "duration": "Duration",
+}
+
+# デッキのエレメントからのオートメーションIDのパス。
+# 各デッキのエレメントIDは "Deck{番号}_{キー}" とし、パスの先頭に "Deck{番号}" を付ける
+DECK_ELEMENT_PATHS = {
+    "Title": "DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.WidgetGroup.TitleText",
+    "PlayPosition": "DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.AlignRight.PlayPositionText",
+    "Artist": "DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.WidgetGroup.ArtistText",
+    "Duration": "DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.AlignRight.DurationText",
+    "Bpm": "WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.BpmText",
+    "Rate": "WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.RateText",
+}
 
 
 class MixxxAutomation:
@@ -9,42 +39,51 @@ class MixxxAutomation:
     Mixxxアプリケーションの自動化を行うクラス。
 
     UIオートメーションを使用して、Mixxxの各デッキからリアルタイムで情報を取得します。
+    エレメントはオートメーションIDのパスをたどって検索し、無効になるまでキャッシュします。
 
     Attributes:
         app_title (str): 接続するアプリケーションのタイトル
         app_window_class_name (str): 接続するアプリケーションのウィンドウクラス名
         mixxx_window (object): Mixxxアプリケーションのウィンドウオブジェクト
         logger (logging.Logger): ログ出力用のロガーオブジェクト
+        decks (int): UIから情報を取得するデッキ数
         automation_elems (Dict[str, str]): UIエレメントのオートメーションID辞書
     """
 
-    def __init__(self):
+    def __init__(self, decks: int = DEFAULT_DECKS):
         """
         MixxxAutomationクラスの初期化メソッド。
+
+        Args:
+            decks (int, optional): UIから情報を取得するデッキ数。デフォルトは4。
         """
         self.app_title = "Mixxx"
         self.app_window_class_name = "MixxxMainWindow"
         self.main_window = None
+        self._root_info = None
+        self._anchor_cache = {}
+        self._element_cache = {}
+        # デッキごとの解決ワーカーから同時に参照・更新されるキャッシュを保護する
+        self._cache_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(
             level=logging.INFO, format="%(asctime)s - %(levelname)s: %(message)s"
         )
 
+        self.decks = decks
         self.automation_elems: Dict[str, str] = {
-            "Deck1_Title": "Deck1.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.WidgetGroup.TitleText",
-            "Deck1_PlayPosition": "Deck1.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.AlignRight.PlayPositionText",
-            "Deck1_Artist": "Deck1.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.WidgetGroup.ArtistText",
-            "Deck1_Duration": "Deck1.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.AlignRight.DurationText",
-            "Deck1_Bpm": "Deck1.WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.BpmText",
-            "Deck1_Rate": "Deck1.WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.RateText",
-            "Deck2_Title": "Deck2.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.WidgetGroup.TitleText",
-            "Deck2_PlayPosition": "Deck2.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.TitleRow.AlignRight.PlayPositionText",
-            "Deck2_Artist": "Deck2.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.WidgetGroup.ArtistText",
-            "Deck2_Duration": "Deck2.DeckRows12345.DeckRows234.WidgetGroup.WidgetGroup.DeckRow_2_3_ArtistTitleTime.ArtistRow.AlignRight.DurationText",
-            "Deck2_Bpm": "Deck2.WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.BpmText",
-            "Deck2_Rate": "Deck2.WidgetGroup.RateContainer.BpmRateTapContainer.BpmTapContainer.AlignCenter.RateText",
+            f"Deck{deck}_{name}": f"Deck{deck}.{path}"
+            for deck in range(1, decks + 1)
+            for name, path in DECK_ELEMENT_PATHS.items()
         }
 
+    @property
+    def is_available(self) -> bool:
+        """
+        この環境でUIオートメーションを使用できるかどうかを返す。
+        """
+        return Application is not None
+
     def connect(self, max_attempts: int = 3) -> bool:
         """
         Mixxxアプリケーションへの接続を試みる。
@@ -57,6 +96,10 @@ class MixxxAutomation:
         Returns:
             bool: 接続に成功した場合True、失敗した場合False。
         """
+        if not self.is_available:
+            self.logger.warning("pywinautoが利用できないため、UIオートメーションは無効です")
+            return False
+
         for attempt in range(max_attempts):
             try:
                 app = Application(backend="uia").connect(
@@ -69,6 +112,7 @@ class MixxxAutomation:
                     class_name=self.app_window_class_name,
                     visible_only=True,
                 )
+                self.invalidate()
                 self.logger.info("Mixxxアプリケーションに接続しました")
                 return True
             except Exception as e:
@@ -78,30 +122,121 @@ class MixxxAutomation:
         self.logger.error("Mixxxアプリケーションに接続できませんでした")
         return False
 
+    def invalidate(self, element_id: Optional[str] = None):
+        """
+        エレメントのキャッシュを破棄する。
+
+        Args:
+            element_id (Optional[str], optional): 破棄するエレメントのID。指定されない場合は
+                ルートウィンドウを含む全てのキャッシュを破棄します（スキン変更時など）。
+        """
+        with self._cache_lock:
+            if element_id is None:
+                self._root_info = None
+                self._anchor_cache.clear()
+                self._element_cache.clear()
+                return
+
+            self._element_cache.pop(element_id, None)
+            path = self.automation_elems.get(element_id)
+            if path:
+                anchor_name = path.split(".", 1)[0]
+                self._anchor_cache.pop(anchor_name, None)
+                # 同じデッキのエレメントは同時に無効になっている可能性が高い
+                for key, value in self.automation_elems.items():
+                    if value.split(".", 1)[0] == anchor_name:
+                        self._element_cache.pop(key, None)
+
+    def _get_root(self):
+        """Mixxxウィンドウのエレメント情報を取得する"""
+        with self._cache_lock:
+            root = self._root_info
+        if root is None:
+            if not self.main_window and not self.connect():
+                return None
+            root = self.main_window.wrapper_object().element_info
+            with self._cache_lock:
+                self._root_info = root
+        return root
+
+    def _find_anchor(self, name: str):
+        """
+        オートメーションIDの先頭の名前（"Deck1"等）に一致するエレメントを幅優先で検索する。
+
+        見つかったエレメントはキャッシュし、同じデッキのエレメントの検索に再利用します。
+        """
+        with self._cache_lock:
+            anchor = self._anchor_cache.get(name)
+        if anchor is not None:
+            return anchor
+
+        root = self._get_root()
+        if root is None:
+            return None
+
+        suffix = "." + name
+        queue = deque([root])
+        while queue:
+            for child in queue.popleft().children():
+                automation_id = child.automation_id or ""
+                if automation_id == name or automation_id.endswith(suffix):
+                    with self._cache_lock:
+                        self._anchor_cache[name] = child
+                    return child
+                queue.append(child)
+        return None
+
+    def _resolve_element(self, element_id: str):
+        """
+        オートメーションIDのパスをたどってエレメントを取得する。
+
+        デッキのエレメントから、オートメーションIDが目的のパスの前方に一致する
+        子エレメントのみをたどるため、ウィンドウ全体を走査することはありません。
+        """
+        with self._cache_lock:
+            element = self._element_cache.get(element_id)
+        if element is not None:
+            return element
+
+        path = self.automation_elems.get(element_id)
+        if not path:
+            return None
+
+        anchor_name = path.split(".", 1)[0]
+        anchor = self._find_anchor(anchor_name)
+        if anchor is None:
+            return None
+
+        anchor_id = anchor.automation_id
+        target = anchor_id[: len(anchor_id) - len(anchor_name)] + path
+        queue = deque([anchor])
+        while queue:
+            for child in queue.popleft().children():
+                automation_id = child.automation_id or ""
+                if automation_id == target:
+                    element = UIAWrapper(child)
+                    with self._cache_lock:
+                        self._element_cache[element_id] = element
+                    return element
+                # 名前の無いコンテナはオートメーションIDに現れないため、たどる対象とする
+                if not automation_id or target.startswith(automation_id + "."):
+                    queue.append(child)
+        return None
+
     def update_element_cache(self) -> bool:
         """
         テキストエレメントを動的に更新する。
 
-        Mixxxウィンドウ内のテキストエレメントを検索し、
-        オートメーションID辞書を更新します。
+        キャッシュを破棄し、オートメーションID辞書の全てのエレメントを検索し直します。
 
         Returns:
-            bool: エレメントの更新に成功した場合True、失敗した場合False。
+            bool: 全てのエレメントが見つかった場合True、それ以外はFalse。
         """
-        if not self.main_window:
-            if not self.connect():
-                return False
-
+        self.invalidate()
         try:
-            text_elements = self.main_window.descendants(control_type="Text")
-            for elem in text_elements:
-                for key, value in list(self.automation_elems.items()):
-                    if (
-                        isinstance(value, str)
-                        and value in elem.element_info.automation_id
-                    ):
-                        self.automation_elems[key] = elem
-            return True
+            return all(
+                self._resolve_element(key) is not None for key in self.automation_elems
+            )
         except Exception as e:
             self.logger.error(f"エレメントの更新中にエラー: {e}")
             return False
@@ -110,6 +245,9 @@ class MixxxAutomation:
         """
         指定されたエレメントのテキストを取得する。
 
+        キャッシュしたエレメントが無効になっていた場合（スキンの変更等）は、
+        キャッシュを破棄してもう一度だけ検索し直します。
+
         Args:
             element_id (str): 取得するエレメントのID
             force_update (bool, optional): キャッシュを強制的に更新するかどうか。デフォルトはFalse。
@@ -117,26 +255,46 @@ class MixxxAutomation:
         Returns:
             str: エレメントのテキスト。取得できない場合は空文字列。
         """
+        if not self.is_available:
+            return ""
         if force_update:
-            self.update_element_cache()
-
-        element = self.automation_elems.get(element_id)
-        if element:
-            if not isinstance(element, str):
-                try:
-                    return element.window_text()
-                except Exception as e:
-                    self.logger.error(
-                        f"エレメント {element_id} のテキスト取得エラー: {e}"
-                    )
-            else:
-                if force_update:
-                    return ""
-
-                return self.get_element_text(element_id, force_update=True)
+            self.invalidate(element_id)
+
+        for attempt in range(2):
+            try:
+                element = self._resolve_element(element_id)
+                return element.window_text() if element is not None else ""
+            except Exception as e:
+                self.logger.warning(f"エレメント {element_id} のテキスト取得エラー: {e}")
+                # 1回目はデッキ単位、2回目はウィンドウ全体のキャッシュを破棄する
+                self.invalidate(element_id if attempt == 0 else None)
 
         return ""
 
+    def read_deck(
+        self, deck: int, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, str]:
+        """
+        デッキに表示されている情報をまとめて取得する。
+
+        同じデッキのエレメントは共通のデッキエレメントから検索するため、
+        キャッシュが無い場合でもデッキの検索は1回で済みます。
+
+        Args:
+            deck (int): デッキ番号（1始まり）
+            fields (Optional[Iterable[str]], optional): 取得する項目（`DECK_FIELDS`のキー）。
+                指定されない場合は全ての項目を取得します。
+
+        Returns:
+            Dict[str, str]: 項目名とテキストの辞書（title, artist, bpm, rate, position, duration）
+        """
+        if fields is None:
+            fields = DECK_FIELDS
+        return {
+            name: self.get_element_text(f"Deck{deck}_{DECK_FIELDS[name]}")
+            for name in fields
+        }
+
 
 def main():
     """
@@ -149,31 +307,10 @@ def main():
 
     while True:
         try:
-            deck_info = {
-                "Left": [
-                    "Deck1_Title",
-                    "Deck1_PlayPosition",
-                    "Deck1_Artist",
-                    "Deck1_Duration",
-                    "Deck1_Bpm",
-                    "Deck1_Rate",
-                ],
-                "Right": [
-                    "Deck2_Title",
-                    "Deck2_PlayPosition",
-                    "Deck2_Artist",
-                    "Deck2_Duration",
-                    "Deck2_Bpm",
-                    "Deck2_Rate",
-                ],
-            }
-
-            for deck_name, elements in deck_info.items():
-                print(f"{deck_name}:")
-                for element_id in elements:
-                    label = element_id.split("_")[-1]
-                    value = mixxx_automation.get_element_text(element_id)
-                    print(f"  {label:6}: {value}")
+            for deck in range(1, mixxx_automation.decks + 1):
+                print(f"Deck{deck}:")
+                for label, value in mixxx_automation.read_deck(deck).items():
+                    print(f"  {label:8}: {value}")
             time.sleep(0.5)
         except KeyboardInterrupt:
             print("\nプログラムを終了します。")
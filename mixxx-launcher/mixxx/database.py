@@ -1,6 +1,9 @@
 import os
+import pathlib
+import queue
 import sqlite3
-from typing import Optional, List
+import threading
+from typing import Any, Dict, List, Optional, Sequence
 
 
 class MixxxDatabase:
@@ -9,17 +12,30 @@ class MixxxDatabase:
 
     このクラスは、アーティストとタイトルに基づいて音楽トラックのファイルパスを
     検索するメソッドを提供します。
+
+    データベースへは読み取り専用で接続し、接続は小さなプールに保持して使い回します。
+    Mixxxが同時に書き込んでいても、検索のたびに接続を開き直すことはありません。
+    """
+
+    _TRACK_QUERY = """
+        SELECT library.id, library.title, library.artist, track_locations.location
+        FROM library
+        LEFT JOIN track_locations ON library.location = track_locations.id
     """
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, pool_size: int = 4):
         """
         Mixxxデータベース検索を初期化します。
 
         Args:
             db_path (Optional[str], optional): Mixxxデータベースへのカスタムパス。
             指定されない場合は、デフォルトのWindowsパスを使用します。
+            pool_size (int, optional): 保持しておく接続の最大数。デフォルトは4。
         """
         self.db_path = db_path or self._get_default_database_path()
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(pool_size)
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._monitor_lock = threading.Lock()
 
     def _get_default_database_path(self) -> str:
         """
@@ -29,148 +45,381 @@ class MixxxDatabase:
             str: デフォルトのMixxxデータベースファイルへの完全なパス
         """
         user_profile = os.environ.get("USERPROFILE")
+        if user_profile is None:
+            # Windows以外（ジャーナルの再生等）ではLinux版Mixxxの保存先を使用する
+            return os.path.join(os.path.expanduser("~"), ".mixxx", "mixxxdb.sqlite")
         return os.path.join(user_profile, "AppData", "Local", "Mixxx", "mixxxdb.sqlite")
 
-    def search_music(
-        self, artist: str, title: str, like_search: bool = False
-    ) -> Optional[int]:
+    def _acquire_connection(self) -> Optional[sqlite3.Connection]:
         """
-        Mixxxデータベース内で特定の音楽トラックを検索します。
+        プールから読み取り専用接続を取り出します。
 
-        Args:
-            artist (str): アーティスト名
-            title (str): トラックのタイトル
-            like_search (bool): 正規表現検索
+        プールが空の場合にのみ新しい接続を開きます。
 
         Returns:
-            Optional[int]: トラックが見つかった場合はライブラリID、見つからない場合はNone
+            Optional[sqlite3.Connection]: データベース接続。データベースが存在しない場合はNone
+        """
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._open_connection()
+
+    def _open_connection(self) -> Optional[sqlite3.Connection]:
+        """
+        新しい読み取り専用接続を開きます。
+
+        Returns:
+            Optional[sqlite3.Connection]: データベース接続。データベースが存在しない場合はNone
         """
         if not os.path.exists(self.db_path):
             print(f"データベースが存在しません: {self.db_path}")
             return None
 
+        uri = f"{pathlib.Path(self.db_path).resolve().as_uri()}?mode=ro"
+        connection = sqlite3.connect(
+            uri, uri=True, timeout=5, cached_statements=64, check_same_thread=False
+        )
+        connection.execute("PRAGMA query_only = ON")
+        return connection
+
+    def _release_connection(self, connection: sqlite3.Connection):
+        """
+        使い終わった接続をプールに戻します。プールが満杯の場合は接続を閉じます。
+
+        Args:
+            connection (sqlite3.Connection): 返却する接続
+        """
         try:
-            with sqlite3.connect(self.db_path) as connection:
-                cursor = connection.cursor()
-
-                if like_search:
-                    query = """
-                    SELECT id
-                    FROM library
-                    WHERE title LIKE ?
-                      AND ( ? = "" and artist IS NULL
-                         OR artist LIKE ?)
-                    """
-                else:
-                    query = """
-                    SELECT id
-                    FROM library
-                    WHERE title = ?
-                      AND ( ? = "" and artist IS NULL
-                         OR artist = ?)
-                    """
-
-                cursor.execute(query, (title, artist, artist))
-
-                rows = cursor.fetchall()
-
-                return rows[0][0] if rows else None
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _try_fetch_all(
+        self, query: str, params: Sequence[Any] = ()
+    ) -> Optional[List[tuple]]:
+        """
+        クエリを実行し、全ての行を取得します。
+
+        一時的なロック等で取得できなかった場合と、該当する行が無い場合を区別する必要がある
+        呼び出し元（索引の更新等）で使用します。
+
+        Args:
+            query (str): 実行するSQL
+            params (Sequence[Any], optional): SQLのパラメータ
 
+        Returns:
+            Optional[List[tuple]]: 取得した行。データベースが存在しない場合や
+            エラーが発生した場合はNone
+        """
+        connection = None
+        try:
+            connection = self._acquire_connection()
+            if connection is None:
+                return None
+            rows = connection.execute(query, params).fetchall()
         except sqlite3.Error as e:
             print(f"SQLiteエラーが発生しました: {e}")
+            if connection is not None:
+                connection.close()  # 壊れている可能性があるため再利用しない
             return None
 
-    def get_title(self, library_id: int) -> Optional[str]:
+        self._release_connection(connection)
+        return rows
+
+    def _fetch_all(self, query: str, params: Sequence[Any] = ()) -> List[tuple]:
         """
-        Mixxxデータベース内で特定の音楽トラックのタイトルを取得します。
+        クエリを実行し、全ての行を取得します。
 
         Args:
-            library_id (int): ライブラリID
+            query (str): 実行するSQL
+            params (Sequence[Any], optional): SQLのパラメータ
 
         Returns:
-            Optional[str]: トラックが存在する場合は曲名、見つからない場合はNone
+            List[tuple]: 取得した行。エラーが発生した場合は空リスト
         """
-        if not os.path.exists(self.db_path):
-            print(f"データベースが存在しません: {self.db_path}")
-            return None
+        rows = self._try_fetch_all(query, params)
+        return rows if rows is not None else []
 
-        try:
-            with sqlite3.connect(self.db_path) as connection:
-                cursor = connection.cursor()
+    def _fetch_value(self, query: str, params: Sequence[Any] = ()) -> Any:
+        """
+        クエリを実行し、最初の行の最初の列を取得します。
+
+        Args:
+            query (str): 実行するSQL
+            params (Sequence[Any], optional): SQLのパラメータ
+
+        Returns:
+            Any: 取得した値。行が存在しない場合はNone
+        """
+        rows = self._fetch_all(query, params)
+        return rows[0][0] if rows else None
 
-                query = "SELECT title FROM library WHERE id = ?"
-                cursor.execute(query, (library_id,))
+    def close(self):
+        """
+        プールしている全ての接続を閉じます。
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+        with self._monitor_lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+
+    def get_data_version(self) -> Optional[int]:
+        """
+        データベースの変更を検知するための値（`PRAGMA data_version`）を取得します。
 
-                rows = cursor.fetchall()
+        この値は他の接続（Mixxx）がコミットするたびに変化します。値は接続ごとに
+        異なるため、専用の接続を保持して問い合わせます。
 
-                return rows[0][0] if rows else None
+        Returns:
+            Optional[int]: データバージョン。取得できない場合はNone
+        """
+        with self._monitor_lock:
+            try:
+                if self._monitor is None:
+                    self._monitor = self._open_connection()
+                    if self._monitor is None:
+                        return None
+                return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"SQLiteエラーが発生しました: {e}")
+                if self._monitor is not None:
+                    self._monitor.close()
+                    self._monitor = None
+                return None
+
+    def get_library_entries(self) -> Optional[List[tuple]]:
+        """
+        ライブラリに登録されている（削除されていない）全トラックを取得します。
 
-        except sqlite3.Error as e:
-            print(f"SQLiteエラーが発生しました: {e}")
+        Returns:
+            Optional[List[tuple]]: (id, title, artist, duration, bpm, samplerate) のタプルの
+            リスト（IDの順）。データベースを読み込めなかった場合はNone
+        """
+        return self._try_fetch_all(
+            """
+            SELECT id, title, artist, duration, bpm, samplerate
+            FROM library
+            WHERE mixxx_deleted = 0
+            ORDER BY id
+            """
+        )
+
+    def get_all_tracks(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        ライブラリに登録されている（削除されていない）全トラックの情報を取得します。
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: id, title, artist, locationを持つ辞書のリスト。
+            データベースを読み込めなかった場合はNone
+        """
+        rows = self._try_fetch_all(
+            f"{self._TRACK_QUERY} WHERE library.mixxx_deleted = 0 ORDER BY library.id"
+        )
+        if rows is None:
             return None
+        return [
+            {"id": library_id, "title": title, "artist": artist, "location": location}
+            for library_id, title, artist, location in rows
+        ]
 
-    def get_artist(self, library_id: int) -> Optional[str]:
+    def resolve_track(
+        self, artist: str, title: str, like_search: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
-        Mixxxデータベース内で特定の音楽トラックのアーティストを取得します。
+        アーティストとタイトルからトラックを検索し、その情報を1回の問い合わせで取得します。
+
+        Args:
+            artist (str): アーティスト名
+            title (str): トラックのタイトル
+            like_search (bool): LIKE検索を行うかどうか
+
+        Returns:
+            Optional[Dict[str, Any]]: id, title, artist, locationを持つ辞書。
+            見つからない場合はNone
+        """
+        operator = "LIKE" if like_search else "="
+        query = f"""
+        {self._TRACK_QUERY}
+        WHERE library.title {operator} ?
+          AND ( ? = '' AND library.artist IS NULL
+             OR library.artist {operator} ?)
+        LIMIT 1
+        """
+        return self._to_track(self._fetch_all(query, (title, artist, artist)))
+
+    def get_track(self, library_id: int) -> Optional[Dict[str, Any]]:
+        """
+        ライブラリIDからトラックの情報を取得します。
 
         Args:
             library_id (int): ライブラリID
 
         Returns:
-            Optional[str]: トラックが存在する場合はアーティスト名、見つからない場合はNone
+            Optional[Dict[str, Any]]: id, title, artist, locationを持つ辞書。
+            見つからない場合はNone
         """
-        if not os.path.exists(self.db_path):
-            print(f"データベースが存在しません: {self.db_path}")
-            return None
+        query = f"{self._TRACK_QUERY} WHERE library.id = ?"
+        return self._to_track(self._fetch_all(query, (library_id,)))
 
-        try:
-            with sqlite3.connect(self.db_path) as connection:
-                cursor = connection.cursor()
+    def get_autodj_queue(self, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        AutoDJのキュー（`Playlists.hidden = 1`のプレイリスト）の先頭からトラックを取得します。
+
+        Args:
+            limit (int, optional): 取得する最大件数。デフォルトは5。
 
-                query = "SELECT artist FROM library WHERE id = ?"
-                cursor.execute(query, (library_id,))
+        Returns:
+            Optional[List[Dict[str, Any]]]: id, title, artist, locationを持つ辞書のリスト
+            （キューの順）。データベースを読み込めなかった場合はNone
+        """
+        query = f"""
+        {self._TRACK_QUERY}
+        JOIN playlist_tracks ON playlist_tracks.track_id = library.id
+        JOIN Playlists ON Playlists.id = playlist_tracks.playlist_id
+        WHERE Playlists.hidden = 1 AND library.mixxx_deleted = 0
+        ORDER BY playlist_tracks.position
+        LIMIT ?
+        """
+        return self._to_tracks(self._try_fetch_all(query, (limit,)))
 
-                rows = cursor.fetchall()
+    def get_next_tracks(
+        self, library_id: int, limit: int = 5
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        トラックを含むプレイリスト・クレートで、そのトラックの次に並んでいるトラックを取得します。
 
-                return rows[0][0] if rows else None
+        プレイリストは`playlist_tracks.position`の順、順序を持たないクレートはライブラリIDの順とし、
+        履歴（`Playlists.hidden = 2`）とAutoDJのキューは対象にしません。
 
-        except sqlite3.Error as e:
-            print(f"SQLiteエラーが発生しました: {e}")
+        Args:
+            library_id (int): 基準とするトラックのライブラリID
+            limit (int, optional): プレイリスト・クレートごとに取得する最大件数。デフォルトは5。
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: id, title, artist, locationを持つ辞書のリスト
+            （重複を除く）。データベースを読み込めなかった場合はNone
+        """
+        query = f"""
+        WITH next_tracks AS (
+            SELECT following.track_id AS id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY current.playlist_id ORDER BY following.position
+                   ) AS rank
+            FROM playlist_tracks AS current
+            JOIN Playlists ON Playlists.id = current.playlist_id
+            JOIN playlist_tracks AS following
+              ON following.playlist_id = current.playlist_id
+             AND following.position > current.position
+            WHERE current.track_id = ? AND Playlists.hidden = 0
+            UNION ALL
+            SELECT following.track_id AS id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY current.crate_id ORDER BY following.track_id
+                   ) AS rank
+            FROM crate_tracks AS current
+            JOIN crate_tracks AS following
+              ON following.crate_id = current.crate_id
+             AND following.track_id > current.track_id
+            WHERE current.track_id = ?
+        )
+        {self._TRACK_QUERY}
+        JOIN (
+            SELECT id, MIN(rank) AS rank FROM next_tracks WHERE rank <= ? GROUP BY id
+        ) AS candidates ON candidates.id = library.id
+        WHERE library.mixxx_deleted = 0 AND library.id != ?
+        ORDER BY candidates.rank, library.id
+        """
+        return self._to_tracks(
+            self._try_fetch_all(query, (library_id, library_id, limit, library_id))
+        )
+
+    @staticmethod
+    def _to_track(rows: List[tuple]) -> Optional[Dict[str, Any]]:
+        """問い合わせ結果の先頭行をトラック情報の辞書に変換します。"""
+        if not rows:
             return None
 
-    def get_location(self, library_id: int) -> Optional[str]:
+        library_id, title, artist, location = rows[0]
+        return {
+            "id": library_id,
+            "title": title,
+            "artist": artist,
+            "location": location,
+        }
+
+    @classmethod
+    def _to_tracks(cls, rows: Optional[List[tuple]]) -> Optional[List[Dict[str, Any]]]:
+        """問い合わせ結果の全ての行をトラック情報の辞書に変換します。失敗した場合はNoneを返します。"""
+        if rows is None:
+            return None
+        return [cls._to_track([row]) for row in rows]
+
+    def search_music(
+        self, artist: str, title: str, like_search: bool = False
+    ) -> Optional[int]:
         """
-        Mixxxデータベース内で特定の音楽トラックのファイルパスを検索します。
+        Mixxxデータベース内で特定の音楽トラックを検索します。
+
+        Args:
+            artist (str): アーティスト名
+            title (str): トラックのタイトル
+            like_search (bool): 正規表現検索
+
+        Returns:
+            Optional[int]: トラックが見つかった場合はライブラリID、見つからない場合はNone
+        """
+        track = self.resolve_track(artist, title, like_search)
+        return track["id"] if track else None
+
+    def get_title(self, library_id: int) -> Optional[str]:
+        """
+        Mixxxデータベース内で特定の音楽トラックのタイトルを取得します。
 
         Args:
             library_id (int): ライブラリID
 
         Returns:
-            Optional[str]: トラックが存在する場合はファイルパス、見つからない場合はNone
+            Optional[str]: トラックが存在する場合は曲名、見つからない場合はNone
         """
-        if not os.path.exists(self.db_path):
-            print(f"データベースが存在しません: {self.db_path}")
-            return None
+        return self._fetch_value("SELECT title FROM library WHERE id = ?", (library_id,))
 
-        try:
-            with sqlite3.connect(self.db_path) as connection:
-                cursor = connection.cursor()
+    def get_artist(self, library_id: int) -> Optional[str]:
+        """
+        Mixxxデータベース内で特定の音楽トラックのアーティストを取得します。
 
-                query = """
-                SELECT track_locations.location
-                FROM library
-                JOIN track_locations ON library.location = track_locations.id 
-                WHERE library.id = ?
-                """
-                cursor.execute(query, (library_id,))
+        Args:
+            library_id (int): ライブラリID
 
-                rows = cursor.fetchall()
+        Returns:
+            Optional[str]: トラックが存在する場合はアーティスト名、見つからない場合はNone
+        """
+        return self._fetch_value(
+            "SELECT artist FROM library WHERE id = ?", (library_id,)
+        )
 
-                return rows[0][0] if rows else None
+    def get_location(self, library_id: int) -> Optional[str]:
+        """
+        Mixxxデータベース内で特定の音楽トラックのファイルパスを検索します。
 
-        except sqlite3.Error as e:
-            print(f"SQLiteエラーが発生しました: {e}")
-            return None
+        Args:
+            library_id (int): ライブラリID
+
+        Returns:
+            Optional[str]: トラックが存在する場合はファイルパス、見つからない場合はNone
+        """
+        query = """
+        SELECT track_locations.location
+        FROM library
+        JOIN track_locations ON library.location = track_locations.id
+        WHERE library.id = ?
+        """
+        return self._fetch_value(query, (library_id,))
 
 
 def main():
@@ -181,18 +430,12 @@ def main():
     mixxx_db = MixxxDatabase()
 
     # 特定のトラックを検索
-    result = mixxx_db.search_music_path("Artist", "Title")
-    if result:
-        print(f"トラックのパス: {result}")
+    track = mixxx_db.resolve_track("Artist", "Title")
+    if track:
+        print(f"トラックのパス: {track['location']}")
     else:
         print("トラックが見つかりませんでした。")
 
-    # アーティストのすべてのトラックを検索
-    artist_tracks = mixxx_db.search_all_tracks_by_artist("Artist")
-    print("\nアーティストのすべてのトラック:")
-    for track in artist_tracks:
-        print(track)
-
 
 if __name__ == "__main__":
     main()
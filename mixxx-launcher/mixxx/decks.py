@@ -0,0 +1,57 @@
+import re
+from typing import List, Optional, Tuple
+
+# デッキ・サンプラーのグループ名（例: "[Channel10]"、"[Sampler2]"）
+GROUP_PATTERN = re.compile(r"^\[(Channel|Sampler)(\d+)\]$")
+
+# 4デッキのスキン・コントローラーを想定したデフォルトのデッキ数
+DEFAULT_DECKS = 4
+
+
+def parse_group(group: str) -> Optional[Tuple[str, int]]:
+    """
+    グループ名を種類と番号に分解する。
+
+    Args:
+        group (str): グループ名（例: "[Channel1]"）
+
+    Returns:
+        Optional[Tuple[str, int]]: ("Channel" または "Sampler", 1始まりの番号)。
+            デッキ・サンプラー以外のグループ（"[Master]"等）の場合はNone
+    """
+    match = GROUP_PATTERN.match(group)
+    if match is None:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def deck_number(group: str) -> Optional[int]:
+    """
+    デッキのグループ名からデッキ番号を取得する。
+
+    Args:
+        group (str): グループ名（例: "[Channel10]"）
+
+    Returns:
+        Optional[int]: デッキ番号（1始まり）。デッキ以外のグループの場合はNone
+    """
+    parsed = parse_group(group)
+    if parsed is None or parsed[0] != "Channel":
+        return None
+    return parsed[1]
+
+
+def deck_groups(decks: int = DEFAULT_DECKS, samplers: int = 0) -> List[str]:
+    """
+    設定したデッキ数・サンプラー数のグループ名の一覧を返す。
+
+    Args:
+        decks (int, optional): デッキ数。デフォルトは4。
+        samplers (int, optional): サンプラー数。デフォルトは0。
+
+    Returns:
+        List[str]: グループ名（デッキ、サンプラーの順）
+    """
+    return [f"[Channel{number}]" for number in range(1, decks + 1)] + [
+        f"[Sampler{number}]" for number in range(1, samplers + 1)
+    ]
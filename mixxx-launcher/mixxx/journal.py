@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from .process_manager import DEFAULT_MESSAGE_PREFIX
+
+# ジャーナルファイルの先頭行（形式の識別用）
+JOURNAL_HEADER = "# youtubevj-journal v1"
+
+
+class JournalRecorder:
+    """
+    Mixxxから受信したメッセージを、受信間隔と共にジャーナルファイルへ記録するクラス。
+
+    1行に1件のメッセージを「前のメッセージからの経過時間（マイクロ秒）<TAB>メッセージ」の
+    形式で記録します。Mixxxのログの接頭部分（ログレベル等）は記録しません。
+
+    Attributes:
+        path (str): ジャーナルファイルのパス
+        count (int): 記録したメッセージの件数
+    """
+
+    def __init__(
+        self,
+        path: str,
+        message_prefix: bytes = DEFAULT_MESSAGE_PREFIX,
+        flush_interval: float = 1.0,
+    ):
+        """
+        JournalRecorderの初期化メソッド。
+
+        Args:
+            path (str): ジャーナルファイルのパス（既存のファイルは上書きします）
+            message_prefix (bytes, optional): メッセージの接頭辞
+            flush_interval (float, optional): ファイルへ書き出す間隔（秒）。デフォルトは1。
+        """
+        self.path = path
+        self.count = 0
+        self._prefix = message_prefix.decode("utf-8")
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8", newline="\n")
+        self._file.write(JOURNAL_HEADER + "\n")
+        self._last_ns: Optional[int] = None
+        self._flushed_at = time.monotonic()
+
+    def record(self, log_line: str):
+        """
+        ログの1行を記録する。メッセージを含まない行は無視する。
+
+        Args:
+            log_line (str): Mixxxのログの1行
+        """
+        index = log_line.find(self._prefix)
+        if index == -1:
+            return
+
+        now_ns = time.monotonic_ns()
+        with self._lock:
+            if self._file.closed:
+                return
+            delta_us = 0 if self._last_ns is None else (now_ns - self._last_ns) // 1000
+            self._last_ns = now_ns
+            self._file.write(f"{delta_us}\t{log_line[index:]}\n")
+            self.count += 1
+
+            now = time.monotonic()
+            if now - self._flushed_at >= self._flush_interval:
+                self._file.flush()
+                self._flushed_at = now
+
+    def close(self):
+        """
+        ジャーナルファイルを閉じる。
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class JournalReplay:
+    """
+    ジャーナルファイルに記録したメッセージを、記録時の間隔で再生するクラス。
+
+    `MixxxProcessManager`のログの取得元として、Mixxxのプロセスの代わりに使用できます。
+
+    Attributes:
+        path (str): ジャーナルファイルのパス
+        speed (float): 再生速度。0の場合は待機せずに最大速度で再生する
+        count (int): 再生したメッセージの件数
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        JournalReplayの初期化メソッド。
+
+        Args:
+            path (str): ジャーナルファイルのパス
+            speed (float, optional): 再生速度（2で2倍速）。0の場合は最大速度。デフォルトは1。
+        """
+        if speed < 0:
+            raise ValueError(f"再生速度は0以上で指定してください: {speed}")
+        self.path = path
+        self.speed = speed
+        self.count = 0
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, dispatch: Callable[[bytes], None], stop: threading.Event):
+        """
+        ジャーナルを再生する。全てのメッセージを再生するか、停止されるまで戻らない。
+
+        Args:
+            dispatch (Callable[[bytes], None]): ログの1行（改行無し）を受け取る関数
+            stop (threading.Event): 再生を停止するためのイベント
+        """
+        started = time.perf_counter()
+        elapsed_us = 0
+        with open(self.path, "rb") as f:
+            for line_no, line in enumerate(f, 1):
+                if stop.is_set():
+                    break
+                line = line.rstrip(b"\r\n")
+                if not line or line.startswith(b"#"):
+                    continue
+
+                delta, sep, payload = line.partition(b"\t")
+                try:
+                    if not sep:
+                        raise ValueError("経過時間とメッセージの区切りがありません")
+                    delta_us = int(delta)
+                except ValueError:
+                    # 途中で書き込みが中断された行などは読み飛ばし、再生を続ける
+                    self.logger.warning(f"ジャーナルの形式が不正です: {self.path}:{line_no}")
+                    continue
+
+                if self.speed:
+                    elapsed_us += delta_us
+                    wait = started + elapsed_us / 1_000_000 / self.speed - time.perf_counter()
+                    if wait > 0 and stop.wait(wait):
+                        break
+
+                dispatch(payload)
+                self.count += 1
+
+        self.logger.info(f"ジャーナルの再生が終了しました（{self.count}件）")
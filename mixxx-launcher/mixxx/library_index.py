@@ -0,0 +1,303 @@
+import bisect
+import logging
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from .database import MixxxDatabase
+
+# Mixxxが長いテキストを省略表示する際に末尾へ付与する文字
+ELLIPSIS = "…"
+
+# 差分がこの件数を超える場合は、逐次挿入せずに索引を作り直す
+_REBUILD_THRESHOLD = 256
+
+# (正規化タイトル, 正規化アーティスト, 曲の長さ, BPM, サンプルレート)
+_Entry = Tuple[str, str, float, float, int]
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    検索用にテキストを正規化する。
+
+    Args:
+        text (Optional[str]): 正規化するテキスト
+
+    Returns:
+        str: NFKC正規化・大文字小文字の同一視・前後の空白除去を行ったテキスト
+    """
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def _remove_sorted(items: list, item: tuple):
+    """ソート済み配列から要素を取り除く"""
+    index = bisect.bisect_left(items, item)
+    if index < len(items) and items[index] == item:
+        del items[index]
+
+
+class LibraryIndex:
+    """
+    Mixxxライブラリのタイトル・アーティストをメモリ上に保持する索引クラス。
+
+    正規化したタイトルでソートした配列を二分探索することで、UIに表示される
+    省略されたタイトル（末尾が"…"）の前方一致検索をテーブル全体を走査せずに行います。
+    また、曲の長さ・BPM・サンプルレートからトラックを特定するための索引も保持します。
+    Mixxxがデータベースを更新した場合は`PRAGMA data_version`で検知し、
+    変更された行だけを正規化して索引に反映します。再生回数やキューポイントの保存等で
+    更新が続く間は反映を待ち、一連の更新を1回の更新にまとめます。
+
+    Attributes:
+        db (MixxxDatabase): 索引の元となるデータベース
+        logger (logging.Logger): ログ出力用のロガーオブジェクト
+    """
+
+    def __init__(self, db: MixxxDatabase):
+        """
+        LibraryIndexの初期化メソッド。
+
+        Args:
+            db (MixxxDatabase): 索引の元となるデータベース
+        """
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+        # (正規化タイトル, 正規化アーティスト, ライブラリID) のソート済み配列
+        self._keys: List[Tuple[str, str, int]] = []
+        # (曲の長さ, ライブラリID) のソート済み配列
+        self._durations: List[Tuple[float, int]] = []
+        self._entries: Dict[int, _Entry] = {}
+        # 正規化前の行（ライブラリID, タイトル, アーティスト, 曲の長さ, BPM, サンプルレート）。
+        # 変更されていない行の正規化を省略するために保持する
+        self._rows: List[tuple] = []
+        self._rows_by_id: Dict[int, tuple] = {}
+        self._data_version: Optional[int] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        索引が構築済みかどうかを返す。
+        """
+        return self._data_version is not None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        データベースが変更されていれば索引を更新する。
+
+        Args:
+            force (bool, optional): 変更の有無に関わらず更新するかどうか。デフォルトはFalse。
+
+        Returns:
+            bool: 索引を更新した場合True
+        """
+        with self._refresh_lock:
+            data_version = self.db.get_data_version()
+            if data_version is None:
+                return False
+            if not force and data_version == self._data_version:
+                return False
+
+            rows = self.db.get_library_entries()
+            if rows is None:
+                # 一時的なロック等で読み込めなかった場合は現在の索引を維持し、次回に再試行する
+                return False
+            if not force and rows == self._rows:
+                # 再生回数やキューポイント等、索引に関係しない列・テーブルの変更
+                self._data_version = data_version
+                return False
+
+            # 変更された行だけを正規化する
+            previous = self._rows_by_id
+            current = {row[0]: row for row in rows}
+            entries = dict(self._entries)
+            removed = [
+                (library_id, entries.pop(library_id))
+                for library_id in previous.keys() - current.keys()
+            ]
+            added = []
+            for row in rows:
+                if previous.get(row[0]) == row:
+                    continue
+                library_id, title, artist, duration, bpm, samplerate = row
+                if library_id in previous:
+                    removed.append((library_id, entries[library_id]))
+                entry = entries[library_id] = (
+                    normalize_text(title),
+                    normalize_text(artist),
+                    duration or 0.0,
+                    bpm or 0.0,
+                    samplerate or 0,
+                )
+                added.append((library_id, entry))
+
+            if not self._keys or len(removed) + len(added) > _REBUILD_THRESHOLD:
+                keys = sorted(
+                    (entry[0], entry[1], library_id)
+                    for library_id, entry in entries.items()
+                )
+                durations = sorted(
+                    (entry[2], library_id) for library_id, entry in entries.items()
+                )
+            else:
+                # 検索中のスレッドに影響しないよう、複製した配列を更新して差し替える
+                keys = list(self._keys)
+                durations = list(self._durations)
+                for library_id, entry in removed:
+                    _remove_sorted(keys, (entry[0], entry[1], library_id))
+                    _remove_sorted(durations, (entry[2], library_id))
+                for library_id, entry in added:
+                    bisect.insort(keys, (entry[0], entry[1], library_id))
+                    bisect.insort(durations, (entry[2], library_id))
+
+            self._keys = keys
+            self._durations = durations
+            self._entries = entries
+            self._rows = rows
+            self._rows_by_id = current
+            self._data_version = data_version
+            self.logger.info(
+                f"ライブラリ索引を更新しました（{len(keys)}件, +{len(added)}/-{len(removed)}）"
+            )
+            return True
+
+    def start(self, interval: float = 2.0, settle: float = 1.0, max_delay: float = 10.0):
+        """
+        索引を構築し、以降は一定間隔でデータベースの変更を監視するスレッドを開始する。
+
+        変更を検知した後は、settle秒間新たな変更が無くなるまで索引の更新を待ちます。
+        更新が続く場合も、最初の変更からmax_delay秒後には更新します。
+
+        Args:
+            interval (float, optional): 変更を確認する間隔（秒）。デフォルトは2。
+            settle (float, optional): 変更が落ち着いたと判断するまでの秒数。デフォルトは1。
+            max_delay (float, optional): 変更を検知してから更新するまでの最大秒数。デフォルトは10。
+        """
+        if self._thread is not None:
+            return
+
+        def watch():
+            pending_since = None
+            seen = None
+            while not self._stop.is_set():
+                wait = interval
+                try:
+                    data_version = self.db.get_data_version()
+                    if data_version is not None and data_version != self._data_version:
+                        now = time.monotonic()
+                        if pending_since is None:
+                            pending_since = now
+                        if data_version == seen or now - pending_since >= max_delay:
+                            self.refresh()
+                            pending_since = None
+                        else:
+                            wait = settle
+                        seen = data_version
+                except Exception as e:
+                    self.logger.error(f"ライブラリ索引の更新中にエラー: {e}")
+                self._stop.wait(wait)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        変更を監視するスレッドを停止する。
+        """
+        self._stop.set()
+        self._thread = None
+
+    def lookup(self, artist: str, title: str) -> Optional[int]:
+        """
+        アーティストとタイトルからトラックを検索する。
+
+        末尾が"…"のテキストは前方一致、それ以外は完全一致で検索します。
+        複数のトラックが一致した場合は、タイトルの完全一致、短いタイトル、
+        アーティストの完全一致、ライブラリIDの昇順で優先します。
+
+        Args:
+            artist (str): アーティスト名（空文字列の場合はアーティスト未設定のトラックに一致）
+            title (str): トラックのタイトル
+
+        Returns:
+            Optional[int]: 一致したトラックのライブラリID、見つからない場合はNone
+        """
+        title_is_prefix = title.endswith(ELLIPSIS)
+        artist_is_prefix = artist.endswith(ELLIPSIS)
+        q_title = normalize_text(title.rstrip(ELLIPSIS))
+        q_artist = normalize_text(artist.rstrip(ELLIPSIS))
+
+        keys = self._keys
+        best = None
+        index = bisect.bisect_left(keys, (q_title,))
+        while index < len(keys):
+            key_title, key_artist, library_id = keys[index]
+            index += 1
+            if key_title != q_title and not (
+                title_is_prefix and key_title.startswith(q_title)
+            ):
+                break
+            if key_artist != q_artist and not (
+                artist_is_prefix and key_artist.startswith(q_artist)
+            ):
+                continue
+
+            rank = (
+                key_title != q_title,
+                len(key_title),
+                key_artist != q_artist,
+                library_id,
+            )
+            if best is None or rank < best[0]:
+                best = (rank, library_id)
+
+        return best[1] if best else None
+
+    def match_properties(
+        self,
+        duration: float,
+        bpm: Optional[float] = None,
+        samplerate: Optional[int] = None,
+        duration_tolerance: float = 0.5,
+        bpm_tolerance: float = 0.05,
+    ) -> List[int]:
+        """
+        曲の長さ・BPM・サンプルレートが一致するトラックを検索する。
+
+        Args:
+            duration (float): 曲の長さ（秒）
+            bpm (Optional[float], optional): ファイルのBPM。0またはNoneの場合は比較しない。
+            samplerate (Optional[int], optional): サンプルレート。0またはNoneの場合は比較しない。
+            duration_tolerance (float, optional): 曲の長さの許容誤差（秒）
+            bpm_tolerance (float, optional): BPMの許容誤差
+
+        Returns:
+            List[int]: 一致したトラックのライブラリID。曲の長さの差が小さい順
+        """
+        durations = self._durations
+        entries = self._entries
+        index = bisect.bisect_left(durations, (duration - duration_tolerance,))
+        candidates = []
+        while index < len(durations):
+            entry_duration, library_id = durations[index]
+            index += 1
+            if entry_duration > duration + duration_tolerance:
+                break
+            entry = entries.get(library_id)
+            if entry is None:
+                continue
+            if samplerate and entry[4] and entry[4] != samplerate:
+                continue
+            if bpm and entry[3] and abs(entry[3] - bpm) > bpm_tolerance:
+                continue
+            candidates.append((abs(entry_duration - duration), library_id))
+
+        return [library_id for _, library_id in sorted(candidates)]
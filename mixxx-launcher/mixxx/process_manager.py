@@ -1,31 +1,65 @@
 import subprocess
 import logging
 import threading
-from typing import Callable, Optional
+import time
+from typing import TYPE_CHECKING, Callable, Optional
 from contextlib import contextmanager
 
+# コントローラースクリプトが出力するメッセージの接頭辞
+DEFAULT_MESSAGE_PREFIX = b"YouTubeVJ_Message:"
+
+# 標準エラー出力を一度に読み取る最大バイト数
+_READ_SIZE = 1 << 16
+
+if TYPE_CHECKING:
+    from .journal import JournalReplay
+
 
 class MixxxProcessManager:
     """
     Mixxxアプリケーションのプロセス管理を行うクラス。
 
     Mixxxを開発者モードで起動し、リアルタイムでログを処理するための機能を提供します。
+    開発者モードのログは非常に多いため、標準エラー出力をバイナリのまま大きな単位で読み取り、
+    メッセージの接頭辞を含む行だけをデコードしてコールバックに渡します。
+    読み取りが遅れるとパイプが詰まり、Mixxx自体の処理が止まってしまうためです。
+
+    `source`を指定した場合はMixxxを起動せず、記録済みのジャーナルを再生します。
     """
 
-    def __init__(self, mixxx_path: Optional[str] = None):
+    def __init__(
+        self,
+        mixxx_path: Optional[str] = None,
+        message_prefix: Optional[bytes] = DEFAULT_MESSAGE_PREFIX,
+        source: Optional["JournalReplay"] = None,
+    ):
         """
         MixxxProcessManagerのインスタンスを初期化。
 
         Args:
             mixxx_path (Optional[str]): Mixxxの実行可能ファイルのパス。
                                         デフォルトは標準的なインストール先。
+            message_prefix (Optional[bytes]): コールバックに渡す行に含まれる接頭辞。
+                                        Noneの場合は全ての行をコールバックに渡します。
+            source (Optional[JournalReplay]): Mixxxの代わりにログを再生する取得元。
         """
         self.mixxx_executable = mixxx_path or r"C:\Program Files\Mixxx\Mixxx.exe"
+        self.message_prefix = message_prefix
+        self.source = source
+        # 読み取り状況の統計（メトリクスとして出力する）
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.messages_read = 0
         self.logger = logging.getLogger(__name__)
         self._process: Optional[subprocess.Popen] = None
         self._log_thread = None
         self._stop_thread = threading.Event()
         self._log_callback: Optional[Callable[[str], None]] = self._default_log_callback
+        self._debug_sink: Optional[Callable[[str], None]] = None
+        self._debug_rate = 0.0
+        self._debug_tokens = 0.0
+        self._debug_checked_at = 0.0
+        self._debug_suppressed = 0
 
     def set_log_callback(self, callback: Callable[[str], None]):
         """
@@ -36,6 +70,25 @@ class MixxxProcessManager:
         """
         self._log_callback = callback
 
+    def set_debug_sink(
+        self, sink: Optional[Callable[[str], None]], max_lines_per_sec: float = 50.0
+    ):
+        """
+        接頭辞を含まない行を受け取るデバッグ用のコールバック関数を設定する。
+
+        出力が多い場合は1秒あたりの行数を制限し、破棄した行数をまとめて通知します。
+
+        Args:
+            sink (Optional[Callable[[str], None]]): ログ行を受け取るコールバック関数。
+                Noneの場合は接頭辞を含まない行をデコードせずに破棄します。
+            max_lines_per_sec (float, optional): 1秒あたりに渡す最大行数。デフォルトは50。
+        """
+        self._debug_sink = sink
+        self._debug_rate = max_lines_per_sec
+        self._debug_tokens = max_lines_per_sec
+        self._debug_checked_at = time.monotonic()
+        self._debug_suppressed = 0
+
     @contextmanager
     def start(self):
         """
@@ -45,16 +98,18 @@ class MixxxProcessManager:
             subprocess.SubprocessError: プロセス起動または処理中にエラーが発生した場合
         """
         try:
-            self._process = subprocess.Popen(
-                [self.mixxx_executable, "--developer"],
-                stderr=subprocess.PIPE,
-                bufsize=1,
-                universal_newlines=True,
-                text=True,
-            )
+            if self.source is not None:
+                reader = self._replay_reader
+            else:
+                self._process = subprocess.Popen(
+                    [self.mixxx_executable, "--developer"],
+                    stderr=subprocess.PIPE,
+                    bufsize=_READ_SIZE,
+                )
+                reader = self._log_reader
 
             self._stop_thread.clear()
-            self._log_thread = threading.Thread(target=self._log_reader, daemon=True)
+            self._log_thread = threading.Thread(target=reader, daemon=True)
             self._log_thread.start()
 
             yield
@@ -74,6 +129,9 @@ class MixxxProcessManager:
         Returns:
             bool: プロセスが実行中の場合はTrue、終了している場合はFalse
         """
+        if self.source is not None:
+            # 再生中はログスレッドが動作している間を実行中とみなす
+            return self._log_thread is not None and self._log_thread.is_alive()
         if self._process is None:
             return False
         # プロセスがまだ実行中かどうかをpoll()でチェック
@@ -96,17 +154,72 @@ class MixxxProcessManager:
         """ログを読み取るスレッドの処理"""
         try:
             assert self._process is not None
-            for log_line in iter(self._process.stderr.readline, ""):
-                if self._stop_thread.is_set():
+            stream = self._process.stderr
+            # 行単位ではなく、読み取れた分をまとめて取得して自前で行に分割する
+            read = getattr(stream, "read1", stream.read)
+            remainder = b""
+            while not self._stop_thread.is_set():
+                chunk = read(_READ_SIZE)
+                if not chunk:
                     break
-                log_line = log_line.strip()
-                if log_line:
-                    self._log_callback(log_line)
+                self.bytes_read += len(chunk)
+                lines = (remainder + chunk).split(b"\n")
+                remainder = lines.pop()
+                for line in lines:
+                    self._dispatch(line)
+            if remainder:
+                self._dispatch(remainder)
         except Exception as e:
             self.logger.error(f"ログ読み取り中にエラーが発生: {e}")
         finally:
             self.logger.info("ログスレッドを終了しました")
 
+    def _replay_reader(self):
+        """ジャーナルを再生するスレッドの処理"""
+        try:
+            assert self.source is not None
+            self.source.run(self._dispatch, self._stop_thread)
+        except Exception as e:
+            self.logger.error(f"ジャーナルの再生中にエラーが発生: {e}")
+        finally:
+            self.logger.info("ログスレッドを終了しました")
+
+    def _dispatch(self, line: bytes):
+        """
+        ログの1行をコールバック関数に振り分ける。
+
+        Args:
+            line (bytes): 改行を含まないログの1行
+        """
+        self.lines_read += 1
+        if self.message_prefix is None or self.message_prefix in line:
+            self.messages_read += 1
+            log_line = line.decode("utf-8", errors="replace").strip()
+            if log_line:
+                self._log_callback(log_line)
+        elif self._debug_sink is not None:
+            if self._take_debug_token():
+                log_line = line.decode("utf-8", errors="replace").strip()
+                if log_line:
+                    self._debug_sink(log_line)
+
+    def _take_debug_token(self) -> bool:
+        """デバッグ出力の行数制限を確認する（トークンバケット方式）"""
+        now = time.monotonic()
+        self._debug_tokens = min(
+            self._debug_rate,
+            self._debug_tokens + (now - self._debug_checked_at) * self._debug_rate,
+        )
+        self._debug_checked_at = now
+        if self._debug_tokens >= 1.0:
+            self._debug_tokens -= 1.0
+            if self._debug_suppressed:
+                self._debug_sink(f"（{self._debug_suppressed}行のログを省略しました）")
+                self._debug_suppressed = 0
+            return True
+        self._debug_suppressed += 1
+        return False
+
     def _default_log_callback(self, log_line: str):
         """
         デフォルトのログコールバック。
@@ -134,6 +247,9 @@ def main():
         print(log_line)
 
     process_manager.set_log_callback(custom_log_processor)
+    process_manager.set_debug_sink(
+        lambda log_line: print(f"  (debug) {log_line}"), max_lines_per_sec=20
+    )
 
     try:
         with process_manager.start():
@@ -0,0 +1,194 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Optional
+
+from files import TagCache
+from files.tag_cache import extract_tags
+from mixxx import MixxxDatabase
+
+
+def _extract(path: str, keys: tuple):
+    """ワーカープロセスでタグを抽出する。例外はメッセージとして返す"""
+    try:
+        return extract_tags(path, keys), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _lower_priority():
+    """ワーカープロセスの優先度を下げる（Mixxx等の他のアプリケーションを優先させるため）"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(
+                kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS
+            )
+        else:
+            os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def prescan(
+    db: MixxxDatabase,
+    cache: TagCache,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    extract: bool = True,
+    low_priority: bool = False,
+) -> Dict[str, Any]:
+    """
+    Mixxxライブラリの全トラックのタグを事前に抽出し、タグキャッシュに保存する。
+
+    サイズと更新時刻がキャッシュと一致するファイルは読み込まずにスキップし、
+    それ以外のファイルはプロセスプールで並列に読み込みます。
+
+    Args:
+        db (MixxxDatabase): トラックの一覧を取得するデータベース
+        cache (TagCache): 抽出したタグを保存するキャッシュ
+        workers (Optional[int], optional): ワーカープロセス数。指定されない場合はCPU数。
+        progress (Optional[Callable[[int, int], None]], optional):
+            (処理済み件数, 全件数) を受け取る進捗通知のコールバック関数
+        extract (bool, optional): Falseの場合はファイルを読み込まず、キャッシュの有効性の確認
+            （`stat`とキャッシュの参照）のみを行う。デフォルトはTrue。
+        low_priority (bool, optional): ワーカープロセスの優先度を下げるかどうか。
+
+    Returns:
+        Dict[str, Any]: 集計結果。以下のキーを持つ辞書
+            total (int): ライブラリのトラック数
+            scanned (int): 読み込んだファイル数
+            cached (int): キャッシュが有効だったためスキップしたファイル数
+            stale (int): キャッシュが無効または未作成のファイル数（`extract`がFalseの場合）
+            missing_files (List[Dict]): ファイルが存在しないトラック
+            missing_tags (List[Dict]): いずれかのタグが設定されていないトラック
+            errors (List[Dict]): 読み込みに失敗したトラック（"error"キーにエラー内容）
+
+    Raises:
+        RuntimeError: データベースからトラックの一覧を読み込めなかった場合
+    """
+    tracks = db.get_all_tracks()
+    if tracks is None:
+        raise RuntimeError(f"ライブラリを読み込めませんでした: {db.db_path}")
+    result: Dict[str, Any] = {
+        "total": len(tracks),
+        "scanned": 0,
+        "cached": 0,
+        "stale": 0,
+        "missing_files": [],
+        "missing_tags": [],
+        "errors": [],
+    }
+
+    done = 0
+    pending = []
+    for track in tracks:
+        path = track["location"]
+        signature = cache.signature(path) if path else None
+        if signature is None:
+            result["missing_files"].append(track)
+            done += 1
+            continue
+
+        tags = cache.lookup(path, signature)
+        if tags is None:
+            pending.append((track, signature))
+            continue
+
+        result["cached"] += 1
+        done += 1
+        if any(tags.get(key) is None for key in cache.keys):
+            result["missing_tags"].append(track)
+
+    if progress:
+        progress(done, len(tracks))
+
+    if not extract:
+        result["stale"] = len(pending)
+        return result
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_lower_priority if low_priority else None
+        ) as executor:
+            futures = {
+                executor.submit(_extract, track["location"], cache.keys): (
+                    track,
+                    signature,
+                )
+                for track, signature in pending
+            }
+            for future in as_completed(futures):
+                track, signature = futures[future]
+                tags, error = future.result()
+                done += 1
+                if error is not None:
+                    result["errors"].append({**track, "error": error})
+                else:
+                    result["scanned"] += 1
+                    cache.store(track["location"], signature, tags)
+                    if any(tags.get(key) is None for key in cache.keys):
+                        result["missing_tags"].append(track)
+                if progress:
+                    progress(done, len(tracks))
+
+    return result
+
+
+def main():
+    """
+    タグの事前スキャンをコマンドラインから実行する。
+    """
+    parser = argparse.ArgumentParser(
+        description="Mixxxライブラリの全トラックからYouTubeIDを事前に抽出します。"
+    )
+    parser.add_argument("--db", help="Mixxxデータベースのパス")
+    parser.add_argument("--cache", help="タグキャッシュのパス")
+    parser.add_argument("--workers", type=int, help="ワーカープロセス数")
+    parser.add_argument(
+        "--report", help="タグが設定されていないトラックの一覧を書き出すファイル"
+    )
+    args = parser.parse_args()
+
+    db = MixxxDatabase(args.db)
+    cache = TagCache(args.cache)
+
+    def show_progress(done: int, total: int):
+        sys.stdout.write(f"\rスキャン中... {done}/{total}")
+        sys.stdout.flush()
+
+    try:
+        result = prescan(db, cache, args.workers, show_progress)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    print()
+    print(
+        f"トラック数: {result['total']}, 読み込み: {result['scanned']}, "
+        f"キャッシュ済み: {result['cached']}, ファイル無し: {len(result['missing_files'])}, "
+        f"エラー: {len(result['errors'])}"
+    )
+    print(f"タグが設定されていないトラック: {len(result['missing_tags'])}件")
+
+    lines = [
+        f"{track['artist'] or ''}\t{track['title'] or ''}\t{track['location']}"
+        for track in result["missing_tags"]
+    ]
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"一覧を書き出しました: {os.path.abspath(args.report)}")
+    else:
+        for line in lines:
+            print(f"  {line}")
+
+    for track in result["errors"]:
+        print(f"  読み込みエラー: {track['location']}: {track['error']}")
+
+
+if __name__ == "__main__":
+    main()
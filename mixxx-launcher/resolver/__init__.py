@@ -0,0 +1,4 @@
+from .pool import TrackResolverPool
+from .prefetch import Prefetcher
+
+__all__ = ["Prefetcher", "TrackResolverPool"]
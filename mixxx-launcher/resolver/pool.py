@@ -0,0 +1,134 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Job:
+    """ワーカーで実行する1件のトラック情報の解決処理"""
+
+    __slots__ = ("group", "args", "superseded")
+
+    def __init__(self, group: str, args: Tuple[Any, ...]):
+        self.group = group
+        self.args = args
+        self.superseded = False
+
+
+class _Lane:
+    """1グループ（デッキ）分の実行待ち・実行中の処理と、専用のワーカースレッド"""
+
+    __slots__ = ("group", "pending", "running", "cond", "thread")
+
+    def __init__(self, group: str):
+        self.group = group
+        self.pending: Optional[_Job] = None
+        self.running: Optional[_Job] = None
+        self.cond = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+
+class TrackResolverPool:
+    """
+    トラック情報の解決処理をグループ（デッキ）ごとのワーカーで実行するクラス。
+
+    ワーカーはグループごとに独立しているため、あるデッキの検索に時間がかかっても
+    他のデッキのトラック情報の送信は待たされません。
+    同じグループに新しい読み込みが発生した場合、実行待ちの処理は破棄し、
+    実行中の処理の結果は送信しません。古いトラックの情報が新しいトラックの情報を
+    上書きすることはありません。
+
+    Attributes:
+        superseded (int): 新しい読み込みによって破棄された処理の件数
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[..., Any],
+        publish: Callable[[Any], None],
+    ):
+        """
+        TrackResolverPoolの初期化メソッド。
+
+        Args:
+            resolve (Callable[..., Any]): (group, *args) を受け取り、送信する結果を返す関数。
+                Noneを返した場合は何も送信しません。
+            publish (Callable[[Any], None]): 結果を送信するコールバック関数
+        """
+        self.superseded = 0
+        self.logger = logging.getLogger(__name__)
+        self._resolve = resolve
+        self._publish = publish
+        self._lanes: Dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        """
+        ワーカースレッド数（読み込みが発生したグループの数）を返す。
+        """
+        return len(self._lanes)
+
+    def busy(self) -> Dict[str, bool]:
+        """
+        グループごとに、実行中または実行待ちの処理があるかどうかを返す。
+        """
+        with self._lock:
+            lanes = list(self._lanes.values())
+        return {
+            lane.group: lane.pending is not None or lane.running is not None
+            for lane in lanes
+        }
+
+    def submit(self, group: str, *args: Any):
+        """
+        トラック情報の解決処理を追加する。
+
+        Args:
+            group (str): 読み込みが発生したグループ（例: "[Channel1]"）
+            *args (Any): 解決処理に渡す追加の引数
+        """
+        lane = self._lane_for(group)
+        with lane.cond:
+            previous = lane.pending or lane.running
+            if previous is not None and not previous.superseded:
+                previous.superseded = True
+                self.superseded += 1
+            lane.pending = _Job(group, args)
+            lane.cond.notify()
+
+    def _lane_for(self, group: str) -> _Lane:
+        """グループのワーカーを取得する。初めてのグループの場合はワーカーを起動する"""
+        lane = self._lanes.get(group)
+        if lane is not None:
+            return lane
+        with self._lock:
+            lane = self._lanes.get(group)
+            if lane is None:
+                lane = _Lane(group)
+                lane.thread = threading.Thread(
+                    target=self._worker, args=(lane,), daemon=True
+                )
+                lane.thread.start()
+                self._lanes[group] = lane
+            return lane
+
+    def _worker(self, lane: _Lane):
+        """グループの実行待ちの処理を取り出して実行するスレッドの処理"""
+        while True:
+            with lane.cond:
+                while lane.pending is None:
+                    lane.cond.wait()
+                job = lane.running = lane.pending
+                lane.pending = None
+
+            try:
+                result = self._resolve(job.group, *job.args)
+            except Exception as e:
+                self.logger.error(f"トラック情報の解決中にエラー: {job.group}: {e}")
+                result = None
+
+            # 送信中に新しい読み込みで破棄されないよう、ロックを保持したまま送信する
+            with lane.cond:
+                lane.running = None
+                if not job.superseded and result is not None:
+                    self._publish(result)
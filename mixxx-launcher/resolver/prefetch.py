@@ -0,0 +1,238 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from files import TagCache
+from files.tag_cache import Signature
+from mixxx import MixxxDatabase
+
+
+class Prefetcher:
+    """
+    次に読み込まれる可能性が高いトラックのYouTubeIDを事前に解決しておくクラス。
+
+    AutoDJのキューと、読み込まれたトラックを含むプレイリスト・クレートでその次に並んでいる
+    トラックを候補とし、タグキャッシュからYouTubeIDを取得して保持します。候補のトラックが
+    読み込まれた場合は、データベースを参照せずにトラック情報を返せます。
+    ファイルのサイズと更新時刻を解決時と比較し、タグが書き換えられていれば解決し直します。
+    候補は読み込みのたび、およびMixxxがデータベースを更新するたびに更新します。
+    候補の辞書は`_cond`のロック内で参照・差し替えを行い、ファイルの読み込みはロックの外で行います。
+
+    Attributes:
+        depth (int): AutoDJのキュー・プレイリスト・クレートごとの候補数
+        interval (float): データベースの変更を確認する間隔（秒）
+        resolved (int): 事前に解決したトラック数
+        hits (int): 読み込まれたトラックが候補に含まれていた回数
+    """
+
+    def __init__(
+        self,
+        db: MixxxDatabase,
+        tag_cache: TagCache,
+        publish: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        depth: int = 5,
+        interval: float = 2.0,
+    ):
+        """
+        Prefetcherの初期化メソッド。
+
+        Args:
+            db (MixxxDatabase): 候補を取得するデータベース
+            tag_cache (TagCache): YouTubeIDを取得するタグキャッシュ
+            publish (Optional[Callable[[List[Dict[str, Any]]], None]], optional):
+                YouTubeIDが設定された候補（youtube_id, title, artistを持つ辞書のリスト）を
+                受け取るコールバック関数。候補が変わった場合のみ呼び出します。
+            depth (int, optional): AutoDJのキュー・プレイリスト・クレートごとの候補数。デフォルトは5。
+            interval (float, optional): データベースの変更を確認する間隔（秒）。デフォルトは2。
+        """
+        self.depth = depth
+        self.interval = interval
+        self.resolved = 0
+        self.hits = 0
+        self.logger = logging.getLogger(__name__)
+        self._db = db
+        self._tag_cache = tag_cache
+        self._publish = publish
+        self._tracks: Dict[int, Dict[str, Any]] = {}
+        # 解決時のファイルのサイズと更新時刻（タグキャッシュのキーと同じ）
+        self._signatures: Dict[int, Optional[Signature]] = {}
+        self._loaded: Dict[str, int] = {}
+        self._hints: List[Dict[str, Any]] = []
+        self._data_version: Optional[int] = None
+        self._dirty = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """
+        保持している候補のトラック数を返す。
+        """
+        return len(self._tracks)
+
+    def start(self):
+        """
+        候補を更新するバックグラウンドスレッドを開始する。
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, group: str, library_id: int):
+        """
+        トラックの読み込みを通知し、候補の更新を予約する。
+
+        Args:
+            group (str): トラックが読み込まれたグループ（例: "[Channel1]"）
+            library_id (int): 読み込まれたトラックのライブラリID
+        """
+        with self._cond:
+            # 最後に読み込まれたデッキの候補を優先するため、末尾に移動する
+            self._loaded.pop(group, None)
+            self._loaded[group] = library_id
+            self._dirty = True
+            self._cond.notify()
+
+    def get(self, library_id: int) -> Optional[Dict[str, Any]]:
+        """
+        事前に解決したトラック情報を取得する。
+
+        ファイルが解決時から変更されている場合は、タグキャッシュから取得し直します。
+
+        Args:
+            library_id (int): ライブラリID
+
+        Returns:
+            Optional[Dict[str, Any]]: id, title, artist, location, youtube_idを持つ辞書。
+                候補に含まれていない場合はNone
+        """
+        with self._cond:
+            track = self._tracks.get(library_id)
+            signature = self._signatures.get(library_id)
+        if track is None:
+            return None
+
+        if not self._is_current(track, signature):
+            cached = track
+            track, signature = self._resolve(track)
+            with self._cond:
+                # 解決中に候補が更新されていなければ、解決し直した結果に差し替える
+                if self._tracks.get(library_id) is cached:
+                    self._tracks[library_id] = track
+                    self._signatures[library_id] = signature
+        with self._cond:
+            self.hits += 1
+        return dict(track)
+
+    def refresh(self) -> int:
+        """
+        候補を取得し直し、新しい候補のYouTubeIDを解決する。
+
+        Returns:
+            int: 候補のトラック数
+
+        Raises:
+            RuntimeError: データベースから候補を読み込めなかった場合（現在の候補は維持する）
+        """
+        with self._cond:
+            self._dirty = False
+            loaded = list(self._loaded.values())
+            current = dict(self._tracks)
+            signatures = dict(self._signatures)
+
+        sources = [
+            self._db.get_next_tracks(library_id, self.depth)
+            for library_id in reversed(loaded)
+        ]
+        sources.append(self._db.get_autodj_queue(self.depth))
+        if any(source is None for source in sources):
+            raise RuntimeError("先読みの候補をデータベースから読み込めませんでした")
+
+        candidates: Dict[int, Dict[str, Any]] = {}
+        for source in sources:
+            for track in source:
+                candidates.setdefault(track["id"], track)
+        for library_id in loaded:
+            candidates.pop(library_id, None)  # 既にデッキに読み込まれている
+
+        tracks = {}
+        new_signatures = {}
+        for library_id, track in candidates.items():
+            resolved = current.get(library_id)
+            signature = signatures.get(library_id)
+            if (
+                resolved is None
+                or resolved["location"] != track["location"]
+                or not self._is_current(resolved, signature)
+            ):
+                resolved, signature = self._resolve(track)
+            tracks[library_id] = resolved
+            new_signatures[library_id] = signature
+        with self._cond:
+            self._tracks = tracks
+            self._signatures = new_signatures
+
+        self._publish_hints(list(tracks.values()))
+        return len(tracks)
+
+    def _is_current(self, track: Dict[str, Any], signature: Optional[Signature]) -> bool:
+        """ファイルのサイズと更新時刻が解決時（`signature`）から変わっていないかどうかを返す"""
+        if track["location"] is None:
+            return True
+        return self._tag_cache.signature(track["location"]) == signature
+
+    def _resolve(
+        self, track: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[Signature]]:
+        """
+        トラックのYouTubeIDをタグキャッシュから取得する。未抽出・変更済みの場合はファイルを読み込む。
+
+        候補の辞書は更新しないため、ロックの外で呼び出せます。
+        結果は (トラック情報, 解決時のファイルのサイズと更新時刻) として返します。
+        """
+        youtube_id = None
+        signature = None
+        if track["location"] is not None:
+            signature = self._tag_cache.signature(track["location"])
+            youtube_id = self._tag_cache.get_tag(track["location"], "YouTubeID")
+        with self._cond:
+            self.resolved += 1
+        return {**track, "youtube_id": youtube_id}, signature
+
+    def _publish_hints(self, tracks: List[Dict[str, Any]]):
+        """YouTubeIDが設定された候補が変わった場合に送信する"""
+        hints = [
+            {
+                "youtube_id": track["youtube_id"],
+                "title": track["title"],
+                "artist": track["artist"],
+            }
+            for track in tracks
+            if track["youtube_id"]
+        ]
+        if hints == self._hints:
+            return
+        self._hints = hints
+        if self._publish is not None:
+            self._publish(hints)
+
+    def _run(self):
+        """読み込みの通知またはデータベースの変更を待ち、候補を更新するスレッドの処理"""
+        while True:
+            with self._cond:
+                if not self._dirty:
+                    self._cond.wait(self.interval)
+                dirty = self._dirty
+
+            data_version = self._db.get_data_version()
+            if not dirty and data_version == self._data_version:
+                continue
+
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"トラックの先読み中にエラー: {e}")
+                # データベースが変更されていなくても、次の確認で再試行する
+                self._data_version = None
+            else:
+                self._data_version = data_version
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def wait_until(
+    probe: Callable[[], bool],
+    timeout: Optional[float] = None,
+    initial: float = 0.1,
+    max_interval: float = 5.0,
+    factor: float = 2.0,
+    stop: Optional[Callable[[], bool]] = None,
+) -> bool:
+    """
+    probeがTrueを返すまで、間隔を指数的に延ばしながら繰り返し確認する。
+
+    準備が早く整った場合はすぐに戻り、整わない場合も確認の頻度が上がり続けないようにします。
+
+    Args:
+        probe (Callable[[], bool]): 準備が整っていればTrueを返す関数。例外はFalseとして扱う
+        timeout (Optional[float], optional): 最大待機秒数。指定されない場合は無期限
+        initial (float, optional): 最初の確認間隔（秒）。デフォルトは0.1。
+        max_interval (float, optional): 確認間隔の上限（秒）。デフォルトは5。
+        factor (float, optional): 確認ごとに間隔に掛ける倍率。デフォルトは2。
+        stop (Optional[Callable[[], bool]], optional): Trueを返した場合に待機を中止する関数
+
+    Returns:
+        bool: 準備が整った場合True、タイムアウトまたは中止した場合False
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    interval = initial
+    while True:
+        try:
+            if probe():
+                return True
+        except Exception:
+            pass
+        if stop is not None and stop():
+            return False
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            interval = min(interval, remaining)
+        time.sleep(interval)
+        interval = min(interval * factor, max_interval)
+
+
+class StartupReport:
+    """
+    起動処理の段階（フェーズ）ごとの開始時刻・所要時間・結果を記録するクラス。
+
+    各フェーズは並列に実行でき、`/status`で途中経過を、全て完了した時点で一覧を出力します。
+    """
+
+    def __init__(self):
+        """
+        StartupReportの初期化メソッド。
+        """
+        self.started_at = time.monotonic()
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, name: str):
+        """
+        フェーズの開始を記録する。
+
+        Args:
+            name (str): フェーズ名
+        """
+        with self._lock:
+            self._phases[name] = {
+                "started": time.monotonic(),
+                "finished": None,
+                "status": "running",
+                "detail": None,
+            }
+
+    def end(self, name: str, error: Optional[BaseException] = None, detail: Any = None):
+        """
+        フェーズの終了を記録する。
+
+        Args:
+            name (str): フェーズ名
+            error (Optional[BaseException], optional): 失敗した場合の例外
+            detail (Any, optional): 結果の補足（件数等）
+        """
+        with self._lock:
+            phase = self._phases.get(name)
+            if phase is None or phase["finished"] is not None:
+                return
+            phase["finished"] = time.monotonic()
+            phase["status"] = "error" if error is not None else "ok"
+            phase["detail"] = str(error) if error is not None else detail
+
+    def run_parallel(self, tasks: Dict[str, Callable[[], Any]]) -> List[threading.Thread]:
+        """
+        複数のフェーズをそれぞれ別のスレッドで開始する。完了を待たずに戻る。
+
+        Args:
+            tasks (Dict[str, Callable[[], Any]]): フェーズ名と処理。戻り値は結果の補足として記録する
+
+        Returns:
+            List[threading.Thread]: 開始したスレッド
+        """
+
+        def run(name: str, task: Callable[[], Any]):
+            try:
+                detail = task()
+            except Exception as e:
+                self.end(name, e)
+                print(f"起動処理 {name} でエラーが発生しました: {e}")
+            else:
+                self.end(name, detail=detail)
+
+        threads = []
+        for name, task in tasks.items():
+            self.begin(name)
+            thread = threading.Thread(target=run, args=(name, task), daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        フェーズごとの結果を返す。時刻は起動からの経過秒数とする。
+
+        Returns:
+            Dict[str, Any]: "ready"、"ready_after"（全てのフェーズが完了した時点）、
+                "uptime"、"phases"（フェーズ名をキーとする辞書）
+        """
+        now = time.monotonic()
+        with self._lock:
+            phases = {
+                name: {
+                    "status": phase["status"],
+                    "started": round(phase["started"] - self.started_at, 3),
+                    "duration": round(
+                        (phase["finished"] or now) - phase["started"], 3
+                    ),
+                    "detail": phase["detail"],
+                }
+                for name, phase in self._phases.items()
+            }
+        ready = all(phase["status"] != "running" for phase in phases.values())
+        return {
+            "ready": ready,
+            "ready_after": (
+                round(
+                    max(phase["started"] + phase["duration"] for phase in phases.values()), 3
+                )
+                if ready and phases
+                else None
+            ),
+            "uptime": round(now - self.started_at, 3),
+            "phases": phases,
+        }
+
+    def format(self) -> str:
+        """
+        フェーズごとの結果を表形式の文字列にする。
+        """
+        summary = self.summary()
+        lines = [f"{'phase':20} {'status':8} {'start':>8} {'time':>8}"]
+        for name, phase in summary["phases"].items():
+            detail = f"  {phase['detail']}" if phase["detail"] is not None else ""
+            lines.append(
+                f"{name:20} {phase['status']:8} {phase['started']:>7.2f}s "
+                f"{phase['duration']:>7.2f}s{detail}"
+            )
+        if summary["ready_after"] is not None:
+            lines.append(f"{'ready':20} {'':8} {'':>8} {summary['ready_after']:>7.2f}s")
+        return "\n".join(lines)
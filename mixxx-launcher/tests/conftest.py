@@ -0,0 +1,5 @@
+import os
+import sys
+
+# テストからランチャーのモジュール（web、events 等）をインポートできるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+import logging
+import threading
+
+from mixxx.journal import JOURNAL_HEADER, JournalReplay
+
+
+def test_replay_skips_malformed_lines(tmp_path, caplog):
+    path = tmp_path / "session.journal"
+    path.write_bytes(
+        (JOURNAL_HEADER + "\n").encode()
+        + b"0\tfirst\n"
+        + b"12x\tbroken delta\n"
+        + b"no separator\n"
+        + b"100\tsecond\n"
+    )
+    replay = JournalReplay(str(path), speed=1000)
+    received = []
+
+    with caplog.at_level(logging.WARNING, logger="mixxx.journal"):
+        replay.run(received.append, threading.Event())
+
+    assert received == [b"first", b"second"]
+    assert replay.count == 2
+    warnings = [record.getMessage() for record in caplog.records]
+    assert any(message.endswith(":3") for message in warnings)
+    assert any(message.endswith(":4") for message in warnings)
@@ -0,0 +1,73 @@
+import sqlite3
+
+from benchmarks.synthetic import create_library_db
+from mixxx import LibraryIndex, MixxxDatabase
+
+
+def _open(tmp_path):
+    path = create_library_db(str(tmp_path / "mixxxdb.sqlite"), tracks=20)
+    index = LibraryIndex(MixxxDatabase(path))
+    assert index.refresh()
+    return sqlite3.connect(path), index
+
+
+def _title(connection, library_id):
+    return connection.execute(
+        "SELECT artist, title FROM library WHERE id = ?", (library_id,)
+    ).fetchone()
+
+
+def test_refresh_applies_changed_rows(tmp_path):
+    connection, index = _open(tmp_path)
+    artist, title = _title(connection, 3)
+    with connection:
+        connection.execute("UPDATE library SET title = 'Renamed' WHERE id = 3")
+        connection.execute("UPDATE library SET mixxx_deleted = 1 WHERE id = 4")
+        connection.execute(
+            "INSERT INTO library (id, title, artist, duration, bpm, samplerate,"
+            " location, mixxx_deleted) VALUES (100, 'New Song', 'New Artist', 180, 120, 44100, 1, 0)"
+        )
+
+    assert index.refresh()
+    assert len(index) == 20
+    assert index.lookup(artist, "Renamed") == 3
+    assert index.lookup(artist, title) is None
+    assert index.lookup(*_title(connection, 4)) is None
+    assert index.lookup("New Artist", "New…") == 100
+    assert 100 in index.match_properties(180, bpm=120, samplerate=44100)
+
+
+def test_refresh_skips_unrelated_changes(tmp_path):
+    connection, index = _open(tmp_path)
+    with connection:
+        connection.execute("CREATE TABLE cues (id INTEGER PRIMARY KEY)")
+
+    assert not index.refresh()
+    assert index.lookup(*_title(connection, 5)) == 5
+
+
+def test_refresh_keeps_index_when_database_fails(tmp_path):
+    connection, index = _open(tmp_path)
+    artist, title = _title(connection, 5)
+    with connection:
+        connection.execute("ALTER TABLE library RENAME TO library_moved")
+
+    assert not index.refresh()
+    assert len(index) == 20
+    assert index.lookup(artist, title) == 5
+
+    with connection:
+        connection.execute("ALTER TABLE library_moved RENAME TO library")
+    assert not index.refresh()  # 索引に関係する行は変わっていない
+
+    # 一時的なロック等で失敗した場合、データベースが変更されていなくても次の確認で再試行する
+    with connection:
+        connection.execute("CREATE TABLE cues (id INTEGER PRIMARY KEY)")
+    get_library_entries = index.db.get_library_entries
+    calls = []
+    index.db.get_library_entries = lambda: calls.append(1)
+    assert not index.refresh()
+    index.db.get_library_entries = lambda: calls.append(2) or get_library_entries()
+    index.refresh()
+    assert calls == [1, 2]
+    assert index.lookup(artist, title) == 5
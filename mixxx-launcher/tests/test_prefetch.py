@@ -0,0 +1,111 @@
+import os
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import create_library_db, create_mp3
+from files import TagCache
+from mixxx import MixxxDatabase
+from resolver import Prefetcher
+
+
+def _library(tmp_path, tracks=3):
+    """AutoDJのキューに全トラックを追加し、実在するMP3ファイルを割り当てたライブラリを作成する"""
+    path = create_library_db(str(tmp_path / "mixxxdb.sqlite"), tracks=tracks)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executescript(
+            """
+            CREATE TABLE Playlists (id INTEGER PRIMARY KEY, name TEXT, hidden INTEGER);
+            CREATE TABLE playlist_tracks (
+                id INTEGER PRIMARY KEY, playlist_id INTEGER, track_id INTEGER, position INTEGER
+            );
+            CREATE TABLE crate_tracks (crate_id INTEGER, track_id INTEGER);
+            INSERT INTO Playlists VALUES (1, 'Auto DJ', 1);
+            """
+        )
+        for library_id in range(1, tracks + 1):
+            audio = create_mp3(str(tmp_path / f"{library_id}.mp3"), f"video{library_id}")
+            connection.execute(
+                "UPDATE track_locations SET location = ? WHERE id = ?", (audio, library_id)
+            )
+            connection.execute(
+                "INSERT INTO playlist_tracks (playlist_id, track_id, position) VALUES (1, ?, ?)",
+                (library_id, library_id),
+            )
+    connection.close()
+    return MixxxDatabase(path), TagCache(str(tmp_path / "tags.sqlite"))
+
+
+def test_refresh_resolves_autodj_queue(tmp_path):
+    db, cache = _library(tmp_path)
+    hints = []
+    prefetcher = Prefetcher(db, cache, hints.append)
+
+    assert prefetcher.refresh() == 3
+    assert [hint["youtube_id"] for hint in hints[-1]] == ["video1", "video2", "video3"]
+    assert prefetcher.get(2)["youtube_id"] == "video2"
+    assert prefetcher.hits == 1
+
+    prefetcher.refresh()
+    assert len(hints) == 1  # 候補が変わらない場合は送信しない
+
+
+def test_retagged_file_is_resolved_again(tmp_path):
+    db, cache = _library(tmp_path)
+    prefetcher = Prefetcher(db, cache)
+    prefetcher.refresh()
+
+    path = str(tmp_path / "2.mp3")
+    stat = os.stat(path)
+    create_mp3(path, "retagged2")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert prefetcher.get(2)["youtube_id"] == "retagged2"
+    prefetcher.refresh()
+    assert prefetcher.get(2)["youtube_id"] == "retagged2"
+
+
+def test_database_failure_keeps_candidates(tmp_path):
+    db, cache = _library(tmp_path)
+    prefetcher = Prefetcher(db, cache)
+    prefetcher.refresh()
+
+    connection = sqlite3.connect(db.db_path)
+    with connection:
+        connection.execute("ALTER TABLE playlist_tracks RENAME TO playlist_tracks_moved")
+    connection.close()
+
+    with pytest.raises(RuntimeError):
+        prefetcher.refresh()
+    assert len(prefetcher) == 3
+    assert prefetcher.get(1)["youtube_id"] == "video1"
+
+
+def test_get_does_not_restore_track_removed_during_resolve(tmp_path):
+    db, cache = _library(tmp_path)
+    prefetcher = Prefetcher(db, cache)
+    prefetcher.refresh()
+
+    path = str(tmp_path / "2.mp3")
+    stat = os.stat(path)
+    create_mp3(path, "retagged2")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    connection = sqlite3.connect(db.db_path)
+    with connection:
+        connection.execute("DELETE FROM playlist_tracks WHERE track_id = 2")
+    connection.close()
+
+    # getがファイルを読み込み直している間に、別のスレッドで候補が更新された状況を再現する
+    resolve = prefetcher._resolve
+    refreshed = []
+
+    def resolve_during_refresh(track):
+        if not refreshed:
+            refreshed.append(prefetcher.refresh())
+        return resolve(track)
+
+    prefetcher._resolve = resolve_during_refresh
+    assert prefetcher.get(2)["youtube_id"] == "retagged2"
+    assert refreshed == [2]
+    assert prefetcher.get(2) is None
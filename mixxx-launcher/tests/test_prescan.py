@@ -0,0 +1,23 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import create_library_db
+from files import TagCache
+from mixxx import MixxxDatabase
+from prescan import prescan
+
+
+def test_prescan_reports_unreadable_library(tmp_path):
+    path = create_library_db(str(tmp_path / "mixxxdb.sqlite"), tracks=5)
+    db = MixxxDatabase(path)
+    cache = TagCache(str(tmp_path / "tags.sqlite"))
+    assert prescan(db, cache, extract=False)["total"] == 5
+
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("ALTER TABLE library RENAME TO library_moved")
+    connection.close()
+
+    with pytest.raises(RuntimeError):
+        prescan(db, cache, extract=False)
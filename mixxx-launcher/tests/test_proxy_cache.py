@@ -0,0 +1,150 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from web import ProxyCache
+
+
+class _Upstream:
+    """ETagによる条件付きリクエストに対応した、テスト用の上流サーバー"""
+
+    def __init__(self):
+        self.body = b"<html><head></head></html>"
+        self.etag = '"v1"'
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == upstream.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", upstream.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", upstream.etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Length", str(len(upstream.body)))
+                self.end_headers()
+                self.wfile.write(upstream.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = _Upstream()
+    yield server
+    server.close()
+
+
+def _inject(marker):
+    """</head>の前にmarkerを追加する変換処理を返す"""
+    return lambda body, encoding: body.replace(b"</head>", marker + b"</head>")
+
+
+def test_fetch_transforms_200_response(upstream, tmp_path):
+    cache = ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<a>")})
+
+    entry = cache.fetch("page.html")
+
+    assert entry.status == 200
+    assert entry.raw == upstream.body
+    assert entry.body == b"<html><head><a></head></html>"
+    assert entry.headers["Content-Type"] == "text/html; charset=utf-8"
+
+
+def test_revalidation_304_keeps_body(upstream, tmp_path):
+    cache = ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<a>")})
+    cache.fetch("page.html")
+
+    entry = cache.fetch("page.html")
+
+    assert upstream.requests == [None, '"v1"']
+    assert entry.body == b"<html><head><a></head></html>"
+
+
+def test_disk_cache_stores_upstream_body_and_applies_current_transform(
+    upstream, tmp_path
+):
+    ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<a>")}).fetch(
+        "page.html"
+    )
+
+    # 変換処理を変更して再起動した場合、304で検証されたキャッシュにも新しい変換を適用する
+    cache = ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<b>")})
+    entry = cache.fetch("page.html")
+
+    assert upstream.requests == [None, '"v1"']
+    assert entry.body == b"<html><head><b></head></html>"
+
+
+def test_upstream_change_replaces_cache(upstream, tmp_path):
+    cache = ProxyCache(upstream.url, str(tmp_path))
+    cache.fetch("page.html")
+    upstream.body = b"changed"
+    upstream.etag = '"v2"'
+
+    assert cache.fetch("page.html").body == b"changed"
+    assert ProxyCache(upstream.url, str(tmp_path), offline=True).fetch(
+        "page.html"
+    ).body == b"changed"
+
+
+def test_unreachable_upstream_falls_back_to_cache(upstream, tmp_path):
+    ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<a>")}).fetch(
+        "page.html"
+    )
+    upstream.close()
+
+    cache = ProxyCache(
+        upstream.url, str(tmp_path), {"page.html": _inject(b"<a>")}, timeout=1.0
+    )
+    entry = cache.fetch("page.html")
+
+    assert entry.body == b"<html><head><a></head></html>"
+    with pytest.raises(requests.RequestException):
+        cache.fetch("missing.html")
+
+
+def test_offline_uses_disk_cache_only(upstream, tmp_path):
+    ProxyCache(upstream.url, str(tmp_path)).fetch("page.html")
+
+    cache = ProxyCache(upstream.url, str(tmp_path), offline=True)
+
+    assert cache.fetch("page.html").body == upstream.body
+    assert upstream.requests == [None]
+    with pytest.raises(requests.ConnectionError):
+        cache.fetch("missing.html")
+
+
+def test_previous_format_cache_is_refetched(upstream, tmp_path):
+    # 以前の形式では変換後のボディ（/event-decoder.js追加前の投影画面等）を保存していた
+    cache = ProxyCache(upstream.url, str(tmp_path))
+    path = cache._cache_path("page.html")
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        f.write(
+            '{"status": 200, "headers": {}, "etag": "\\"v1\\"", "last_modified": null,'
+            ' "fetched_at": 0, "max_age": 0}'
+        )
+    with open(path + ".body", "wb") as f:
+        f.write(b"<html><head><old></head></html>")
+
+    cache = ProxyCache(upstream.url, str(tmp_path), {"page.html": _inject(b"<new>")})
+    entry = cache.fetch("page.html")
+
+    assert upstream.requests == [None]
+    assert entry.body == b"<html><head><new></head></html>"
@@ -0,0 +1,26 @@
+from web import StaticAssets
+
+
+def _assets(tmp_path, **kwargs):
+    (tmp_path / "index.html").write_text("<html></html>", encoding="utf-8")
+    (tmp_path / "app.js").write_text("console.log(1);", encoding="utf-8")
+    return StaticAssets(str(tmp_path), **kwargs)
+
+
+def test_missing_file_returns_404(tmp_path):
+    assets = _assets(tmp_path)
+
+    assert assets.respond("index.html", {})[0] == 200
+    assert assets.respond("missing.js", {})[0] == 404
+    assert assets.respond("settings", {})[0] == 404
+
+
+def test_fallback_only_for_extensionless_paths(tmp_path):
+    assets = _assets(tmp_path, fallback="index.html")
+
+    status, headers, body = assets.respond("settings", {})
+    assert status == 200
+    assert body == b"<html></html>"
+    assert assets.respond("", {})[0] == 200
+    assert assets.respond("missing.js", {})[0] == 404
+    assert assets.respond("images/missing.png", {})[0] == 404
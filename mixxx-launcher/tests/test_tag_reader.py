@@ -0,0 +1,118 @@
+import os
+
+from files.tag_reader import read_tags
+
+YOUTUBE_ID = "dQw4w9WgXcQ"
+
+
+def _write(tmp_path, name: str, data: bytes) -> str:
+    path = str(tmp_path / name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _syncsafe(size: int) -> bytes:
+    return bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def _id3v23_frame(frame_id: str, payload: bytes) -> bytes:
+    return frame_id.encode("latin-1") + len(payload).to_bytes(4, "big") + b"\x00\x00" + payload
+
+
+def _vorbis_comment(comments) -> bytes:
+    vendor = b"synthetic"
+    data = len(vendor).to_bytes(4, "little") + vendor + len(comments).to_bytes(4, "little")
+    for comment in comments:
+        data += len(comment).to_bytes(4, "little") + comment
+    return data
+
+
+def _ogg_pages(packet: bytes, serial: int, sequence: int) -> bytes:
+    """1つのパケットを最大255セグメントのOggページに分割する（CRCは検証されないため0）"""
+    lacing = [255] * (len(packet) // 255) + [len(packet) % 255]
+    pages = b""
+    offset = 0
+    first = True
+    while lacing:
+        segments, lacing = lacing[:255], lacing[255:]
+        size = sum(segments)
+        header = (
+            b"OggS\x00"
+            + (b"\x00" if first else b"\x01")  # 継続パケット
+            + (0).to_bytes(8, "little")
+            + serial.to_bytes(4, "little")
+            + sequence.to_bytes(4, "little")
+            + b"\x00\x00\x00\x00"
+            + bytes([len(segments)])
+            + bytes(segments)
+        )
+        pages += header + packet[offset : offset + size]
+        offset += size
+        sequence += 1
+        first = False
+    return pages
+
+
+def _mp4_box(box_type: bytes, payload: bytes) -> bytes:
+    return (8 + len(payload)).to_bytes(4, "big") + box_type + payload
+
+
+def test_id3_with_unsynchronisation(tmp_path):
+    # 非同期化の対象となる0xFFに続くバイトを含むフレームをYouTubeIDより前に置く
+    artwork = b"\xff\xd8\xff\xe0" * 64
+    body = _id3v23_frame("APIC", b"\x00image/jpeg\x00\x03\x00" + artwork) + _id3v23_frame(
+        "TXXX", b"\x03YouTubeID\x00" + YOUTUBE_ID.encode("ascii")
+    )
+    unsynchronised = body.replace(b"\xff", b"\xff\x00")
+    header = b"ID3\x03\x00\x80" + _syncsafe(len(unsynchronised))
+    path = _write(tmp_path, "unsync.mp3", header + unsynchronised + b"\xff\xfb\x90\x00")
+
+    assert read_tags(path, ["YouTubeID"]) == {"YouTubeID": YOUTUBE_ID}
+
+
+def test_flac_with_large_picture_before_vorbis_comment(tmp_path):
+    streaminfo = b"\x00" + (34).to_bytes(3, "big") + b"\x00" * 34
+    picture_data = os.urandom(200_000)
+    picture = b"\x06" + len(picture_data).to_bytes(3, "big") + picture_data
+    comment_data = _vorbis_comment([b"TITLE=Synthetic", b"YOUTUBEID=" + YOUTUBE_ID.encode()])
+    comment = b"\x84" + len(comment_data).to_bytes(3, "big") + comment_data
+    path = _write(tmp_path, "picture.flac", b"fLaC" + streaminfo + picture + comment)
+
+    assert read_tags(path, ["YouTubeID"]) == {"YOUTUBEID": YOUTUBE_ID}
+
+
+def test_ogg_vorbis_comment_spanning_pages(tmp_path):
+    identification = b"\x01vorbis" + b"\x00" * 23
+    # 埋め込み画像で3ページ以上にまたがるコメントヘッダーを作る
+    picture = b"METADATA_BLOCK_PICTURE=" + b"A" * 150_000
+    comment_packet = (
+        b"\x03vorbis"
+        + _vorbis_comment([picture, b"YOUTUBEID=" + YOUTUBE_ID.encode()])
+        + b"\x01"
+    )
+    pages = _ogg_pages(identification, serial=1, sequence=0)
+    pages += _ogg_pages(comment_packet, serial=1, sequence=1)
+    assert pages.count(b"OggS") >= 4
+    path = _write(tmp_path, "pages.ogg", pages)
+
+    assert read_tags(path, ["YouTubeID"]) == {"YOUTUBEID": YOUTUBE_ID}
+
+
+def test_m4a_freeform_atom(tmp_path):
+    freeform = _mp4_box(
+        b"----",
+        _mp4_box(b"mean", b"\x00\x00\x00\x00com.apple.iTunes")
+        + _mp4_box(b"name", b"\x00\x00\x00\x00YouTubeID")
+        + _mp4_box(b"data", b"\x00\x00\x00\x01\x00\x00\x00\x00" + YOUTUBE_ID.encode()),
+    )
+    title = _mp4_box(
+        b"\xa9nam", _mp4_box(b"data", b"\x00\x00\x00\x01\x00\x00\x00\x00Synthetic")
+    )
+    hdlr = _mp4_box(b"hdlr", b"\x00" * 8 + b"mdirappl" + b"\x00" * 9)
+    meta = _mp4_box(b"meta", b"\x00\x00\x00\x00" + hdlr + _mp4_box(b"ilst", title + freeform))
+    moov = _mp4_box(b"moov", _mp4_box(b"udta", meta))
+    ftyp = _mp4_box(b"ftyp", b"M4A \x00\x00\x00\x00M4A mp42isom")
+    path = _write(tmp_path, "freeform.m4a", ftyp + moov + _mp4_box(b"mdat", b"\x00" * 16))
+
+    assert read_tags(path, ["YouTubeID"]) == {"YouTubeID": YOUTUBE_ID}
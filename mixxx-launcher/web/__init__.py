@@ -0,0 +1,5 @@
+from .asgi import AsgiApp
+from .proxy_cache import ProxyCache, ProxyEntry
+from .static import StaticAsset, StaticAssets
+
+__all__ = ["AsgiApp", "ProxyCache", "ProxyEntry", "StaticAsset", "StaticAssets"]
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+from events import WIRE_FORMATS, AsyncEventSubscriber, EventBroadcaster, encode_batch
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # 非同期サーバーモードを使用しない場合は不要
+    WsgiToAsgi = None
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_SSE_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"access-control-allow-origin", b"*"),
+]
+
+
+class AsgiApp:
+    """
+    イベントの配信をasyncioで行うASGIアプリケーション。
+
+    SSE（`/events`）とWebSocket（`/ws`）の接続はクライアントごとにスレッドを使わず
+    1つのイベントループで保持し、それ以外のリクエストはFlaskアプリケーションに渡します。
+    多数の投影画面やスマートフォンから同時に接続してもスレッドが枯渇しません。
+
+    Attributes:
+        broadcaster (EventBroadcaster): 配信するイベントのブロードキャスタ
+        events_path (str): SSEのパス
+        websocket_path (Optional[str]): WebSocketのパス。Noneの場合はWebSocketを受け付けない
+    """
+
+    def __init__(
+        self,
+        flask_app,
+        broadcaster: EventBroadcaster,
+        events_path: str = "/events",
+        websocket_path: Optional[str] = "/ws",
+    ):
+        """
+        AsgiAppの初期化メソッド。
+
+        Args:
+            flask_app (Flask): その他のルートを処理するFlaskアプリケーション
+            broadcaster (EventBroadcaster): 配信するイベントのブロードキャスタ
+            events_path (str, optional): SSEのパス。デフォルトは"/events"。
+            websocket_path (Optional[str], optional): WebSocketのパス。デフォルトは"/ws"。
+
+        Raises:
+            RuntimeError: asgirefがインストールされていない場合
+        """
+        if WsgiToAsgi is None:
+            raise RuntimeError("非同期サーバーモードにはasgirefが必要です")
+        self.broadcaster = broadcaster
+        self.events_path = events_path
+        self.websocket_path = websocket_path
+        self.logger = logging.getLogger(__name__)
+        self._wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] == self.events_path:
+            await self._events(scope, receive, send)
+        elif scope["type"] == "websocket":
+            if scope["path"] == self.websocket_path:
+                await self._websocket(scope, receive, send)
+            else:
+                await send({"type": "websocket.close", "code": 1000})
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        else:
+            await self._wsgi(scope, receive, send)
+
+    @staticmethod
+    def _query(scope: Scope, name: str) -> Optional[str]:
+        """クエリ文字列の値を取得する"""
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+        return values[0] if values else None
+
+    @classmethod
+    def _last_event_id(cls, scope: Scope) -> Optional[str]:
+        """`Last-Event-ID`ヘッダー、またはクエリ文字列の`lastEventId`を取得する"""
+        for name, value in scope.get("headers", []):
+            if name == b"last-event-id":
+                return value.decode("latin-1")
+        return cls._query(scope, "lastEventId")
+
+    @classmethod
+    def _wire_format(cls, scope: Scope) -> str:
+        """クエリ文字列の`format`から送信形式を取得する。不明な値の場合は"json"とする"""
+        wire_format = cls._query(scope, "format")
+        return wire_format if wire_format in WIRE_FORMATS else "json"
+
+    async def _events(self, scope: Scope, receive: Receive, send: Send):
+        """SSEでイベントを配信する"""
+        subscriber = AsyncEventSubscriber(self._wire_format(scope))
+        self.broadcaster.subscribe(self._last_event_id(scope), subscriber)
+        watcher = asyncio.ensure_future(
+            self._watch_disconnect(receive, subscriber, "http.disconnect")
+        )
+        stream = self.broadcaster.stream_async(subscriber)
+        try:
+            await send(
+                {"type": "http.response.start", "status": 200, "headers": _SSE_HEADERS}
+            )
+            async for chunk in stream:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        except OSError:
+            pass  # クライアントが切断された
+        finally:
+            watcher.cancel()
+            await stream.aclose()
+            self.broadcaster.unsubscribe(subscriber)
+
+    async def _websocket(self, scope: Scope, receive: Receive, send: Send):
+        """
+        WebSocketでイベントを配信する。
+
+        json・compact形式では1フレームにSSEの`data:`と同じ内容を1件ずつ、
+        binary形式では受信したイベントをまとめて1つのバイナリフレームで送信する。
+        """
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+
+        wire_format = self._wire_format(scope)
+        key = "bytes" if wire_format == "binary" else "text"
+        subscriber = AsyncEventSubscriber(wire_format)
+        self.broadcaster.subscribe(self._last_event_id(scope), subscriber)
+        watcher = asyncio.ensure_future(
+            self._watch_disconnect(receive, subscriber, "websocket.disconnect")
+        )
+        try:
+            events, subscriber.backlog = subscriber.backlog, []
+            definitions, subscriber.definitions = subscriber.definitions, []
+            while not subscriber.closed:
+                for frame in encode_batch(events, wire_format, definitions):
+                    if wire_format != "binary":
+                        frame = frame.decode("utf-8")
+                    await send({"type": "websocket.send", key: frame})
+                definitions = []
+                if events:
+                    self.broadcaster.record_delivery(subscriber, events)
+                # 接続の維持（ping）はサーバー側で行われるため、ここでは待機するだけでよい
+                events = await subscriber.wait_async(self.broadcaster.keepalive_interval)
+        except OSError:
+            pass
+        finally:
+            watcher.cancel()
+            self.broadcaster.unsubscribe(subscriber)
+
+    @staticmethod
+    async def _watch_disconnect(
+        receive: Receive, subscriber: AsyncEventSubscriber, disconnect_type: str
+    ):
+        """クライアントの切断を検知して購読を終了する（クライアントからの受信内容は使用しない）"""
+        while True:
+            message = await receive()
+            if message["type"] == disconnect_type:
+                subscriber.close()
+                return
+
+    @staticmethod
+    async def _lifespan(receive: Receive, send: Send):
+        """サーバーの起動・終了の通知に応答する"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ランチャーと同じ階層の cache ディレクトリにキャッシュを保存する
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "proxy"
+)
+
+# クライアントへ返すレスポンスヘッダー
+_FORWARDED_HEADERS = ("Content-Type",)
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+# ディスクキャッシュの形式。変換後のボディを保存していた以前の形式のキャッシュは読み込まない
+_CACHE_FORMAT = 2
+
+
+class ProxyEntry:
+    """
+    キャッシュされた1件のレスポンス。
+
+    Attributes:
+        status (int): ステータスコード
+        headers (Dict[str, str]): クライアントへ返すレスポンスヘッダー
+        raw (bytes): 上流サーバーのレスポンスボディ（ディスクにはこちらを保存する）
+        body (bytes): クライアントへ返すレスポンスボディ（変換処理の適用後）
+        encoding (Optional[str]): 上流サーバーのレスポンスの文字コード
+        etag (Optional[str]): 上流サーバーのETag
+        last_modified (Optional[str]): 上流サーバーのLast-Modified
+        fetched_at (float): 最後に上流サーバーで検証した時刻（UNIX時間）
+        max_age (float): 検証せずに使用できる秒数
+    """
+
+    __slots__ = (
+        "status",
+        "headers",
+        "raw",
+        "body",
+        "encoding",
+        "etag",
+        "last_modified",
+        "fetched_at",
+        "max_age",
+    )
+
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        raw: bytes,
+        encoding: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: float = 0.0,
+        max_age: float = 0.0,
+    ):
+        self.status = status
+        self.headers = headers
+        self.raw = raw
+        self.body = raw
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.max_age = max_age
+
+    def is_fresh(self) -> bool:
+        """
+        上流サーバーで検証せずに使用できるかどうかを返す。
+        """
+        return time.time() < self.fetched_at + self.max_age
+
+
+class ProxyCache:
+    """
+    上流サーバーのファイルをキャッシュしながら中継するクラス。
+
+    接続を使い回す`requests.Session`で取得したレスポンスをメモリとディスクに保存し、
+    有効期限が切れた後はETag/Last-Modifiedを使った条件付きリクエストで検証します。
+    上流サーバーに接続できない場合は、最後に取得できたレスポンスを返します。
+
+    Attributes:
+        base_url (str): 上流サーバーのベースURL
+        cache_dir (str): ディスクキャッシュの保存先ディレクトリ
+        default_ttl (float): Cache-Controlが無い場合に検証せずに使用できる秒数
+        offline (bool): Trueの場合は上流サーバーへ接続せず、キャッシュのみを使用する
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        cache_dir: Optional[str] = None,
+        transforms: Optional[Dict[str, Callable[[bytes, str], bytes]]] = None,
+        default_ttl: float = 60.0,
+        timeout: float = 5.0,
+        offline: bool = False,
+        retry_interval: float = 30.0,
+    ):
+        """
+        ProxyCacheの初期化メソッド。
+
+        Args:
+            base_url (str): 上流サーバーのベースURL（末尾は"/"）
+            cache_dir (Optional[str], optional): ディスクキャッシュの保存先。
+                指定されない場合は`DEFAULT_CACHE_DIR`を使用します。
+            transforms (Optional[Dict[str, Callable[[bytes, str], bytes]]], optional):
+                パスごとの変換処理。(ボディ, 文字コード) を受け取り、変換後のボディを返す。
+                キャッシュには上流サーバーのボディのみを保存し、変換はメモリに読み込むたびに
+                行います。変換処理を変更した場合も、次回の起動から反映されます。
+            default_ttl (float, optional): Cache-Controlが無い場合の有効期間（秒）。
+            timeout (float, optional): 上流サーバーへのリクエストのタイムアウト（秒）。
+            offline (bool, optional): 上流サーバーへ接続しないかどうか。
+            retry_interval (float, optional): 接続に失敗した後、キャッシュがあるファイルについて
+                再接続を試みずにキャッシュを返す秒数。
+        """
+        self.base_url = base_url
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self.offline = offline
+        self.retry_interval = retry_interval
+        self.logger = logging.getLogger(__name__)
+        self._transforms = transforms or {}
+        self._entries: Dict[str, ProxyEntry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._unreachable_until = 0.0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, subpath: str) -> ProxyEntry:
+        """
+        指定したパスのレスポンスを取得する。
+
+        Args:
+            subpath (str): ベースURLからの相対パス
+
+        Returns:
+            ProxyEntry: レスポンス
+
+        Raises:
+            requests.RequestException: 上流サーバーに接続できず、キャッシュも無い場合
+        """
+        with self._lock_for(subpath):
+            entry = self._entries.get(subpath) or self._load(subpath)
+            if entry is not None and (
+                self.offline
+                or entry.is_fresh()
+                or time.time() < self._unreachable_until
+            ):
+                return entry
+            if self.offline:
+                raise requests.ConnectionError(f"オフラインのためキャッシュがありません: {subpath}")
+
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+
+            try:
+                response = self.session.get(
+                    self.base_url + subpath,
+                    headers=headers,
+                    timeout=self.timeout,
+                    allow_redirects=False,
+                )
+            except requests.RequestException as e:
+                self._unreachable_until = time.time() + self.retry_interval
+                if entry is None:
+                    raise
+                self.logger.warning(f"上流サーバーに接続できないためキャッシュを使用します: {subpath}: {e}")
+                return entry
+
+            if response.status_code == 304 and entry is not None:
+                entry.fetched_at = time.time()
+                entry.max_age = self._max_age(response, entry.max_age)
+                self._save(subpath, entry, write_body=False)
+                return entry
+
+            if response.status_code >= 500 and entry is not None:
+                self.logger.warning(
+                    f"上流サーバーのエラー({response.status_code})のためキャッシュを使用します: {subpath}"
+                )
+                return entry
+
+            new_entry = ProxyEntry(
+                status=response.status_code,
+                headers={
+                    key: response.headers[key]
+                    for key in _FORWARDED_HEADERS
+                    if key in response.headers
+                },
+                raw=response.content,
+                encoding=response.encoding,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                fetched_at=time.time(),
+                max_age=self._max_age(response, self.default_ttl),
+            )
+            self._apply_transform(subpath, new_entry)
+            if response.status_code == 200 and "no-store" not in response.headers.get(
+                "Cache-Control", ""
+            ):
+                self._entries[subpath] = new_entry
+                self._save(subpath, new_entry)
+            return new_entry
+
+    def _apply_transform(self, subpath: str, entry: ProxyEntry):
+        """上流サーバーのボディに変換処理を適用し、クライアントへ返すボディを設定する"""
+        transform = self._transforms.get(subpath)
+        if transform is not None and entry.status == 200:
+            entry.body = transform(entry.raw, entry.encoding or "utf-8")
+        else:
+            entry.body = entry.raw
+
+    def _lock_for(self, subpath: str) -> threading.Lock:
+        """パスごとのロックを取得する（同じファイルを同時に取得しないため）"""
+        with self._locks_lock:
+            lock = self._locks.get(subpath)
+            if lock is None:
+                lock = self._locks[subpath] = threading.Lock()
+            return lock
+
+    def _max_age(self, response: requests.Response, default: float) -> float:
+        """Cache-Controlのmax-ageを取得する"""
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-cache" in cache_control:
+            return 0.0
+        match = _MAX_AGE_PATTERN.search(cache_control)
+        return float(match.group(1)) if match else default
+
+    def _cache_path(self, subpath: str) -> str:
+        """パスに対応するディスクキャッシュのファイルパス（拡張子無し）を返す"""
+        digest = hashlib.sha1(subpath.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def _load(self, subpath: str) -> Optional[ProxyEntry]:
+        """ディスクキャッシュからレスポンスを読み込む"""
+        path = self._cache_path(subpath)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.pop("format", None) != _CACHE_FORMAT:
+                return None
+            with open(path + ".body", "rb") as f:
+                raw = f.read()
+        except (OSError, ValueError):
+            return None
+
+        entry = ProxyEntry(raw=raw, **meta)
+        self._apply_transform(subpath, entry)
+        self._entries[subpath] = entry
+        return entry
+
+    def _save(self, subpath: str, entry: ProxyEntry, write_body: bool = True):
+        """レスポンスをディスクキャッシュに保存する"""
+        path = self._cache_path(subpath)
+        meta = {
+            "format": _CACHE_FORMAT,
+            "status": entry.status,
+            "headers": entry.headers,
+            "encoding": entry.encoding,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "fetched_at": entry.fetched_at,
+            "max_age": entry.max_age,
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if write_body:
+                with open(path + ".body.tmp", "wb") as f:
+                    f.write(entry.raw)
+                os.replace(path + ".body.tmp", path + ".body")
+            with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(path + ".json.tmp", path + ".json")
+        except OSError as e:
+            self.logger.error(f"プロキシキャッシュの書き込み中にエラー: {e}")
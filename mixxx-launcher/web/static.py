@@ -0,0 +1,260 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotliが無い場合はgzipのみ
+    brotli = None
+
+# 圧縮するContent-Type（画像等は既に圧縮されているため対象外）
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# これより小さいファイルは圧縮しても効果が無いため圧縮しない
+_MIN_COMPRESS_SIZE = 256
+
+# 同じ内容であればETagも同じになるため、ブラウザには常に再検証させる
+_CACHE_CONTROL = "no-cache"
+
+
+class StaticAsset:
+    """
+    メモリ上に読み込んだ1ファイル分のレスポンス。
+
+    Attributes:
+        path (str): 公開ディレクトリからの相対パス（区切りは"/"）
+        content_type (str): Content-Type
+        etag (str): 内容から計算した強いETag（圧縮前）
+        variants (Dict[str, bytes]): Content-Encoding（無圧縮は""）ごとのボディ
+        mtime (float): 読み込んだ時点のファイルの更新時刻
+        size (int): 読み込んだ時点のファイルサイズ
+    """
+
+    __slots__ = ("path", "content_type", "etag", "variants", "mtime", "size")
+
+    def __init__(self, path: str, body: bytes, mtime: float):
+        self.path = path
+        self.mtime = mtime
+        self.size = len(body)
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.variants: Dict[str, bytes] = {"": body}
+
+        if len(body) >= _MIN_COMPRESS_SIZE and content_type.startswith(_COMPRESSIBLE_TYPES):
+            # 起動時に一度だけ最大の圧縮率で圧縮しておく（mtime=0で内容が同じなら同じ結果）
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants["br"] = compressed
+
+    def variant_etag(self, encoding: str) -> str:
+        """
+        Content-Encodingごとに異なる強いETagを返す。
+
+        Args:
+            encoding (str): Content-Encoding（無圧縮は""）
+
+        Returns:
+            str: ETag
+        """
+        return self.etag if not encoding else f'{self.etag[:-1]}-{encoding}"'
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes]:
+        """
+        クライアントが受け付ける中で最も小さいボディを選択する。
+
+        Args:
+            accept_encoding (str): リクエストのAccept-Encodingヘッダー
+
+        Returns:
+            Tuple[str, bytes]: (Content-Encoding, ボディ)
+        """
+        accepted = _parse_accept_encoding(accept_encoding)
+        best = ""
+        for encoding, body in self.variants.items():
+            if encoding and encoding in accepted and len(body) < len(self.variants[best]):
+                best = encoding
+        return best, self.variants[best]
+
+
+def _parse_accept_encoding(header: str) -> List[str]:
+    """Accept-Encodingから受け付けるエンコーディング（q=0を除く）を取得する"""
+    accepted = []
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.append(name.lower())
+    return accepted
+
+
+class StaticAssets:
+    """
+    公開ディレクトリのファイルをメモリに読み込み、圧縮済み・ETag付きで返すクラス。
+
+    ファイルは起動時に全て読み込み、gzip（brotliがあればbrotliも）で圧縮しておきます。
+    リクエストごとのファイルアクセスは行わず、`check_interval`秒に一度だけ更新時刻を確認して
+    変更されたファイルを読み込み直します。If-None-MatchのETagが一致する場合は304を返します。
+
+    Attributes:
+        root (str): 公開ディレクトリ
+        fallback (Optional[str]): 存在しない拡張子の無いパスで返すファイル
+        check_interval (float): ファイルの変更を確認する間隔（秒）
+    """
+
+    def __init__(
+        self,
+        root: str,
+        fallback: Optional[str] = None,
+        check_interval: float = 1.0,
+    ):
+        """
+        StaticAssetsの初期化メソッド。
+
+        Args:
+            root (str): 公開ディレクトリ
+            fallback (Optional[str], optional): 存在しない拡張子の無いパス（"/"等）で返すファイル。
+                デフォルトはNone（404を返す）。拡張子の有るパスは常に404を返す。
+            check_interval (float, optional): ファイルの変更を確認する間隔（秒）。デフォルトは1。
+        """
+        self.root = os.path.abspath(root)
+        self.fallback = fallback
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+        self._assets: Dict[str, StaticAsset] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """
+        公開ディレクトリを走査し、追加・変更されたファイルを読み込む。削除されたファイルは破棄する。
+
+        Returns:
+            int: 読み込んだファイル数
+        """
+        with self._lock:
+            return self._scan()
+
+    def _scan(self) -> int:
+        """`load`の本体。`_lock`を保持した状態で呼び出すこと"""
+        found = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                found[path] = (full_path, stat)
+
+        loaded = 0
+        assets = dict(self._assets)
+        for path in set(assets) - set(found):
+            del assets[path]
+        for path, (full_path, stat) in found.items():
+            asset = assets.get(path)
+            if (
+                asset is not None
+                and asset.mtime == stat.st_mtime
+                and asset.size == stat.st_size
+            ):
+                continue
+            try:
+                with open(full_path, "rb") as f:
+                    body = f.read()
+            except OSError as e:
+                self.logger.error(f"静的ファイルの読み込み中にエラー: {path}: {e}")
+                continue
+            assets[path] = StaticAsset(path, body, stat.st_mtime)
+            loaded += 1
+        # 読み込み中のリクエストは以前の内容を返せるよう、まとめて差し替える
+        self._assets = assets
+        self._checked_at = time.monotonic()
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """
+        パスに対応するファイルを取得する。必要に応じて変更を確認する。
+
+        Args:
+            path (str): 公開ディレクトリからの相対パス
+
+        Returns:
+            Optional[StaticAsset]: ファイル。存在しない場合はNone（拡張子の無いパスで
+                フォールバックが設定されている場合はフォールバックのファイル）
+        """
+        if not self._checked_at:
+            self.load()  # 読み込みが完了するまで待つ（起動直後のリクエスト）
+        elif time.monotonic() - self._checked_at >= self.check_interval:
+            # 他のスレッドが確認中であれば待たずに現在の内容を返す
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._scan()
+                finally:
+                    self._lock.release()
+        assets = self._assets
+        path = path.lstrip("/")
+        asset = assets.get(path)
+        if asset is None and self.fallback is not None:
+            # 存在しない画像やスクリプトにHTMLを返さないよう、拡張子の無いパスに限る
+            if not os.path.splitext(path.rsplit("/", 1)[-1])[1]:
+                asset = assets.get(self.fallback)
+        return asset
+
+    def respond(
+        self, path: str, headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        リクエストに対するレスポンスを生成する。
+
+        Args:
+            path (str): 公開ディレクトリからの相対パス
+            headers (Dict[str, str]): リクエストヘッダー（If-None-Match・Accept-Encodingを使用する）
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: (ステータスコード, レスポンスヘッダー, ボディ)
+        """
+        asset = self.get(path)
+        if asset is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not Found"
+
+        encoding, body = asset.select(headers.get("Accept-Encoding", ""))
+        etag = asset.variant_etag(encoding)
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": _CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            for candidate in asset.variants:
+                # クライアントが保持している圧縮形式のままで再利用させる
+                if asset.variant_etag(candidate) in tags:
+                    response_headers["ETag"] = asset.variant_etag(candidate)
+                    return 304, response_headers, b""
+            if "*" in tags:
+                return 304, response_headers, b""
+
+        response_headers["Content-Type"] = asset.content_type
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        return 200, response_headers, body